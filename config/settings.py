@@ -1,8 +1,8 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from web3 import Web3, HTTPProvider
-from web3.middleware import geth_poa_middleware
+from web3 import Web3, HTTPProvider, AsyncWeb3, AsyncHTTPProvider
+from web3.middleware import geth_poa_middleware, async_geth_poa_middleware
 
 # Load environment variables from .env file at project root if present
 load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent / ".env")
@@ -21,6 +21,18 @@ RPC_WS_URL = os.getenv(
 )
 CHAIN_ID = int(os.getenv("CHAIN_ID", 1205614515668104))
 
+# Transport of the async client used by tx_builder, funding_helper and
+# wallet_manager: "http" or "ws" (one persistent WebSocket to RPC_WS_URL that
+# multiplexes all calls and pushes newHeads; reconnects automatically)
+RPC_TRANSPORT = os.getenv("RPC_TRANSPORT", "http").lower()
+RPC_WS_REQUEST_TIMEOUT_SEC = float(os.getenv("RPC_WS_REQUEST_TIMEOUT_SEC", 30))
+RPC_WS_RECONNECT_MAX_SEC = float(os.getenv("RPC_WS_RECONNECT_MAX_SEC", 30))
+
+# JSON-RPC batching of concurrent read calls on the async HTTP client
+RPC_BATCH_ENABLED = os.getenv("RPC_BATCH_ENABLED", "true").lower() in ("1", "true", "yes")
+RPC_BATCH_MAX_SIZE = int(os.getenv("RPC_BATCH_MAX_SIZE", 100))
+RPC_BATCH_LINGER_MS = float(os.getenv("RPC_BATCH_LINGER_MS", 2))
+
 # ----------------------------
 # lcore-node MVP Configuration
 # ----------------------------
@@ -29,6 +41,40 @@ LCORE_NODE_URL = os.getenv("LCORE_NODE_URL", "http://127.0.0.1:3000")
 LCORE_NODE_TIMEOUT = int(os.getenv("LCORE_NODE_TIMEOUT", 30))
 LCORE_NODE_MAX_RETRIES = int(os.getenv("LCORE_NODE_MAX_RETRIES", 3))
 
+# Micro-batching of IoT data submissions: concurrent submit_device_data calls
+# are sent together to LCORE_BATCH_PATH once LCORE_BATCH_MAX_ITEMS readings or
+# ~LCORE_BATCH_MAX_BYTES of payload are queued, or after LCORE_BATCH_LINGER_MS.
+# Needs an lcore-node with the batch endpoint (see utils/lcore_stub.py).
+LCORE_BATCH_ENABLED = os.getenv("LCORE_BATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+LCORE_BATCH_MAX_ITEMS = int(os.getenv("LCORE_BATCH_MAX_ITEMS", 50))
+LCORE_BATCH_MAX_BYTES = int(os.getenv("LCORE_BATCH_MAX_BYTES", 256 * 1024))
+LCORE_BATCH_LINGER_MS = float(os.getenv("LCORE_BATCH_LINGER_MS", 10))
+LCORE_BATCH_PATH = os.getenv("LCORE_BATCH_PATH", "/device/data/batch")
+
+# Adaptive (AIMD) cap on device requests in flight to lcore-node: grows by ~1
+# per round of healthy requests, is multiplied by LCORE_LIMIT_BACKOFF on an
+# error, timeout or a response slower than LCORE_LIMIT_LATENCY_TARGET_MS.
+LCORE_LIMIT_ENABLED = os.getenv("LCORE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+LCORE_LIMIT_INITIAL = int(os.getenv("LCORE_LIMIT_INITIAL", 8))
+LCORE_LIMIT_MIN = int(os.getenv("LCORE_LIMIT_MIN", 1))
+LCORE_LIMIT_MAX = int(os.getenv("LCORE_LIMIT_MAX", 256))
+LCORE_LIMIT_LATENCY_TARGET_MS = float(os.getenv("LCORE_LIMIT_LATENCY_TARGET_MS", 2000))
+LCORE_LIMIT_BACKOFF = float(os.getenv("LCORE_LIMIT_BACKOFF", 0.5))
+
+# Circuit breaker: LCORE_BREAKER_FAILURE_THRESHOLD consecutive failures make
+# device requests fail fast for LCORE_BREAKER_RESET_SEC, after which
+# LCORE_BREAKER_HALF_OPEN_CALLS trial requests decide whether to close it.
+LCORE_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LCORE_BREAKER_FAILURE_THRESHOLD", 5))
+LCORE_BREAKER_RESET_SEC = float(os.getenv("LCORE_BREAKER_RESET_SEC", 10))
+LCORE_BREAKER_HALF_OPEN_CALLS = int(os.getenv("LCORE_BREAKER_HALF_OPEN_CALLS", 1))
+# Retries: at most LCORE_RETRY_BUDGET_RATIO retries per request (plus
+# LCORE_RETRY_MIN_PER_SEC), each after a random delay of up to
+# LCORE_RETRY_BASE_MS * 2^(retry-1), capped at LCORE_RETRY_MAX_BACKOFF_MS.
+LCORE_RETRY_BUDGET_RATIO = float(os.getenv("LCORE_RETRY_BUDGET_RATIO", 0.2))
+LCORE_RETRY_MIN_PER_SEC = float(os.getenv("LCORE_RETRY_MIN_PER_SEC", 1))
+LCORE_RETRY_BASE_MS = float(os.getenv("LCORE_RETRY_BASE_MS", 100))
+LCORE_RETRY_MAX_BACKOFF_MS = float(os.getenv("LCORE_RETRY_MAX_BACKOFF_MS", 2000))
+
 # MVP IoT Processor Contract Address (deployed on KC-Chain)
 MVP_IOT_PROCESSOR_ADDRESS = os.getenv(
     "MVP_IOT_PROCESSOR_ADDRESS",
@@ -53,22 +99,153 @@ PRIVATE_KEYS = [
 DEFAULT_GAS_LIMIT = int(os.getenv("DEFAULT_GAS_LIMIT", 3000000))  # High limit for Stylus contracts
 FIXED_GAS_PRICE_WEI = int(os.getenv("FIXED_GAS_PRICE_WEI", 0))  # 0 = use network gas price
 
+# Fee oracle: "auto" (EIP-1559 when the chain has a base fee), "legacy" or "eip1559"
+FEE_MODE = os.getenv("FEE_MODE", "auto")
+FEE_ORACLE_TTL_SEC = float(os.getenv("FEE_ORACLE_TTL_SEC", 5.0))  # also refreshed on every new block
+FEE_PRIORITY_PERCENTILE = float(os.getenv("FEE_PRIORITY_PERCENTILE", 50))
+
+# ----------------------------
+# Process Sharding
+# ----------------------------
+
+# Worker processes started by main.py. Each owns a disjoint slice of the
+# wallets and IoT devices, runs its own event loop and generates its share of
+# every configured rate; the parent process reports fleet-wide totals.
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", 1))
+# Set by the launcher for each worker process – not meant to be configured
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", 0))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", 1))
+# Interval at which worker processes report their counters to the parent
+SHARD_REPORT_SEC = float(os.getenv("SHARD_REPORT_SEC", 2.0))
+
+# ----------------------------
+# Transaction Engine Configuration
+# ----------------------------
+
+# Maximum number of operations each workload keeps in flight at once; the
+# load engine sheds arrivals beyond this cap
+MAX_IN_FLIGHT_TX = int(os.getenv("MAX_IN_FLIGHT_TX", 32))
+# Maximum number of unconfirmed transactions per sender wallet (local nonce pipeline depth)
+MAX_PENDING_TX_PER_WALLET = int(os.getenv("MAX_PENDING_TX_PER_WALLET", 16))
+TX_RECEIPT_TIMEOUT_SEC = float(os.getenv("TX_RECEIPT_TIMEOUT_SEC", 120))
+# Interval at which the local balance ledger is reconciled with the chain
+BALANCE_RECONCILE_SEC = float(os.getenv("BALANCE_RECONCILE_SEC", 60))
+# Interval at which the shared receipt tracker polls for new blocks
+TX_RECEIPT_POLL_SEC = float(os.getenv("TX_RECEIPT_POLL_SEC", 0.5))
+# Worker processes that sign transactions off the event loop (0 signs inline).
+# Sharded workers already occupy every core, so they sign inline by default.
+SIGNING_WORKERS = int(os.getenv("SIGNING_WORKERS", 0 if SHARD_COUNT > 1 else max(1, (os.cpu_count() or 2) - 1)))
+# Transfers pre-signed ahead of demand per wallet (0 disables signing ahead)
+PRESIGN_DEPTH = int(os.getenv("PRESIGN_DEPTH", 4))
+# Re-sign a queued transaction if its fee cap fell below this share of the current quote
+PRESIGN_FEE_TOLERANCE = float(os.getenv("PRESIGN_FEE_TOLERANCE", 0.9))
+
 # ----------------------------
 # IoT Simulation Configuration
 # ----------------------------
 
 # Number of IoT devices to simulate
 IOT_DEVICE_COUNT = int(os.getenv("IOT_DEVICE_COUNT", 15))
+# First device number; devices are numbered consecutively from here (e.g.
+# EV_1000, GH_1001, ...). Use a fresh range to get devices lcore-node has not seen.
+IOT_DEVICE_ID_START = int(os.getenv("IOT_DEVICE_ID_START", 1000))
 
 # Data submission rates (per second)
 IOT_REGISTRATION_RATE = float(os.getenv("IOT_REGISTRATION_RATE", 0.1))  # 1 registration per 10 seconds
 IOT_DATA_SUBMISSION_RATE = float(os.getenv("IOT_DATA_SUBMISSION_RATE", 0.2))  # 1 submission per 5 seconds
 
+# ----------------------------
+# Load Engine Configuration
+# ----------------------------
+
+# Target arrival rates (operations per second) for the dApp workloads.
+# IoT workloads use IOT_REGISTRATION_RATE / IOT_DATA_SUBMISSION_RATE above.
+PAYMENT_TX_RATE = float(os.getenv("PAYMENT_TX_RATE", 2.0))
+MERCHANT_TX_RATE = float(os.getenv("MERCHANT_TX_RATE", 1.0))
+LENDING_TX_RATE = float(os.getenv("LENDING_TX_RATE", 0.5))  # each operation = origination + repayment
+
+# Arrival process: "constant", "poisson" or "burst"
+LOAD_ARRIVAL_PROCESS = os.getenv("LOAD_ARRIVAL_PROCESS", "poisson")
+LOAD_BURST_SIZE = int(os.getenv("LOAD_BURST_SIZE", 10))
+
+# Rate profile: "constant", "ramp" (0 -> target over LOAD_RAMP_SEC) or
+# "step" (target reached in LOAD_STEP_COUNT steps of LOAD_STEP_SEC)
+LOAD_PROFILE = os.getenv("LOAD_PROFILE", "constant")
+LOAD_RAMP_SEC = float(os.getenv("LOAD_RAMP_SEC", 300))
+LOAD_STEP_SEC = float(os.getenv("LOAD_STEP_SEC", 60))
+LOAD_STEP_COUNT = int(os.getenv("LOAD_STEP_COUNT", 5))
+
+# ----------------------------
+# Run Mode / Saturation Search
+# ----------------------------
+
+# "stress" runs the configured load indefinitely; "saturation" searches the
+# highest rate each workload sustains within TARGET_SUCCESS_RATE and
+# TARGET_MAX_LATENCY_SEC (as p99) and writes logs/saturation_results.json
+RUN_MODE = os.getenv("RUN_MODE", "stress")
+SATURATION_STRATEGY = os.getenv("SATURATION_STRATEGY", "binary")  # "staged" or "binary"
+SATURATION_WORKLOADS = [
+    w.strip() for w in os.getenv(
+        "SATURATION_WORKLOADS", "payment_app,merchant_app,lending_app,iot_data_submission"
+    ).split(",") if w.strip()
+]
+SATURATION_START_RATE = float(os.getenv("SATURATION_START_RATE", 1.0))
+SATURATION_GROWTH_FACTOR = float(os.getenv("SATURATION_GROWTH_FACTOR", 2.0))
+SATURATION_MAX_RATE = float(os.getenv("SATURATION_MAX_RATE", 1000.0))
+SATURATION_STAGE_SEC = float(os.getenv("SATURATION_STAGE_SEC", 60))
+SATURATION_BISECT_STEPS = int(os.getenv("SATURATION_BISECT_STEPS", 4))
+# In-flight cap per saturation stage; kept far above MAX_IN_FLIGHT_TX so the
+# search measures the chain rather than the client's own limit
+SATURATION_MAX_IN_FLIGHT = int(os.getenv("SATURATION_MAX_IN_FLIGHT", 10000))
+# A stage is client-limited if operations spent this share of their time
+# waiting for nonce slots or signing, or if it achieved less than
+# (1 - SATURATION_RATE_TOLERANCE) of its rate without shedding
+SATURATION_CLIENT_WAIT_SHARE = float(os.getenv("SATURATION_CLIENT_WAIT_SHARE", 0.1))
+SATURATION_RATE_TOLERANCE = float(os.getenv("SATURATION_RATE_TOLERANCE", 0.1))
+
 # Performance targets
 TARGET_DAILY_ENTRIES = int(os.getenv("TARGET_DAILY_ENTRIES", 500))
 TARGET_SUCCESS_RATE = float(os.getenv("TARGET_SUCCESS_RATE", 0.95))
 TARGET_MAX_LATENCY_SEC = float(os.getenv("TARGET_MAX_LATENCY_SEC", 30.0))
 
+# ----------------------------
+# Metrics Output
+# ----------------------------
+
+# tx_metrics.csv is written by a background thread in batches of up to
+# METRICS_FLUSH_ROWS rows, at least every METRICS_FLUSH_SEC seconds
+METRICS_FLUSH_ROWS = int(os.getenv("METRICS_FLUSH_ROWS", 500))
+METRICS_FLUSH_SEC = float(os.getenv("METRICS_FLUSH_SEC", 1.0))
+# Rotate by size and/or age (0 disables); rotated files are gzipped if enabled
+METRICS_ROTATE_MB = float(os.getenv("METRICS_ROTATE_MB", 100))
+METRICS_ROTATE_SEC = float(os.getenv("METRICS_ROTATE_SEC", 0))
+METRICS_COMPRESS = os.getenv("METRICS_COMPRESS", "true").lower() in ("1", "true", "yes")
+
+# Where IoT pipeline records go: "csv" (iot_metrics.csv / device_stats.csv),
+# "sqlite" (indexed, queryable store) or "both"
+IOT_METRICS_SINK = os.getenv("IOT_METRICS_SINK", "csv").lower()
+# SQLite database path; shard processes share it (WAL mode)
+IOT_METRICS_DB = os.getenv("IOT_METRICS_DB", os.path.join(os.getenv("LOG_DIR", "logs"), "iot_metrics.db"))
+# Rolling windows (seconds) for live ops/sec, success rate and latency
+ROLLING_WINDOWS_SEC = [float(w) for w in os.getenv("ROLLING_WINDOWS_SEC", "10,60,300,3600").split(",") if w.strip()]
+
+# ----------------------------
+# Health & Metrics Server
+# ----------------------------
+
+HEALTHCHECK_PORT = int(os.getenv("HEALTHCHECK_PORT", 8000))
+# Background health prober (lcore-node /status and the RPC endpoint): one probe
+# per dependency every HEALTH_PROBE_INTERVAL_SEC; a dependency is down after
+# HEALTH_PROBE_FAILURE_THRESHOLD consecutive failed (or timed out) probes.
+# /ready and the load engine's workload pausing read the cached result.
+HEALTH_PROBE_INTERVAL_SEC = float(os.getenv("HEALTH_PROBE_INTERVAL_SEC", 5.0))
+HEALTH_PROBE_TIMEOUT_SEC = float(os.getenv("HEALTH_PROBE_TIMEOUT_SEC", 3.0))
+HEALTH_PROBE_FAILURE_THRESHOLD = int(os.getenv("HEALTH_PROBE_FAILURE_THRESHOLD", 2))
+# Probe samples kept per dependency (latency history)
+HEALTH_PROBE_HISTORY = int(os.getenv("HEALTH_PROBE_HISTORY", 120))
+# Pause workloads while a dependency they need is down
+PAUSE_ON_DEPENDENCY_DOWN = os.getenv("PAUSE_ON_DEPENDENCY_DOWN", "true").lower() in ("1", "true", "yes")
+
 # ----------------------------
 # Web3 Setup
 # ----------------------------
@@ -76,6 +253,31 @@ TARGET_MAX_LATENCY_SEC = float(os.getenv("TARGET_MAX_LATENCY_SEC", 30.0))
 web3_http = Web3(HTTPProvider(RPC_HTTP_URL))
 web3_http.middleware_onion.inject(geth_poa_middleware, layer=0)
 
+# Non-blocking client used on the transaction hot path. The synchronous
+# ``web3_http`` instance is kept for one-shot scripts such as setup_wallets.py.
+# Over HTTP with RPC_BATCH_ENABLED, concurrent read calls share JSON-RPC batch
+# requests; over WebSocket all calls share one connection anyway.
+if RPC_TRANSPORT == "ws":
+    from utils.ws_provider import WebSocketRPCProvider
+
+    _async_provider = WebSocketRPCProvider(
+        RPC_WS_URL,
+        request_timeout=RPC_WS_REQUEST_TIMEOUT_SEC,
+        reconnect_max_sec=RPC_WS_RECONNECT_MAX_SEC,
+    )
+elif RPC_BATCH_ENABLED:
+    from utils.rpc_batcher import BatchingHTTPProvider
+
+    _async_provider = BatchingHTTPProvider(
+        RPC_HTTP_URL,
+        max_batch_size=RPC_BATCH_MAX_SIZE,
+        linger_sec=RPC_BATCH_LINGER_MS / 1000,
+    )
+else:
+    _async_provider = AsyncHTTPProvider(RPC_HTTP_URL)
+web3_async = AsyncWeb3(_async_provider)
+web3_async.middleware_onion.inject(async_geth_poa_middleware, layer=0)
+
 def get_account(index: int = 0):
     """Get account from private key by index"""
     if index >= len(PRIVATE_KEYS):
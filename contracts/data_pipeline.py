@@ -1,16 +1,21 @@
 import asyncio
 import random
 import logging
-from datetime import datetime
+import time
 
-from utils.device_simulator import device_simulator, IoTDevice
+from utils.device_simulator import device_simulator, sensor_data_batcher, IoTDevice
 from utils.lcore_client import lcore_client
+from utils.health_prober import health_prober
 from utils.iot_metrics import log_iot_metric, iot_metrics_tracker, log_device_stats
 from config.settings import LCORE_NODE_URL, IOT_REGISTRATION_RATE, IOT_DATA_SUBMISSION_RATE
 
 
 async def register_iot_device():
-    """Register a new IoT device through lcore-node MVP"""
+    """Register a new IoT device through lcore-node MVP
+
+    Returns:
+        True/False for a registration attempt, None if no device needed registering
+    """
     try:
         # Get a device that needs registration
         device = device_simulator.get_device_for_registration()
@@ -37,6 +42,7 @@ async def register_iot_device():
                 pipeline_stage="lcore_api"
             )
             iot_metrics_tracker.record_operation(True, latency, "registration")
+            return True
             
         else:
             error_details = response.get("error", "unknown_error")
@@ -52,13 +58,19 @@ async def register_iot_device():
                 error_details=str(error_details)
             )
             iot_metrics_tracker.record_operation(False, latency, "registration")
+            return False
     
     except Exception as e:
         logging.error(f"Exception in device registration: {e}")
+        return False
 
 
 async def submit_iot_sensor_data():
-    """Submit real IoT sensor data through lcore-node dual-encryption pipeline"""
+    """Submit real IoT sensor data through lcore-node dual-encryption pipeline
+
+    Returns:
+        Whether the submission succeeded, None if no registered device was available
+    """
     try:
         # Get a registered device for data submission
         device = device_simulator.get_device_for_data_submission()
@@ -66,8 +78,9 @@ async def submit_iot_sensor_data():
             logging.debug("No registered devices available for data submission")
             return
         
-        # Generate realistic sensor data based on device type
-        device_id, sensor_payload = device_simulator.generate_sensor_data(device)
+        # Generate realistic sensor data based on device type, in one batch
+        # with every other submission started in this scheduler tick
+        device_id, sensor_payload = await sensor_data_batcher.generate(device)
         data_size = len(sensor_payload.encode('utf-8'))
         
         logging.info(f"Submitting sensor data from {device_id} ({device.device_type.value}) - {data_size} bytes")
@@ -76,8 +89,7 @@ async def submit_iot_sensor_data():
         success, response, latency = await lcore_client.submit_device_data(device, sensor_payload)
         
         # Update device statistics
-        timestamp = datetime.now().isoformat()
-        device_simulator.update_device_stats(device_id, success, timestamp)
+        device_simulator.update_device_stats(device_id, success, time.time())
         
         if success:
             # Extract transaction hash if available
@@ -124,16 +136,19 @@ async def submit_iot_sensor_data():
         # Periodically log device stats
         if random.random() < 0.1:  # 10% chance to log stats
             log_device_stats(device)
+        
+        return success
     
     except Exception as e:
         logging.error(f"Exception in IoT data submission: {e}")
+        return False
 
 
 async def monitor_iot_pipeline():
     """Monitor IoT pipeline health and performance"""
     try:
-        # Check lcore-node health
-        is_healthy = await lcore_client.health_check()
+        # lcore-node health as last seen by the background prober (no request here)
+        is_healthy = health_prober.is_healthy("lcore_node")
         
         if not is_healthy:
             logging.warning("lcore-node health check failed - may impact IoT operations")
@@ -147,6 +162,23 @@ async def monitor_iot_pipeline():
             logging.info(f"IoT Fleet Status: {fleet_stats['registered_devices']}/{fleet_stats['total_devices']} devices registered, "
                         f"{fleet_stats['total_submissions']} total submissions, "
                         f"{fleet_stats['success_rate']:.1%} success rate")
+            generation = sensor_data_batcher.get_stats()
+            logging.info(f"IoT payload generation: {generation['generated']} readings in {generation['batches']} batches "
+                        f"(avg {generation['avg_batch_size']})")
+            
+            # Where lcore-node request time goes (p99 per phase)
+            for endpoint, phases in lcore_client.get_phase_stats().items():
+                breakdown = " | ".join(f"{phase} {stats['p99_sec']:.3f}s" for phase, stats in phases.items())
+                logging.info(f"lcore-node {endpoint} p99 phases: {breakdown}")
+            
+            limiter = lcore_client.get_limiter_stats()
+            if limiter:
+                logging.info(f"lcore-node concurrency: limit {limiter['limit']} | in-flight {limiter['in_flight']} | "
+                            f"queued {limiter['queued']} | {limiter['decreases']} decreases")
+            breaker = lcore_client.get_breaker_stats()
+            if breaker:
+                logging.info(f"lcore-node breaker: {breaker.get('state', 'disabled')} | shed {breaker.get('shed', 0)} | "
+                            f"retries {breaker.get('retries', 0)} | retries denied {breaker.get('retries_denied', 0)}")
     
     except Exception as e:
         logging.error(f"Exception in IoT pipeline monitoring: {e}")
@@ -1,25 +1,22 @@
 import random
-import secrets
-
-from eth_utils import to_checksum_address
 
 from utils.metrics_logger import log_metric
-from utils.tx_builder import send_eth, TxSendError
+from utils.tx_builder import send_presigned_transfer, TxSendError
 from utils.wallet_manager import wallet_manager, WalletType
 
-BORROWER_ADDRESS = to_checksum_address("0x" + secrets.token_hex(20))
-
 
 async def originate_loan():
-    """Simulate loan origination (protocol sending funds to borrower)"""
-    loan_amount_wei = 0  # Only pay gas
+    """Simulate loan origination (protocol sending funds to borrower)
 
+    Returns True if the transaction was mined successfully.
+    """
+    # Zero-value transfer (only gas is paid), pre-signed ahead of demand
     wallet = wallet_manager.get_random_wallet_by_type(WalletType.PAYMENT_USER)
     if wallet is None:
         raise TxSendError("No available user wallet")
 
     try:
-        tx_hash, receipt, latency = await send_eth(BORROWER_ADDRESS, loan_amount_wei, wallet=wallet)
+        tx_hash, receipt, latency = await send_presigned_transfer(wallet)
         log_metric(
             module="lending_app",
             tx_hash=tx_hash,
@@ -27,6 +24,7 @@ async def originate_loan():
             gas_used=receipt.gasUsed,  # type: ignore[attr-defined]
             latency_sec=latency,
         )
+        return receipt.status == 1  # type: ignore[attr-defined]
     except TxSendError as exc:
         log_metric(
             module="lending_app",
@@ -36,18 +34,20 @@ async def originate_loan():
             latency_sec=0,
             error=str(exc),
         )
+        return False
 
 
 async def make_repayment():
-    """Simulate borrower paying back part of the loan"""
-    repayment_amount_wei = 0
+    """Simulate borrower paying back part of the loan
 
+    Returns True if the transaction was mined successfully.
+    """
     wallet = wallet_manager.get_random_wallet_by_type(WalletType.PAYMENT_USER)
     if wallet is None:
         raise TxSendError("No available user wallet")
 
     try:
-        tx_hash, receipt, latency = await send_eth(to_checksum_address("0x" + secrets.token_hex(20)), repayment_amount_wei, wallet=wallet)
+        tx_hash, receipt, latency = await send_presigned_transfer(wallet)
         log_metric(
             module="lending_app",
             tx_hash=tx_hash,
@@ -55,6 +55,7 @@ async def make_repayment():
             gas_used=receipt.gasUsed,  # type: ignore[attr-defined]
             latency_sec=latency,
         )
+        return receipt.status == 1  # type: ignore[attr-defined]
     except TxSendError as exc:
         log_metric(
             module="lending_app",
@@ -63,4 +64,5 @@ async def make_repayment():
             gas_used=0,
             latency_sec=0,
             error=str(exc),
-        ) 
\ No newline at end of file
+        )
+        return False 
\ No newline at end of file
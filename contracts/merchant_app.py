@@ -1,27 +1,22 @@
 import random
-import secrets
-
-from eth_utils import to_checksum_address
 
 from utils.metrics_logger import log_metric
-from utils.tx_builder import send_eth, TxSendError
+from utils.tx_builder import send_presigned_transfer, TxSendError
 from utils.wallet_manager import wallet_manager, WalletType
 
-MERCHANT_ADDRESS = to_checksum_address("0x" + secrets.token_hex(20))
-
 
 async def settle_payment():
-    """Simulate merchant settlement by transferring funds to merchant address."""
-    amount_wei = 0  # Only pay gas
+    """Simulate merchant settlement by transferring funds to merchant address.
 
+    Returns True if the transaction was mined successfully.
+    """
+    # Zero-value transfer to a random address (only gas is paid), pre-signed
     try:
-        recipient_addr = to_checksum_address("0x" + secrets.token_hex(20))
-
         wallet = wallet_manager.get_random_wallet_by_type(WalletType.PAYMENT_USER)
         if wallet is None:
             raise TxSendError("No available user wallet")
 
-        tx_hash, receipt, latency = await send_eth(recipient_addr, amount_wei, wallet=wallet)
+        tx_hash, receipt, latency = await send_presigned_transfer(wallet)
         log_metric(
             module="merchant_app",
             tx_hash=tx_hash,
@@ -29,6 +24,7 @@ async def settle_payment():
             gas_used=receipt.gasUsed,  # type: ignore[attr-defined]
             latency_sec=latency,
         )
+        return receipt.status == 1  # type: ignore[attr-defined]
     except TxSendError as exc:
         log_metric(
             module="merchant_app",
@@ -37,4 +33,5 @@ async def settle_payment():
             gas_used=0,
             latency_sec=0,
             error=str(exc),
-        ) 
\ No newline at end of file
+        )
+        return False 
\ No newline at end of file
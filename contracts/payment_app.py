@@ -1,26 +1,23 @@
 import random
-import secrets
-
-from eth_utils import to_checksum_address
 
 from utils.metrics_logger import log_metric
-from utils.tx_builder import send_eth, TxSendError
+from utils.tx_builder import send_presigned_transfer, TxSendError
 from utils.wallet_manager import wallet_manager, WalletType
 
 
 async def simulate_transaction():
-    """Simulate a local currency payment by transferring small amount of ETH."""
-    # Random recipient address (not controlled)
-    random_addr = to_checksum_address("0x" + secrets.token_hex(20))
-    amount_wei = 0  # Only pay gas; no value transferred
+    """Simulate a local currency payment by transferring small amount of ETH.
 
-    # Choose a random user wallet for this tx
+    Returns True if the transaction was mined successfully.
+    """
+    # Zero-value transfer to a random (uncontrolled) address, pre-signed ahead
+    # of demand; only gas is paid. Choose a random user wallet for this tx
     wallet = wallet_manager.get_random_wallet_by_type(WalletType.PAYMENT_USER)
     if wallet is None:
         raise TxSendError("No available user wallet")
 
     try:
-        tx_hash, receipt, latency = await send_eth(random_addr, amount_wei, wallet=wallet)
+        tx_hash, receipt, latency = await send_presigned_transfer(wallet)
         log_metric(
             module="payment_app",
             tx_hash=tx_hash,
@@ -28,6 +25,7 @@ async def simulate_transaction():
             gas_used=receipt.gasUsed,  # type: ignore[attr-defined]
             latency_sec=latency,
         )
+        return receipt.status == 1  # type: ignore[attr-defined]
     except TxSendError as exc:
         log_metric(
             module="payment_app",
@@ -37,4 +35,5 @@ async def simulate_transaction():
             latency_sec=0,
             error=str(exc),
         )
+        return False
     # Slight jitter can be added externally in caller. 
\ No newline at end of file
@@ -1,57 +1,235 @@
 import asyncio
 import logging
-import threading
+import signal
+from typing import Any, Dict
 
 from contracts import payment_app, merchant_app, lending_app, data_pipeline
-from utils.iot_metrics import iot_metrics_tracker
+from utils.iot_metrics import iot_metrics_tracker, close_iot_metrics_log
 from utils.lcore_client import lcore_client
-from config.settings import LCORE_NODE_URL, IOT_DEVICE_COUNT
+from utils.receipt_tracker import receipt_tracker
+from utils.fee_oracle import fee_oracle
+from utils.signing_pool import signing_pool, presign_pipeline
+from utils.load_engine import OpenLoopScheduler, build_profile
+from utils.saturation import SaturationSearch
+from utils.device_simulator import device_simulator
+from utils.sharding import ShardLauncher, report_forever
+from config.settings import (
+    LCORE_NODE_URL,
+    IOT_DEVICE_COUNT,
+    IOT_REGISTRATION_RATE,
+    IOT_DATA_SUBMISSION_RATE,
+    PAYMENT_TX_RATE,
+    MERCHANT_TX_RATE,
+    LENDING_TX_RATE,
+    RUN_MODE,
+    SATURATION_WORKLOADS,
+    LOAD_WORKERS,
+    PAUSE_ON_DEPENDENCY_DOWN,
+    SHARD_INDEX,
+    SHARD_COUNT,
+    web3_async,
+)
 from utils.wallet_manager import wallet_manager
 from utils.funding_helper import FundingHelper
-from utils.metrics_logger import print_dapp_summary  # imported here to expose summary in status task
-from server import run as run_http_server
+from utils.metrics_logger import (  # imported here to expose summary in status task
+    print_dapp_summary,
+    get_aggregate_counts,
+    set_aggregate_counts,
+    get_status_counts,
+    set_status_counts,
+    close_metrics_log,
+)
+from utils.prometheus import MetricWriter, prometheus_exporter
+from utils.health_prober import health_prober
+import server
 
 logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s: %(message)s")
 
-# Ensure at least 18 payment-user wallets and fund them once
-wallet_manager.ensure_min_user_wallets(18)
+# Ensure at least 18 payment-user wallets (and one per shard) and fund them
+# once. Shard worker processes only read wallets.csv; the launcher prepares it.
+if SHARD_COUNT == 1:
+    wallet_manager.ensure_min_user_wallets(max(18, LOAD_WORKERS))
 _funding_helper = FundingHelper()
 
-async def simulate_payment_activity():
-    """Standard payment transactions for blockchain stress testing"""
-    while True:
-        await payment_app.simulate_transaction()
-        await asyncio.sleep(0.5)  # ~2 tx/s
 
+async def _lending_round():
+    originated = await lending_app.originate_loan()
+    repaid = await lending_app.make_repayment()
+    return originated and repaid
 
-async def simulate_merchant_activity():
-    """Merchant payment settlements for blockchain stress testing"""
-    while True:
-        await merchant_app.settle_payment()
-        await asyncio.sleep(1)  # 1 tx/s
 
+async def _iot_data_round():
+    submitted = await data_pipeline.submit_iot_sensor_data()
+    await data_pipeline.monitor_iot_pipeline()
+    return submitted
 
-async def simulate_lending_activity():
-    """Loan origination and repayment operations for blockchain stress testing"""
-    while True:
-        await lending_app.originate_loan()
-        await lending_app.make_repayment()
-        await asyncio.sleep(2)
 
+def _needs(*dependencies):
+    """Pause the workload while one of ``dependencies`` is down (per the health prober)"""
+    return health_prober.dependency_check(*dependencies) if PAUSE_ON_DEPENDENCY_DOWN else None
 
-async def simulate_iot_registration_activity():
-    """IoT device registration through lcore-node MVP"""
-    while True:
-        await data_pipeline.register_iot_device()
-        await asyncio.sleep(10)  # Register devices every 10 seconds
 
+# Open-loop load generators: each workload is started at its configured
+# arrival rate regardless of how long individual operations take.
+load_schedulers = [
+    # Traditional blockchain stress testing
+    OpenLoopScheduler("payment_app", payment_app.simulate_transaction, build_profile(PAYMENT_TX_RATE),
+                      is_available=_needs("rpc")),
+    OpenLoopScheduler("merchant_app", merchant_app.settle_payment, build_profile(MERCHANT_TX_RATE),
+                      is_available=_needs("rpc")),
+    OpenLoopScheduler("lending_app", _lending_round, build_profile(LENDING_TX_RATE),
+                      is_available=_needs("rpc")),
+    # Enhanced IoT data pipeline
+    OpenLoopScheduler("iot_registration", data_pipeline.register_iot_device, build_profile(IOT_REGISTRATION_RATE),
+                      is_available=_needs("lcore_node")),
+    OpenLoopScheduler("iot_data_submission", _iot_data_round, build_profile(IOT_DATA_SUBMISSION_RATE),
+                      is_available=_needs("lcore_node")),
+]
+
+
+# Latest fleet-wide totals reported by the shard workers (launcher process only)
+_fleet_totals: Dict[str, Any] = {}
+
+
+def log_load_summary():
+    """Log offered versus achieved rate for every workload"""
+    load_stats = _fleet_totals.get("load") or [scheduler.get_stats() for scheduler in load_schedulers]
+    for stats in load_stats:
+        logging.info(
+            f"LOAD | {stats['name']} | target {stats['target_rate']:.2f}/s | offered {stats['offered_rate']:.2f}/s | "
+            f"achieved {stats['achieved_rate']:.2f}/s | in-flight {stats['in_flight']} | shed {stats['shed']} | "
+            f"failed {stats['failed']}"
+        )
+    presign = _fleet_totals.get("signing") or presign_pipeline.get_stats()
+    logging.info(
+        f"SIGNING | signed {presign['signed']} | pre-signed hit rate {presign['queue_hit_rate']:.1%} | "
+        f"queued {presign['queued']} | re-signed {presign['resigned']}"
+    )
+
+
+def _rpc_calls_by_method() -> Dict[str, int]:
+    provider = web3_async.provider
+    return provider.get_stats()["calls_by_method"] if hasattr(provider, "get_stats") else {}
+
+
+def collect_load_metrics(out: MetricWriter):
+    """Prometheus collector for state that has fleet-wide totals in sharded runs"""
+    load_stats = _fleet_totals.get("load") or [scheduler.get_stats() for scheduler in load_schedulers]
+    out.gauge(
+        "load_target_rate", "Configured arrival rate (ops/sec)",
+        [({"workload": s["name"]}, s["target_rate"]) for s in load_stats],
+    )
+    out.gauge(
+        "load_in_flight", "Operations started but not finished",
+        [({"workload": s["name"]}, s["in_flight"]) for s in load_stats],
+    )
+    for field, help_text in (
+        ("offered", "Arrivals generated by the load engine"),
+        ("started", "Operations started"),
+        ("shed", "Arrivals shed because MAX_IN_FLIGHT_TX was reached"),
+        ("skipped", "Arrivals skipped while the workload was paused (dependency down)"),
+        ("succeeded", "Operations that succeeded"),
+        ("failed", "Operations that failed"),
+    ):
+        out.counter(f"load_{field}", help_text, [({"workload": s["name"]}, s[field]) for s in load_stats])
+    out.gauge(
+        "load_paused", "1 while the workload is paused because a dependency is down",
+        [({"workload": s["name"]}, s["paused"]) for s in load_stats],
+    )
+    presign = _fleet_totals.get("signing") or presign_pipeline.get_stats()
+    out.counter("transactions_signed", "Transactions signed", [({}, presign["signed"])])
+    out.counter("presigned_taken", "Pre-signed transfers handed out", [({}, presign["taken"])])
+    out.counter("presigned_queue_hits", "Pre-signed transfers that were ready when requested", [({}, presign["queue_hits"])])
+    out.gauge("presigned_queued", "Pre-signed transfers waiting to be used", [({}, presign["queued"])])
+    rpc_calls = _fleet_totals.get("rpc") or _rpc_calls_by_method()
+    out.counter("rpc_calls", "JSON-RPC calls by method (async client)", [({"method": m}, n) for m, n in rpc_calls.items()])
+    limiter = lcore_client.get_limiter_stats()
+    if limiter:
+        out.gauge("lcore_concurrency_limit", "Adaptive in-flight limit for lcore-node requests", [({}, limiter["limit"])])
+        out.gauge("lcore_in_flight", "lcore-node requests in flight", [({}, limiter["in_flight"])])
+        out.gauge("lcore_queued", "lcore-node requests waiting for a limiter slot", [({}, limiter["queued"])])
+        out.counter(
+            "lcore_limit_adjustments",
+            "Concurrency limit changes by direction",
+            [({"direction": "increase"}, limiter["increases"]), ({"direction": "decrease"}, limiter["decreases"])],
+        )
+    breaker = lcore_client.get_breaker_stats()
+    if "state" in breaker:
+        out.gauge(
+            "lcore_breaker_state", "lcore-node circuit breaker state (1 for the current state)",
+            [({"state": state}, int(breaker["state"] == state)) for state in ("closed", "open", "half_open")],
+        )
+        out.counter("lcore_breaker_opened", "Times the lcore-node circuit breaker opened", [({}, breaker["opened"])])
+        out.counter("lcore_requests_shed", "lcore-node requests failed fast by the open breaker", [({}, breaker["shed"])])
+    if "retries" in breaker:
+        out.counter("lcore_retries", "lcore-node request retries", [({}, breaker["retries"])])
+        out.counter("lcore_retries_denied", "lcore-node retries dropped by the retry budget", [({}, breaker["retries_denied"])])
+
+
+prometheus_exporter.add_collector(collect_load_metrics)
+
+
+def collect_shard_snapshot() -> Dict[str, Any]:
+    """Counters a shard worker reports to the launcher"""
+    return {
+        "dapp": get_aggregate_counts(),
+        "dapp_status": get_status_counts(),
+        "iot": iot_metrics_tracker.get_counters(),
+        "latency": iot_metrics_tracker.get_latency_histograms(),
+        "rolling": iot_metrics_tracker.get_rolling_counters(),
+        "lcore_phases": lcore_client.get_phase_histograms(),
+        "lcore_limiter": lcore_client.get_limiter_stats(),
+        "lcore_breaker": lcore_client.get_breaker_stats(),
+        "load": [scheduler.get_stats() for scheduler in load_schedulers],
+        "signing": presign_pipeline.get_stats(),
+        "rpc": _rpc_calls_by_method(),
+        "receipts": receipt_tracker.get_stats(),
+        "fees": fee_oracle.get_stats(),
+        "wallets": wallet_manager.get_ledger(),
+    }
+
+
+def apply_fleet_totals(totals: Dict[str, Any]):
+    """Mirror the shards' totals into this process, so /metrics and the summaries show the whole fleet"""
+    set_aggregate_counts(totals["dapp"])
+    set_status_counts(totals["dapp_status"])
+    iot_metrics_tracker.set_counters(totals["iot"])
+    iot_metrics_tracker.set_latency_histograms(totals["latency"])
+    iot_metrics_tracker.set_rolling_counters(totals["rolling"])
+    lcore_client.set_phase_histograms(totals["lcore_phases"])
+    lcore_client.set_fleet_stats(totals["lcore_limiter"], totals["lcore_breaker"])
+    receipt_tracker.set_fleet_stats(totals["receipts"])
+    fee_oracle.set_fleet_stats(totals["fees"])
+    wallet_manager.set_ledger(totals["wallets"])
+    _fleet_totals.update(totals)
+
+
+async def register_iot_fleet():
+    """Register every simulated device up front (used before saturation runs)"""
+    for _ in range(len(device_simulator) * 3):
+        if await data_pipeline.register_iot_device() is None:
+            break
+
+
+def client_wait_seconds() -> Dict[str, float]:
+    """Cumulative time spent in client-side waits, for telling client limits from chain limits"""
+    return {
+        "nonce_slots": wallet_manager.nonce_manager.slot_wait_sec,
+        "signing": presign_pipeline.wait_sec,
+    }
 
-async def simulate_iot_data_activity():
-    """Real IoT data submission through dual-encryption pipeline"""
-    while True:
-        await data_pipeline.submit_iot_sensor_data()
-        await data_pipeline.monitor_iot_pipeline()
-        await asyncio.sleep(5)  # Submit data every 5 seconds
+
+async def run_saturation_search():
+    """Find the highest sustainable rate of each configured workload"""
+    workloads = {s.name: s.operation for s in load_schedulers if s.name in SATURATION_WORKLOADS}
+    if "iot_data_submission" in workloads:
+        await register_iot_fleet()
+
+    reconciler = asyncio.create_task(wallet_manager.reconcile_balances_forever())
+    try:
+        return await SaturationSearch(client_waits=client_wait_seconds).run(workloads)
+    finally:
+        reconciler.cancel()
 
 
 async def print_status_summary():
@@ -64,11 +242,15 @@ async def print_status_summary():
             
             # Print regular dApp transactions summary
             print_dapp_summary()
+            log_load_summary()
             
-            # Check lcore-node connectivity
-            is_healthy = await lcore_client.health_check()
-            health_status = "✅ HEALTHY" if is_healthy else "❌ UNAVAILABLE"
-            logging.info(f"lcore-node Status: {health_status} ({LCORE_NODE_URL})")
+            # Dependency health, as last seen by the background prober
+            for name, status in health_prober.get_status().items():
+                health_status = "✅ HEALTHY" if status["healthy"] else "❌ UNAVAILABLE"
+                logging.info(
+                    f"{name} Status: {health_status} | probe p99 {status['latency']['p99_sec']:.3f}s | "
+                    f"{status['failures']}/{status['probes']} probes failed"
+                )
             
         except Exception as e:
             logging.error(f"Error in status summary: {e}")
@@ -77,20 +259,78 @@ async def print_status_summary():
 async def cleanup_resources():
     """Cleanup resources on shutdown"""
     try:
+        await server.stop()
         await lcore_client.close()
+        await receipt_tracker.stop()
+        await asyncio.to_thread(signing_pool.shutdown)
+        if hasattr(web3_async.provider, "disconnect"):
+            await web3_async.provider.disconnect()
+        # Flush queued metric rows without stalling the loop on disk I/O
+        await asyncio.to_thread(close_metrics_log)
+        await asyncio.to_thread(close_iot_metrics_log)
         logging.info("Resources cleaned up successfully")
     except Exception as e:
         logging.error(f"Error during cleanup: {e}")
 
 
+async def run_shard(reports):
+    """Event loop of one shard worker process"""
+    logging.info(
+        f"Shard {SHARD_INDEX + 1}/{SHARD_COUNT}: {len(wallet_manager.wallets)} wallets, "
+        f"{len(device_simulator)} IoT devices"
+    )
+    try:
+        await asyncio.gather(
+            *(scheduler.run() for scheduler in load_schedulers),
+            report_forever(reports, SHARD_INDEX, collect_shard_snapshot),
+            health_prober.run_forever(),
+            wallet_manager.reconcile_balances_forever(),
+        )
+    finally:
+        await cleanup_resources()
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def run_shard_worker(reports):
+    """Entry point of a shard worker process (started by ShardLauncher)"""
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    try:
+        asyncio.run(run_shard(reports))
+    except KeyboardInterrupt:
+        pass
+
+
+async def run_sharded():
+    """Run the load in LOAD_WORKERS shard processes and report fleet-wide totals"""
+    launcher = ShardLauncher(run_shard_worker, LOAD_WORKERS)
+    launcher.start()
+    status = asyncio.create_task(print_status_summary())
+    try:
+        await launcher.supervise(apply_fleet_totals)
+        logging.error("All shard workers have exited")
+    finally:
+        status.cancel()
+        launcher.stop()
+
+
 async def main():
     logging.info("Starting KC-Chain Enhanced Stress Test Simulator with IoT Data Pipeline")
     logging.info(f"IoT Configuration: {IOT_DEVICE_COUNT} devices, lcore-node at {LCORE_NODE_URL}")
     
+    prober = None
     try:
-        # Check lcore-node availability before starting
-        is_healthy = await lcore_client.health_check()
-        if is_healthy:
+        # Health & metrics endpoints run on this event loop; /ready stays 503
+        # until funding is done and lcore-node and the RPC endpoint respond
+        await server.start()
+        logging.info("Health & metrics endpoints started on /health, /ready, /metrics and /metrics/prometheus")
+        
+        # Check lcore-node availability before starting, then keep probing in the background
+        await health_prober.probe_all()
+        prober = asyncio.create_task(health_prober.run_forever())
+        if health_prober.is_healthy("lcore_node"):
             logging.info("✅ lcore-node is available - IoT pipeline enabled")
         else:
             logging.warning("⚠️  lcore-node is not available - IoT operations may fail")
@@ -102,23 +342,25 @@ async def main():
         except Exception as e:
             logging.error(f"Wallet funding failed: {e}")
         
-        # Launch HTTP health & metrics server in background BEFORE async tasks start
-        threading.Thread(target=run_http_server, daemon=True).start()
-        logging.info("Health & metrics endpoint started on /health and /metrics")
+        server.readiness.mark_started()
+        
+        if RUN_MODE == "saturation":
+            if LOAD_WORKERS > 1:
+                logging.warning("Saturation search runs in a single process; ignoring LOAD_WORKERS")
+            await run_saturation_search()
+            return
+        
+        if LOAD_WORKERS > 1:
+            await run_sharded()
+            return
         
         # Start all stress test components concurrently
         await asyncio.gather(
-            # Traditional blockchain stress testing
-            simulate_payment_activity(),
-            simulate_merchant_activity(),
-            simulate_lending_activity(),
-            
-            # Enhanced IoT data pipeline
-            simulate_iot_registration_activity(),
-            simulate_iot_data_activity(),
+            *(scheduler.run() for scheduler in load_schedulers),
             
             # Monitoring and status
             print_status_summary(),
+            wallet_manager.reconcile_balances_forever(),
         )
 
     except KeyboardInterrupt:
@@ -126,6 +368,8 @@ async def main():
     except Exception as e:
         logging.error(f"Unexpected error in main: {e}")
     finally:
+        if prober is not None:
+            prober.cancel()
         await cleanup_resources()
 
 
@@ -2,31 +2,109 @@
 
 This allows Railway (or any orchestrator) to perform container healthchecks
 and lets evaluators view live KPI stats while the stress-test runs.
+
+The server is an aiohttp app running on the simulator's own event loop
+(see :func:`start`), so handlers never run concurrently with the load
+generators and always read a consistent snapshot of the counters.
 """
 
-import os
-from flask import Flask, jsonify
+from typing import Any, Dict, Optional
+
+from aiohttp import web
 
+from config.settings import HEALTHCHECK_PORT
+from utils.buffered_writer import get_writer_stats
+from utils.health_prober import health_prober
 from utils.iot_metrics import iot_metrics_tracker
+from utils.lcore_client import lcore_client
+from utils.prometheus import CONTENT_TYPE, prometheus_exporter
 
-app = Flask(__name__)
 
+class Readiness:
+    """Readiness signal for ``/ready``.
+    
+    Ready means startup (wallet funding) has finished and the health prober's
+    latest verdict is that lcore-node and the RPC endpoint are up. Nothing is
+    probed per request, so frequent polling adds no load.
+    """
+    
+    def __init__(self):
+        self.started = False
+    
+    def mark_started(self):
+        """Called once the simulator has finished its startup work"""
+        self.started = True
+    
+    def check(self) -> Dict[str, Any]:
+        checks: Dict[str, Any] = {"startup": {"ok": self.started}}
+        for name, status in health_prober.get_status().items():
+            checks[name] = {
+                "ok": status["healthy"] is True,
+                "last_latency_sec": status["last_latency_sec"],
+                "last_error": status["last_error"],
+            }
+        return {"ready": all(check["ok"] for check in checks.values()), "checks": checks}
 
-@app.route("/health", methods=["GET"])  # simple liveness probe
-def health() -> tuple:
-    return jsonify(status="ok"), 200
 
+readiness = Readiness()
 
-@app.route("/metrics", methods=["GET"])  # expose current KPI snapshot
-def metrics() -> tuple:
-    return jsonify(iot_metrics_tracker.get_current_metrics()), 200
 
+async def health(request: web.Request) -> web.Response:  # simple liveness probe
+    dependencies = {name: status["healthy"] for name, status in health_prober.get_status().items()}
+    return web.json_response({"status": "ok", "dependencies": dependencies})
 
-def run():
-    port = int(os.getenv("HEALTHCHECK_PORT", 8000))
+
+async def ready(request: web.Request) -> web.Response:  # readiness probe
+    result = readiness.check()
+    return web.json_response(result, status=200 if result["ready"] else 503)
+
+
+async def metrics(request: web.Request) -> web.Response:  # expose current KPI snapshot
+    return web.json_response({
+        **iot_metrics_tracker.get_current_metrics(),
+        "lcore_phases": lcore_client.get_phase_stats(),
+        "lcore_limiter": lcore_client.get_limiter_stats(),
+        "lcore_breaker": lcore_client.get_breaker_stats(),
+        "dependencies": health_prober.get_status(),
+        "writers": get_writer_stats(),
+    })
+
+
+async def metrics_prometheus(request: web.Request) -> web.Response:  # Prometheus text exposition
+    return web.Response(body=prometheus_exporter.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+def create_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/health", health)
+    app.router.add_get("/ready", ready)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/metrics/prometheus", metrics_prometheus)
+    return app
+
+
+_runner: Optional[web.AppRunner] = None
+
+
+async def start(port: int = HEALTHCHECK_PORT):
+    """Serve the endpoints on the running event loop"""
+    global _runner
+    _runner = web.AppRunner(create_app(), access_log=None)
+    await _runner.setup()
     # Expose on all interfaces inside container
-    app.run(host="0.0.0.0", port=port, debug=False)
+    await web.TCPSite(_runner, host="0.0.0.0", port=port).start()
+
+
+async def stop():
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
+
+
+def run():
+    web.run_app(create_app(), host="0.0.0.0", port=HEALTHCHECK_PORT, access_log=None)
 
 
 if __name__ == "__main__":
-    run() 
\ No newline at end of file
+    run()
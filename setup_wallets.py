@@ -31,7 +31,7 @@ def main():
     print("\n📁 Files created:")
     print("  wallets.csv - Wallet addresses, private keys, and metadata")
     print("  logs/tx_metrics.csv - Transaction logs")
-    print("  logs/iot_metrics.csv - IoT pipeline metrics")
+    print("  logs/iot_metrics.csv - IoT pipeline metrics (IOT_METRICS_SINK=sqlite for logs/iot_metrics.db)")
     
     print("\n🔄 Next steps:")
     print("1. Fund the main funder wallet with your 1 ETH")
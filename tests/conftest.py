@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep log files and the IoT metrics database out of the source tree
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="kcchain-tests-"))
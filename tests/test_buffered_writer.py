@@ -0,0 +1,72 @@
+import time
+
+import utils.buffered_writer as buffered_writer
+from utils.buffered_writer import BufferedCSVWriter, BufferedWriter
+
+
+class FlakyWriter(BufferedWriter):
+    """In-memory writer whose storage cannot be opened the first ``open_failures`` times"""
+
+    def __init__(self, open_failures: int):
+        super().__init__("flaky", max_rows=1, flush_interval_sec=0.01)
+        self.open_failures = open_failures
+        self.stored = []
+
+    def _open(self):
+        if self.open_failures > 0:
+            self.open_failures -= 1
+            raise OSError("No space left on device")
+
+    def _write_batch(self, batch):
+        self.stored.extend(batch)
+
+    def _close(self):
+        pass
+
+
+def _wait_for(condition, timeout_sec=5.0):
+    deadline = time.monotonic() + timeout_sec
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_open_failure_drops_rows_and_retries(monkeypatch):
+    monkeypatch.setattr(buffered_writer, "REOPEN_MIN_SEC", 0.05)
+    writer = FlakyWriter(open_failures=2)
+    writer.write("lost")
+    assert _wait_for(lambda: writer.rows_dropped == 1)
+    assert writer.failed and "No space" in writer.last_error
+
+    assert _wait_for(lambda: not writer.failed)
+    writer.write("kept")
+    writer.flush()
+    writer.close()
+    assert writer.stored == ["kept"]
+    assert writer.get_stats()["rows_written"] == 1
+    assert writer._thread is not None and not writer._thread.is_alive()
+
+
+def test_failed_rotation_keeps_writer_thread_alive(tmp_path, monkeypatch):
+    monkeypatch.setattr(buffered_writer, "REOPEN_MIN_SEC", 0.05)
+    writer = BufferedCSVWriter(tmp_path / "tx.csv", ["a"], max_rows=1, flush_interval_sec=0.01, rotate_bytes=1)
+    real_open = writer._open
+    opens = []
+
+    def open_once_then_fail():
+        opens.append(1)
+        if len(opens) == 2:
+            raise PermissionError("read-only file system")
+        real_open()
+
+    monkeypatch.setattr(writer, "_open", open_once_then_fail)
+    writer.write([1])
+    assert _wait_for(lambda: writer.failed)
+    assert writer._thread.is_alive()
+
+    assert _wait_for(lambda: not writer.failed)
+    writer.write([2])
+    writer.flush()
+    writer.close()
+    assert writer.rows_written == 2
+    assert writer.rotations == 2
@@ -0,0 +1,59 @@
+from utils.circuit_breaker import BreakerState, CircuitBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _open_breaker(clock, **kwargs) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout_sec=10, clock=clock, **kwargs)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    return breaker
+
+
+def test_consecutive_failures_open_and_shed():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout_sec=10, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state is BreakerState.CLOSED
+
+    breaker = _open_breaker(clock)
+    assert breaker.state is BreakerState.OPEN
+    assert not breaker.allow()
+    assert breaker.get_stats()["shed"] == 1 and breaker.opened == 1
+
+
+def test_half_open_trial_closes_or_reopens():
+    clock = Clock()
+    breaker = _open_breaker(clock)
+    clock.now = 10
+    assert breaker.state is BreakerState.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial at a time
+    breaker.record_failure()
+    assert breaker.state is BreakerState.OPEN
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.allow()
+
+
+def test_released_trial_frees_the_slot():
+    clock = Clock()
+    breaker = _open_breaker(clock)
+    clock.now = 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    assert breaker.state is BreakerState.HALF_OPEN
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from utils.concurrency_limiter import AIMDLimiter
+
+
+def test_waiters_queue_in_fifo_order():
+    async def scenario():
+        limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+        first = await limiter.acquire()
+        order = []
+
+        async def waiter(name):
+            token = await limiter.acquire()
+            order.append(name)
+            limiter.release(token, True, 0.0)
+
+        tasks = [asyncio.create_task(waiter(n)) for n in "abc"]
+        await asyncio.sleep(0)
+        assert limiter.queued == 3
+        limiter.release(first, True, 0.0)
+        await asyncio.gather(*tasks)
+        return order, limiter.in_flight
+
+    assert asyncio.run(scenario()) == (list("abc"), 0)
+
+
+def test_failures_cut_limit_once_per_epoch_and_success_grows_it():
+    async def scenario():
+        limiter = AIMDLimiter(initial_limit=8, max_limit=16, latency_target_sec=1.0, backoff=0.5)
+        tokens = [await limiter.acquire() for _ in range(8)]
+        for token in tokens:
+            limiter.release(token, False, 0.1)
+        after_failures = limiter.limit
+
+        for _ in range(40):
+            tokens = [await limiter.acquire() for _ in range(limiter.limit)]
+            for token in tokens:
+                limiter.release(token, True, 0.1)
+        return after_failures, limiter.limit, limiter.decreases
+
+    after_failures, grown, decreases = asyncio.run(scenario())
+    assert (after_failures, decreases) == (4, 1)
+    assert grown > after_failures
+
+
+def test_slow_responses_count_as_unhealthy():
+    async def scenario():
+        limiter = AIMDLimiter(initial_limit=4, latency_target_sec=1.0)
+        limiter.release(await limiter.acquire(), True, 2.0)
+        return limiter.limit
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+        held = await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release_unused(held)
+        return limiter.in_flight, limiter.queued, limiter.limit
+
+    assert asyncio.run(scenario()) == (0, 0, 1)
@@ -0,0 +1,77 @@
+import json
+from dataclasses import fields
+
+import pytest
+
+from utils.data_parsers import DataParser, EVSensorData, GreenhouseSensorData, SalesTransactionData
+
+
+@pytest.fixture
+def parser(tmp_path):
+    # No CSV files here, so every dataset uses the synthetic fallback
+    return DataParser(str(tmp_path))
+
+
+def _field_names(cls):
+    return {field.name for field in fields(cls)} - {"device_id"}
+
+
+def _check_shape(readings, count, cls):
+    assert len(readings) == count
+    assert all(set(reading) == _field_names(cls) for reading in readings)
+    assert len({reading["timestamp"] for reading in readings}) == 1
+
+
+def _within(readings, name, low, high):
+    values = [reading[name] for reading in readings]
+    assert all(isinstance(value, (int, float)) for value in values), name
+    assert low <= min(values) and max(values) <= high, name
+
+
+def test_ev_batch_shape_and_ranges(parser):
+    readings = parser.get_ev_data_batch(500)
+    _check_shape(readings, 500, EVSensorData)
+    # Fallback rows are uniform over these ranges, plus the EV_VARIANCE spread
+    _within(readings, "battery_voltage", 345, 405)
+    _within(readings, "battery_current", -52, 52)
+    _within(readings, "battery_temperature", 19, 36)
+    _within(readings, "motor_temperature", 37, 83)
+    _within(readings, "speed", 0, 130)
+    _within(readings, "acceleration", -3.5, 3.5)
+    _within(readings, "energy_consumption", 13, 27)
+    _within(readings, "regenerative_braking", 0, 1)
+    _within(readings, "distance_traveled", 0, 100)
+
+
+def test_greenhouse_batch_shape_and_ranges(parser):
+    readings = parser.get_greenhouse_data_batch(500)
+    _check_shape(readings, 500, GreenhouseSensorData)
+    _within(readings, "temperature", 17, 29)
+    _within(readings, "humidity", 35, 85)
+    _within(readings, "soil_moisture", 27, 73)
+    _within(readings, "light_intensity", 150, 850)
+    _within(readings, "co2_level", 280, 520)
+    _within(readings, "ph_level", 5.8, 7.7)
+    _within(readings, "nutrient_level", 5, 15)
+    _within(readings, "plant_height", 10, 50)
+    _within(readings, "growth_rate", 0.1, 0.5)
+    _within(readings, "leaf_count", 5, 25)
+    assert all(isinstance(reading["leaf_count"], int) for reading in readings)
+
+
+def test_sales_batch_shape_and_ranges(parser):
+    readings = parser.get_sales_data_batch(200)
+    _check_shape(readings, 200, SalesTransactionData)
+    _within(readings, "unit_price", 1, 510)
+    _within(readings, "quantity", 1, 5)
+    for reading in readings:
+        assert reading["total_amount"] == pytest.approx(reading["quantity"] * reading["unit_price"])
+        assert reading["transaction_id"].startswith("TXN_")
+
+
+def test_empty_batches_and_payloads(parser):
+    assert parser.get_ev_data_batch(0) == []
+    assert parser.get_greenhouse_data_batch(0) == []
+    readings = parser.get_ev_data_batch(3)
+    payloads = parser.to_iot_payloads(readings)
+    assert [json.loads(payload) for payload in payloads] == readings
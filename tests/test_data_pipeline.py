@@ -0,0 +1,29 @@
+import asyncio
+
+from contracts import data_pipeline
+from utils.device_simulator import DeviceSimulator, SensorDataBatcher
+
+
+def test_concurrent_submissions_share_one_generation_batch(monkeypatch):
+    fleet = DeviceSimulator(num_devices=12)
+    for device in fleet.get_unregistered_devices():
+        fleet.mark_device_registered(device.device_id)
+    batcher = SensorDataBatcher(fleet)
+    submitted = []
+
+    async def submit_device_data(device, sensor_data):
+        submitted.append((device.device_id, sensor_data))
+        return True, {"message": "ok"}, 0.01
+
+    monkeypatch.setattr(data_pipeline, "device_simulator", fleet)
+    monkeypatch.setattr(data_pipeline, "sensor_data_batcher", batcher)
+    monkeypatch.setattr(data_pipeline.lcore_client, "submit_device_data", submit_device_data)
+    monkeypatch.setattr(data_pipeline, "log_iot_metric", lambda **kwargs: None)
+
+    async def submit_all():
+        return await asyncio.gather(*(data_pipeline.submit_iot_sensor_data() for _ in range(25)))
+
+    assert asyncio.run(submit_all()) == [True] * 25
+    assert len(submitted) == 25
+    assert batcher.get_stats()["batches"] == 1
+    assert fleet.get_fleet_stats()["total_submissions"] == 25
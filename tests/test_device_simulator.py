@@ -0,0 +1,113 @@
+import asyncio
+import json
+import random
+
+import pytest
+
+from utils.device_simulator import DEVICE_TYPES, DeviceSimulator, DeviceType, SensorDataBatcher
+
+
+@pytest.mark.parametrize("num_devices,shard_count", [(0, 1), (3, 2), (2, 4), (5, 8), (10, 3), (301, 4), (1000, 7)])
+def test_shard_sizes_add_up_to_the_fleet(num_devices, shard_count):
+    shards = [DeviceSimulator(num_devices=num_devices, shard_index=s, shard_count=shard_count) for s in range(shard_count)]
+    assert sum(len(shard) for shard in shards) == num_devices
+    assert max(len(shard) for shard in shards) - min(len(shard) for shard in shards) <= 1
+    # Device numbers cover 0..num_devices-1 exactly once
+    numbers = sorted(int(shard._device_id(i).split("_")[1]) for shard in shards for i in range(len(shard)))
+    assert numbers == [shards[0].id_start + n for n in range(num_devices)]
+    type_counts = [
+        sum(shard.get_fleet_stats()["device_types"][device_type.value] for shard in shards)
+        for device_type, _, _ in DEVICE_TYPES
+    ]
+    if num_devices >= len(DEVICE_TYPES):
+        assert max(type_counts) - min(type_counts) <= 1
+    assert sum(type_counts) == num_devices
+
+
+def test_empty_shard_samples_nothing():
+    fleet = DeviceSimulator(num_devices=2, shard_index=3, shard_count=4)
+    assert len(fleet) == 0
+    assert fleet.get_random_device() is None
+    assert fleet.get_device_for_registration() is None
+    assert fleet.get_device_for_data_submission() is None
+    assert fleet.get_fleet_stats()["registration_rate"] == 0
+
+
+def test_device_ids_round_trip_and_are_disjoint_across_shards():
+    shard_count = 3
+    shards = [DeviceSimulator(num_devices=300, shard_index=s, shard_count=shard_count) for s in range(shard_count)]
+    seen = set()
+    for shard in shards:
+        for index in range(len(shard)):
+            device_id = shard._device_id(index)
+            assert shard._index_of(device_id) == index
+            assert shard.get_device_by_id(device_id).index == index
+            seen.add(device_id)
+        # Another shard's ids do not resolve here
+        other = shards[(shards.index(shard) + 1) % shard_count]
+        assert shard._index_of(other._device_id(0)) is None
+    assert len(seen) == sum(len(shard) for shard in shards)
+
+
+def test_id_lookup_rejects_foreign_ids():
+    fleet = DeviceSimulator(num_devices=30)
+    ev_id = fleet._device_id(0)
+    number = ev_id.split("_")[1]
+    assert fleet.get_device_by_id(f"GH_{number}") is None
+    assert fleet.get_device_by_id("EV_abc") is None
+    assert fleet.get_device_by_id(f"EV_{fleet.id_start + 10_000}") is None
+
+
+def _check_sets(fleet: DeviceSimulator):
+    unregistered, registered = list(fleet._unregistered), list(fleet._registered)
+    assert sorted(unregistered + registered) == list(range(len(fleet)))
+    for members in (unregistered, registered):
+        for position, index in enumerate(members):
+            assert fleet._position[index] == position
+    assert all(fleet.registered_flags[i] for i in registered)
+    assert not any(fleet.registered_flags[i] for i in unregistered)
+
+
+def test_swap_removal_keeps_registration_sets_consistent():
+    rng = random.Random(3)
+    fleet = DeviceSimulator(num_devices=60)
+    while True:
+        device = fleet.get_device_for_registration()
+        if device is None:
+            break
+        assert fleet.mark_device_registered(device.device_id)
+        assert fleet.mark_device_registered(device.device_id)  # idempotent
+        if rng.random() < 0.3:
+            _check_sets(fleet)
+    _check_sets(fleet)
+    assert len(fleet.get_registered_devices()) == len(fleet)
+    assert fleet.get_fleet_stats()["registration_rate"] == 1.0
+
+
+def test_submission_stats():
+    fleet = DeviceSimulator(num_devices=9)
+    device = next(d for d in fleet.get_unregistered_devices() if d.device_type == DeviceType.POS_TERMINAL)
+    fleet.mark_device_registered(device.device_id)
+    fleet.update_device_stats(device.device_id, True, 100.0)
+    fleet.update_device_stats(device.device_id, False, 200.0)
+    assert (device.total_submissions, device.failed_submissions) == (2, 1)
+    assert fleet.get_device_success_rate(device.device_id) == 0.5
+    assert fleet.last_submission_at[device.index] == 200.0
+    assert fleet.get_fleet_stats()["success_rate"] == 0.5
+
+
+def test_sensor_data_batcher_generates_one_batch_per_tick():
+    fleet = DeviceSimulator(num_devices=30)
+    batcher = SensorDataBatcher(fleet)
+    devices = [fleet.get_random_device() for _ in range(20)]
+
+    async def submit_all():
+        first = await asyncio.gather(*(batcher.generate(device) for device in devices))
+        second = await batcher.generate(devices[0])
+        return first, second
+
+    first, second = asyncio.run(submit_all())
+    assert [device_id for device_id, _ in first] == [device.device_id for device in devices]
+    assert all(json.loads(payload)["timestamp"] for _, payload in first)
+    assert second[0] == devices[0].device_id
+    assert batcher.get_stats() == {"batches": 2, "generated": 21, "avg_batch_size": 10.5}
@@ -0,0 +1,122 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.fee_oracle import FeeOracle
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeEth:
+    """``w3.eth`` stand-in counting fee RPCs"""
+
+    def __init__(self, gas_price=10, base_fee=100, reward=2):
+        self.price = gas_price
+        self.base_fee = base_fee
+        self.reward = reward
+        self.error = None
+        self.calls = 0
+
+    @property
+    def gas_price(self):
+        async def read():
+            self.calls += 1
+            if self.error is not None:
+                raise self.error
+            return self.price
+        return read()
+
+    async def fee_history(self, blocks, newest, percentiles):
+        self.calls += 1
+        return {"baseFeePerGas": [self.base_fee] * (blocks + 1), "reward": [[self.reward]] * blocks}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("utils.fee_oracle.time", SimpleNamespace(time=clock))
+    return clock
+
+
+def _oracle(eth, mode="legacy", ttl=5.0):
+    return FeeOracle(w3=SimpleNamespace(eth=eth), mode=mode, ttl=ttl, priority_percentile=50, fixed_gas_price=0)
+
+
+def test_cached_fees_expire_after_ttl(clock):
+    eth = FakeEth()
+    oracle = _oracle(eth)
+
+    async def scenario():
+        assert await oracle.get_fee_params() == {"gasPrice": 10}
+        eth.price = 20
+        clock.now += 4.9
+        assert await oracle.get_fee_params() == {"gasPrice": 10}
+        clock.now += 0.2
+        assert await oracle.get_fee_params() == {"gasPrice": 20}
+
+    asyncio.run(scenario())
+    assert eth.calls == 2
+    assert (oracle.hits, oracle.misses) == (1, 2)
+
+
+def test_concurrent_callers_share_one_refresh(clock):
+    eth = FakeEth()
+    oracle = _oracle(eth)
+
+    async def scenario():
+        return await asyncio.gather(*(oracle.get_fee_params() for _ in range(20)))
+
+    assert asyncio.run(scenario()) == [{"gasPrice": 10}] * 20
+    assert eth.calls == 1
+
+
+def test_new_head_invalidates_legacy_fees(clock):
+    eth = FakeEth()
+    oracle = _oracle(eth)
+
+    async def scenario():
+        await oracle.get_fee_params()
+        eth.price = 30
+        oracle.on_new_head({"number": 2})
+        return await oracle.get_fee_params()
+
+    assert asyncio.run(scenario()) == {"gasPrice": 30}
+    assert eth.calls == 2
+
+
+def test_new_head_updates_eip1559_base_fee_without_rpc(clock):
+    eth = FakeEth(base_fee=100, reward=2)
+    oracle = _oracle(eth, mode="auto")
+
+    async def scenario():
+        first = await oracle.get_fee_params()
+        clock.now += 1
+        oracle.on_new_head({"number": 2, "baseFeePerGas": 150})
+        return first, await oracle.get_fee_params()
+
+    first, second = asyncio.run(scenario())
+    assert first == {"maxFeePerGas": 202, "maxPriorityFeePerGas": 2}
+    assert second == {"maxFeePerGas": 302, "maxPriorityFeePerGas": 2}
+    assert eth.calls == 1
+    assert oracle.get_stats()["staleness_sec"] == 0.0
+
+
+def test_failed_refresh_reuses_last_fees(clock):
+    eth = FakeEth()
+    oracle = _oracle(eth, ttl=1.0)
+
+    async def scenario():
+        await oracle.get_fee_params()
+        eth.error = ConnectionError("node down")
+        clock.now += 2
+        return await oracle.get_fee_params()
+
+    assert asyncio.run(scenario()) == {"gasPrice": 10}
+    assert oracle.refresh_errors == 1
@@ -0,0 +1,97 @@
+import asyncio
+
+from utils.health_prober import HealthProber
+from utils.load_engine import ConstantProfile, OpenLoopScheduler
+
+
+class Dependency:
+    """Probe target whose outcome the test controls"""
+
+    def __init__(self):
+        self.outcome = True
+        self.delay = 0.0
+        self.calls = 0
+
+    async def probe(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+def _prober(dependency, failure_threshold=2, timeout_sec=0.05):
+    prober = HealthProber(interval_sec=0.01, timeout_sec=timeout_sec, failure_threshold=failure_threshold, history=3)
+    prober.add_target("lcore_node", dependency.probe)
+    return prober
+
+
+def test_target_turns_unhealthy_after_consecutive_failures_and_recovers_at_once():
+    dependency = Dependency()
+    prober = _prober(dependency)
+
+    async def scenario():
+        verdicts = [prober.targets["lcore_node"].healthy]
+        for outcome in (True, ConnectionError("refused"), False, True):
+            dependency.outcome = outcome
+            await prober.probe_all()
+            verdicts.append(prober.targets["lcore_node"].healthy)
+        return verdicts
+
+    assert asyncio.run(scenario()) == [None, True, True, False, True]
+    status = prober.get_status()["lcore_node"]
+    assert (status["probes"], status["failures"], status["consecutive_failures"]) == (4, 2, 0)
+    assert [ok for _, _, ok in status["history"]] == [False, False, True]
+    assert status["latency"]["count"] == 4
+
+
+def test_slow_probe_counts_as_a_failure():
+    dependency = Dependency()
+    dependency.delay = 0.2
+    prober = _prober(dependency, failure_threshold=1)
+    asyncio.run(prober.probe_all())
+    status = prober.get_status()["lcore_node"]
+    assert status["healthy"] is False
+    assert status["last_error"] == "timed out after 0.05s"
+
+
+def test_paused_workload_skips_arrivals_while_dependency_is_down():
+    dependency = Dependency()
+    prober = _prober(dependency, failure_threshold=1)
+    started = []
+
+    async def operation():
+        started.append(1)
+
+    async def scenario():
+        # Optimistic before the first probe, so load starts immediately
+        assert prober.is_available("lcore_node") and not prober.is_healthy("lcore_node")
+        dependency.outcome = False
+        await prober.probe_all()
+        scheduler = OpenLoopScheduler("iot", operation, ConstantProfile(200.0), arrival="constant",
+                                      is_available=prober.dependency_check("lcore_node"))
+        await scheduler.run(duration_sec=0.05)
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert started == [] and scheduler.skipped >= 5 and scheduler.paused
+    assert dependency.calls == 1
+
+
+def test_background_probing_does_not_scale_with_callers():
+    dependency = Dependency()
+    prober = _prober(dependency)
+
+    async def scenario():
+        task = asyncio.create_task(prober.run_forever())
+        checks = 0
+        deadline = asyncio.get_running_loop().time() + 0.1
+        while asyncio.get_running_loop().time() < deadline:
+            checks += prober.is_healthy("lcore_node")
+            await asyncio.sleep(0)
+        task.cancel()
+        return checks
+
+    checks = asyncio.run(scenario())
+    assert checks > 100
+    assert 2 <= dependency.calls <= 15
@@ -0,0 +1,53 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.http_timing import RequestTiming, create_trace_config, parse_server_timing
+
+
+def test_server_timing_header_is_parsed_to_seconds():
+    header = 'encryption;dur=12.5, on_chain;desc="commit";dur=840, cache;desc=hit, broken;dur=abc, ;dur=3'
+    assert parse_server_timing(header) == {"encryption": 0.0125, "on_chain": 0.84}
+
+
+def test_phases_are_split_between_timestamps():
+    timing = RequestTiming(started=0.0, queued_start=0.0, queued_end=0.5, dns_start=0.5, dns_end=0.7,
+                           connect_start=0.5, connect_end=1.0, sent=1.25, headers_received=2.0, body_done=2.5)
+    # DNS is resolved inside connection setup, so it is taken out of "connect"
+    assert timing.phases() == pytest.approx({"queued": 0.5, "dns": 0.2, "connect": 0.3, "send": 0.25, "wait": 0.75,
+                                             "body": 0.5})
+    # A reused connection has no connect phase; sending starts from the request start
+    reused = RequestTiming(started=0.0, sent=0.1, headers_received=0.4, connection_reused=True)
+    assert reused.phases() == pytest.approx({"send": 0.1, "wait": 0.3})
+
+
+def test_trace_config_fills_in_timing_of_real_requests():
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        return web.json_response({"ok": True}, headers={"Server-Timing": "encryption;dur=20"})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/", handler)
+        server = TestServer(app)
+        await server.start_server()
+        timings = [RequestTiming(), RequestTiming()]
+        try:
+            async with aiohttp.ClientSession(trace_configs=[create_trace_config()]) as session:
+                for timing in timings:
+                    async with session.get(server.make_url("/"), trace_request_ctx=timing) as response:
+                        await response.read()
+                        timing.body_read(response)
+        finally:
+            await server.close()
+        return timings
+
+    first, second = asyncio.run(scenario())
+    assert {"connect", "send", "wait", "body"} <= first.phases().keys()
+    assert first.phases()["wait"] >= 0.04
+    assert first.server_timing == {"encryption": 0.02}
+    assert not first.connection_reused
+    assert second.connection_reused and "connect" not in second.phases()
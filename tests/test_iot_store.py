@@ -0,0 +1,66 @@
+import csv
+from datetime import datetime
+
+import pytest
+
+from utils.iot_store import IoTMetricsStore
+
+BASE = 1_700_000_000.0
+
+
+def _metric(offset_sec, device_id="EV_1", operation="submit_data", success=True, latency=0.5):
+    return {
+        "timestamp": BASE + offset_sec,
+        "device_id": device_id,
+        "device_type": device_id.split("_")[0],
+        "operation": operation,
+        "success": success,
+        "latency_sec": latency,
+        "pipeline_stage": "lcore",
+        "tx_hash": None,
+        "error_details": None if success else "timeout",
+        "data_size_bytes": 128,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = IoTMetricsStore(tmp_path / "iot.db", flush_interval_sec=0.05)
+    for offset, device, operation, success, latency in [
+        (0, "EV_1", "submit_data", True, 0.2),
+        (10, "EV_1", "submit_data", False, 0.6),
+        (20, "GH_2", "register", True, 0.4),
+        (30, "GH_2", "submit_data", True, 1.0),
+    ]:
+        store.add_metric(_metric(offset, device, operation, success, latency))
+    store.flush()
+    yield store
+    store.close()
+
+
+def test_metrics_round_trip_newest_first(store):
+    rows = store.query_metrics()
+    assert [row["timestamp"] for row in rows] == [BASE + 30, BASE + 20, BASE + 10, BASE]
+    assert rows[2] == _metric(10, "EV_1", "submit_data", False, 0.6) | {"success": 0}
+    assert store.get_stats()["rows_written"] == 4
+
+
+def test_time_range_is_half_open_and_accepts_datetimes(store):
+    since = datetime.fromtimestamp(BASE + 10)
+    assert [r["timestamp"] for r in store.query_metrics(since=since, until=BASE + 30)] == [BASE + 20, BASE + 10]
+    stats = store.latency_stats(operation="submit_data", since=BASE + 5)
+    assert stats == {"count": 2, "success_rate": 0.5, "avg_latency_sec": 0.8, "min_latency_sec": 0.6,
+                     "max_latency_sec": 1.0}
+    assert store.latency_stats(since=BASE + 100)["count"] == 0
+
+
+def test_device_summary_and_export(store, tmp_path):
+    summary = store.device_summary(until=BASE + 25)
+    assert [(s["device_id"], s["operations"], s["success_rate"]) for s in summary] == [("EV_1", 2, 0.5), ("GH_2", 1, 1.0)]
+
+    assert store.export_csv(tmp_path / "export.csv", since=BASE + 20) == 2
+    with open(tmp_path / "export.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["device_id"] for row in rows] == ["GH_2", "GH_2"]
+    assert rows[0]["timestamp"] == datetime.fromtimestamp(BASE + 20).isoformat()
+    assert rows[0]["success"] == "True"
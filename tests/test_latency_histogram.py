@@ -0,0 +1,54 @@
+import random
+
+from utils.latency_histogram import EXACT_BOUNDS_SEC, LatencyHistogram
+from utils.prometheus import LATENCY_BUCKETS_SEC
+
+
+def _samples(n=100_000, seed=7):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(-0.7, 1.0) for _ in range(n)]
+
+
+def test_prometheus_buckets_match_exact_counts():
+    samples = _samples()
+    histogram = LatencyHistogram()
+    for sample in samples:
+        histogram.record(sample)
+
+    expected = [sum(1 for s in samples if s <= bound) for bound in LATENCY_BUCKETS_SEC]
+    assert histogram.cumulative_counts(LATENCY_BUCKETS_SEC) == expected
+
+
+def test_bound_itself_is_inclusive():
+    histogram = LatencyHistogram()
+    for sample in (0.5, 0.5000001, 1.0):
+        histogram.record(sample)
+    assert histogram.cumulative_counts([0.5, 1.0]) == [1, 3]
+
+
+def test_other_bounds_never_overcount():
+    samples = _samples(20_000)
+    histogram = LatencyHistogram()
+    for sample in samples:
+        histogram.record(sample)
+
+    bounds = [0.3, 0.7, 1.3, 4.2]
+    assert not set(bounds) & set(EXACT_BOUNDS_SEC)
+    for bound, counted in zip(bounds, histogram.cumulative_counts(bounds)):
+        exact = sum(1 for s in samples if s <= bound)
+        assert exact * 0.97 <= counted <= exact
+
+
+def test_exact_counts_survive_shard_merge():
+    samples = _samples(10_000)
+    shards = [LatencyHistogram(), LatencyHistogram()]
+    for i, sample in enumerate(samples):
+        shards[i % 2].record(sample)
+
+    merged = LatencyHistogram()
+    for shard in shards:
+        merged.merge(LatencyHistogram.from_dict(shard.to_dict()))
+
+    expected = [sum(1 for s in samples if s <= bound) for bound in LATENCY_BUCKETS_SEC]
+    assert merged.cumulative_counts(LATENCY_BUCKETS_SEC) == expected
+    assert merged.count == len(samples)
@@ -0,0 +1,209 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.circuit_breaker import BreakerState, CircuitBreaker
+from utils.concurrency_limiter import AIMDLimiter
+from utils.lcore_client import LcoreClient
+from utils.lcore_stub import LcoreStub
+from utils.retry_budget import RetryBudget
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def _serve(status: int):
+    """lcore-node stand-in answering every request with ``status``; returns (server, hits)"""
+    hits = []
+
+    async def handler(request):
+        hits.append(request.path)
+        return web.json_response({"status": status}, status=status)
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server, hits
+
+
+def test_cancel_while_queued_does_not_leak_half_open_trial():
+    async def scenario():
+        server, hits = await _serve(200)
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout_sec=10, clock=clock)
+        limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+        client = LcoreClient(str(server.make_url("")), limiter=limiter, breaker=breaker)
+        try:
+            breaker.record_failure()
+            clock.now = 10
+            assert breaker.state is BreakerState.HALF_OPEN
+
+            # Queue a request behind a held slot, then time it out
+            held = await limiter.acquire()
+            try:
+                await asyncio.wait_for(client._make_request("POST", "/device/register", {}), 0.05)
+            except asyncio.TimeoutError:
+                pass
+            limiter.release_unused(held)
+
+            # The trial slot is still available: the next request probes and closes the breaker
+            success, response = await client._make_request("POST", "/device/register", {})
+            return success, response, breaker.state, hits, limiter.in_flight
+        finally:
+            await client.close()
+            await server.close()
+
+    success, response, state, hits, in_flight = asyncio.run(scenario())
+    assert success, response
+    assert state is BreakerState.CLOSED
+    assert hits == ["/device/register"]
+    assert in_flight == 0
+
+
+def test_open_breaker_fails_fast_without_a_request():
+    async def scenario():
+        server, hits = await _serve(200)
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout_sec=10)
+        client = LcoreClient(str(server.make_url("")), breaker=breaker, limiter=AIMDLimiter())
+        try:
+            breaker.record_failure()
+            result = await client._make_request("POST", "/device/register", {})
+            return result, hits, client.limiter.in_flight
+        finally:
+            await client.close()
+            await server.close()
+
+    (success, response), hits, in_flight = asyncio.run(scenario())
+    assert not success and response["error"] == "circuit_open"
+    assert hits == [] and in_flight == 0
+
+
+def test_exhausted_retry_budget_stops_retries():
+    async def scenario():
+        server, hits = await _serve(503)
+        budget = RetryBudget(ratio=0.0, min_per_sec=0.0, max_tokens=2)
+        client = LcoreClient(
+            str(server.make_url("")), max_retries=5, retry_budget=budget,
+            retry_base_sec=0.001, retry_max_backoff_sec=0.001,
+        )
+        try:
+            first = await client._make_request("POST", "/device/data", {})
+            first_hits = len(hits)
+            second = await client._make_request("POST", "/device/data", {})
+            return first, second, first_hits, len(hits) - first_hits, budget.get_stats()
+        finally:
+            await client.close()
+            await server.close()
+
+    first, second, first_hits, second_hits, stats = asyncio.run(scenario())
+    assert not first[0] and first[1]["error"] == "HTTP 503"
+    assert not second[0] and second[1]["error"] == "HTTP 503"
+    # Two tokens: the first call gets two retries, the second none
+    assert (first_hits, second_hits) == (3, 1)
+    assert stats["retries"] == 2 and stats["retries_denied"] == 2
+
+
+def test_status_probe_is_one_attempt_outside_budget_breaker_and_limiter():
+    async def scenario():
+        server, hits = await _serve(503)
+        budget = RetryBudget(ratio=0.5, min_per_sec=0.0, max_tokens=2)
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout_sec=10)
+        limiter = AIMDLimiter(initial_limit=1, max_limit=1)
+        client = LcoreClient(
+            str(server.make_url("")), max_retries=5, limiter=limiter, breaker=breaker, retry_budget=budget,
+            retry_base_sec=0.001, retry_max_backoff_sec=0.001,
+        )
+        held = await limiter.acquire()
+        try:
+            # Waits for no limiter slot and leaves the budget and breaker alone
+            status = await asyncio.wait_for(client.get_status(), 1)
+            healthy = await client.health_check()
+            return status, healthy, hits, budget.tokens, budget.get_stats(), breaker.state
+        finally:
+            limiter.release_unused(held)
+            await client.close()
+            await server.close()
+
+    (success, response, latency), healthy, hits, tokens, stats, state = asyncio.run(scenario())
+    assert not success and response["error"] == "HTTP 503"
+    assert not healthy
+    assert hits == ["/status", "/status"]
+    assert tokens == 2 and stats["retries"] == 0
+    assert state is BreakerState.CLOSED
+    assert 0 < latency < 1
+
+
+async def _serve_stub(stub):
+    server = TestServer(stub.create_app())
+    await server.start_server()
+    return server
+
+
+def _devices(count):
+    return [SimpleNamespace(device_id=f"EV_{i}", public_key=f"0x{i:02x}") for i in range(count)]
+
+
+def test_concurrent_submissions_share_batches():
+    stub = LcoreStub(latency_ms=5)
+
+    async def scenario():
+        server = await _serve_stub(stub)
+        client = LcoreClient(str(server.make_url("")), batch_enabled=True, batch_max_items=3, batch_linger_sec=0.01)
+        try:
+            return await asyncio.gather(*(client.submit_device_data(d, '{"v": 1}') for d in _devices(7))), client
+        finally:
+            await client.close()
+            await server.close()
+
+    results, client = asyncio.run(scenario())
+    assert all(success for success, _, _ in results)
+    assert (stub.batches, stub.requests, stub.items) == (3, 3, 7)
+    assert client.get_batch_stats()["avg_batch_size"] == pytest.approx(7 / 3, abs=0.01)
+
+
+def test_missing_batch_endpoint_falls_back_to_single_submissions():
+    stub = LcoreStub(latency_ms=0)
+
+    async def scenario():
+        server = await _serve_stub(stub)
+        client = LcoreClient(str(server.make_url("")), batch_enabled=True, batch_path="/device/data/bulk")
+        try:
+            first = await asyncio.gather(*(client.submit_device_data(d, '{"v": 1}') for d in _devices(4)))
+            second = await client.submit_device_data(_devices(1)[0], '{"v": 2}')
+            return first + [second], client
+        finally:
+            await client.close()
+            await server.close()
+
+    results, client = asyncio.run(scenario())
+    assert all(success for success, _, _ in results)
+    assert not client.batch_enabled
+    # One rejected batch, then every reading on its own
+    assert (stub.batches, stub.requests, stub.items) == (0, 5, 5)
+    assert client.get_batch_stats()["batches_sent"] == 1
+
+
+def test_failed_items_in_a_batch_fail_only_their_callers():
+    async def scenario():
+        server = await _serve_stub(LcoreStub(latency_ms=0))
+        client = LcoreClient(str(server.make_url("")), batch_enabled=True, batch_linger_sec=0.01)
+        try:
+            devices = _devices(3)
+            devices[1].device_id = ""
+            return await asyncio.gather(*(client.submit_device_data(d, '{"v": 1}') for d in devices))
+        finally:
+            await client.close()
+            await server.close()
+
+    results = asyncio.run(scenario())
+    assert [success for success, _, _ in results] == [True, False, True]
+    assert results[1][1]["message"] == "Missing device_id or data"
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from utils.load_engine import ConstantProfile, OpenLoopScheduler, RampProfile, StepProfile, build_profile
+
+
+def test_profiles_reach_their_target_rate():
+    ramp = RampProfile(0.0, 100.0, 10.0)
+    assert [ramp.rate_at(t) for t in (0, 5, 10, 60)] == [0.0, 50.0, 100.0, 100.0]
+    step = StepProfile(25.0, 25.0, 2.0, 100.0)
+    assert [step.rate_at(t) for t in (0, 1.9, 2, 6, 30)] == [25.0, 25.0, 50.0, 100.0, 100.0]
+
+
+def test_shards_generate_their_share_of_the_fleet_rate():
+    assert build_profile(120.0, "constant", shard_count=4).rate_at(0) == 30.0
+    assert build_profile(120.0, "step", shard_count=1).rate_at(1e6) == 120.0
+
+
+def test_arrivals_keep_the_offered_rate_while_operations_are_slow():
+    async def slow():
+        await asyncio.sleep(0.5)
+
+    async def scenario():
+        scheduler = OpenLoopScheduler("test", slow, ConstantProfile(100.0), arrival="constant", max_outstanding=1000)
+        await scheduler.run(duration_sec=0.3)
+        in_flight = scheduler.in_flight
+        await scheduler.cancel_outstanding()
+        return scheduler, in_flight
+
+    scheduler, in_flight = asyncio.run(scenario())
+    assert scheduler.offered == pytest.approx(30, abs=2)
+    assert in_flight == scheduler.started == scheduler.offered
+    assert scheduler.completed == 0
+
+
+def test_arrivals_beyond_max_outstanding_are_shed():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def blocked():
+            await release.wait()
+
+        scheduler = OpenLoopScheduler("test", blocked, ConstantProfile(200.0), arrival="burst", burst_size=4,
+                                      max_outstanding=5)
+        await scheduler.run(duration_sec=0.1)
+        release.set()
+        await scheduler.drain()
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.offered % 4 == 0 and scheduler.offered >= 16
+    assert scheduler.started == 5
+    assert scheduler.shed == scheduler.offered - 5
+    assert scheduler.succeeded == scheduler.completed == 5
+
+
+def test_unavailable_dependency_pauses_arrivals():
+    available = {"up": False}
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        return False
+
+    async def scenario():
+        scheduler = OpenLoopScheduler("test", operation, ConstantProfile(100.0), arrival="constant",
+                                      is_available=lambda: available["up"])
+        await scheduler.run(duration_sec=0.1)
+        paused = scheduler.paused
+        available["up"] = True
+        await scheduler.run(duration_sec=0.1)
+        await scheduler.drain()
+        return scheduler, paused
+
+    scheduler, paused = asyncio.run(scenario())
+    assert paused and not scheduler.paused
+    assert scheduler.skipped >= 8
+    assert scheduler.offered == scheduler.started == len(calls) >= 8
+    assert scheduler.failed == scheduler.completed
@@ -0,0 +1,26 @@
+from utils.fee_oracle import fee_oracle
+from utils.lcore_client import lcore_client
+from utils.prometheus import prometheus_exporter
+from utils.receipt_tracker import receipt_tracker
+
+
+def test_fleet_stats_replace_the_launchers_own(monkeypatch):
+    for component in (receipt_tracker, fee_oracle):
+        monkeypatch.setattr(component, "_fleet_stats", None)
+    monkeypatch.setattr(lcore_client, "_fleet_limiter", None)
+    monkeypatch.setattr(lcore_client, "_fleet_breaker", None)
+
+    receipt_tracker.set_fleet_stats({"pending": 7, "last_block": 1234, "push_heads": True, "blocks_processed": 9,
+                                     "receipts_resolved": 40, "rpc_calls": 60})
+    fee_oracle.set_fleet_stats({"mode": "legacy", "params": {"gasPrice": 5}, "hits": 30, "misses": 3, "hit_rate": 0.9091,
+                                "refreshes": 3, "refresh_errors": 0, "head_updates": 2, "staleness_sec": 1.5})
+    lcore_client.set_fleet_stats({"limit": 40, "in_flight": 12, "queued": 0, "increases": 5, "decreases": 1},
+                                 {"state": "open", "opened": 2, "shed": 9})
+    text = prometheus_exporter.render()
+
+    assert "kcchain_receipts_pending 7\n" in text
+    assert "kcchain_last_block 1234\n" in text
+    assert 'kcchain_fee_oracle_lookups_total{result="hit"} 30\n' in text
+    assert "kcchain_fee_oracle_staleness_seconds 1.5\n" in text
+    assert lcore_client.get_limiter_stats()["in_flight"] == 12
+    assert lcore_client.get_breaker_stats()["state"] == "open"
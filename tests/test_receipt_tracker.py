@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from web3.exceptions import TimeExhausted
+
+from utils.receipt_tracker import ReceiptTracker
+
+TX = "0x" + "ab" * 32
+
+
+class FakeEth:
+    """Chain whose head only advances when the test mines a block"""
+
+    def __init__(self):
+        self.head = 0
+        self.blocks = {0: []}
+
+    def mine(self, *hashes):
+        self.head += 1
+        self.blocks[self.head] = list(hashes)
+
+    @property
+    def block_number(self):
+        async def head():
+            return self.head
+        return head()
+
+    async def get_block(self, number, full_transactions=False):
+        return {"number": number, "transactions": self.blocks[number]}
+
+    async def get_transaction_receipt(self, tx_hash):
+        return {"transactionHash": tx_hash, "status": 1}
+
+
+class FakeWeb3:
+    def __init__(self):
+        self.eth = FakeEth()
+        self.provider = object()
+
+
+def test_timed_out_waiter_does_not_drop_shared_entry():
+    async def scenario():
+        w3 = FakeWeb3()
+        tracker = ReceiptTracker(w3=w3, poll_interval=0.01)
+        patient = asyncio.create_task(tracker.wait_for_receipt(TX, timeout=5))
+        with pytest.raises(TimeExhausted):
+            await tracker.wait_for_receipt(TX, timeout=0.05)
+        assert tracker.pending_count == 1
+
+        w3.eth.mine(TX)
+        receipt, _ = await asyncio.wait_for(patient, 1)
+        await tracker.stop()
+        return receipt
+
+    assert asyncio.run(scenario())["transactionHash"] == TX
+
+
+def test_last_waiter_to_give_up_drops_entry():
+    async def scenario():
+        tracker = ReceiptTracker(w3=FakeWeb3(), poll_interval=0.01)
+        results = await asyncio.gather(
+            tracker.wait_for_receipt(TX, timeout=0.02),
+            tracker.wait_for_receipt(TX, timeout=0.05),
+            return_exceptions=True,
+        )
+        await tracker.stop()
+        return results, tracker.pending_count
+
+    results, pending = asyncio.run(scenario())
+    assert all(isinstance(result, TimeExhausted) for result in results)
+    assert pending == 0
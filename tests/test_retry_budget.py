@@ -0,0 +1,34 @@
+from utils.retry_budget import RetryBudget
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_budget_exhausts_and_refills():
+    clock = Clock()
+    budget = RetryBudget(ratio=0.5, min_per_sec=1.0, max_tokens=2, clock=clock)
+    assert budget.try_withdraw() and budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    budget.deposit()
+    budget.deposit()
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+
+    clock.now = 1.0
+    assert budget.try_withdraw()
+    assert budget.get_stats()["retries"] == 4
+    assert budget.get_stats()["retries_denied"] == 2
+
+
+def test_tokens_capped():
+    clock = Clock()
+    budget = RetryBudget(ratio=1.0, min_per_sec=0.0, max_tokens=3, clock=clock)
+    for _ in range(10):
+        budget.deposit()
+    assert sum(budget.try_withdraw() for _ in range(10)) == 3
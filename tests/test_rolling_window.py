@@ -0,0 +1,51 @@
+from utils.rolling_window import RollingWindow, merge_window_counters, summarize_window, window_label
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_slots_expire_once_they_leave_the_window():
+    clock = Clock()
+    window = RollingWindow(60.0, clock=clock)
+    window.record(True, 0.5)
+    clock.now = 1030.0
+    window.record(False)
+
+    clock.now = 1059.5
+    counters = window.get_counters()
+    assert (counters["count"], counters["successes"], counters["latency_count"]) == (2, 1, 1)
+    assert counters["span_sec"] == 59.5
+
+    clock.now = 1060.5
+    counters = window.get_counters()
+    assert (counters["count"], counters["latency_max"]) == (1, 0.0)
+
+
+def test_reused_slot_drops_the_old_period():
+    clock = Clock()
+    window = RollingWindow(60.0, clock=clock)
+    for _ in range(3):
+        window.record(True, 2.0)
+    # Same ring slot, one full window later
+    clock.now = 1060.2
+    window.record(False, 0.1)
+    counters = window.get_counters()
+    assert (counters["count"], counters["successes"], counters["latency_max"]) == (1, 0, 0.1)
+
+
+def test_summary_and_shard_merge():
+    clock = Clock()
+    windows = [RollingWindow(10.0, clock=clock) for _ in range(2)]
+    windows[0].record(True, 0.2)
+    windows[0].record(True, 0.4)
+    windows[1].record(False, 1.0)
+    clock.now = 1005.0
+    merged = merge_window_counters([w.get_counters() for w in windows])
+    assert summarize_window(merged) == {"count": 3, "ops_per_sec": 0.6, "success_rate": 0.6667,
+                                        "avg_latency_sec": 0.5333, "max_latency_sec": 1.0}
+    assert [window_label(w) for w in (10, 60, 300, 3600, 90)] == ["10s", "1m", "5m", "1h", "90s"]
@@ -0,0 +1,74 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.rpc_batcher import BatchingHTTPProvider
+
+
+async def _node(accept_batches: bool):
+    """JSON-RPC node answering ``eth_getBalance`` with the address length; returns (server, posts)"""
+    posts = []
+
+    def answer(call):
+        if call["method"] == "eth_getBalance":
+            return {"jsonrpc": "2.0", "id": call["id"], "result": hex(len(call["params"][0]))}
+        return {"jsonrpc": "2.0", "id": call["id"], "result": "0x1"}
+
+    async def handler(request):
+        body = await request.json()
+        posts.append(body)
+        if isinstance(body, list):
+            if not accept_batches:
+                return web.json_response({"jsonrpc": "2.0", "id": None,
+                                          "error": {"code": -32600, "message": "batch requests are not supported"}})
+            return web.json_response([answer(call) for call in reversed(body)])
+        return web.json_response(answer(body))
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server, posts
+
+
+async def _read_balances(provider, count):
+    return await asyncio.gather(*(
+        provider.make_request("eth_getBalance", ["0x" + "a" * i, "latest"]) for i in range(1, count + 1)
+    ))
+
+
+def test_concurrent_reads_share_one_batch():
+    async def scenario():
+        server, posts = await _node(accept_batches=True)
+        try:
+            provider = BatchingHTTPProvider(str(server.make_url("/")), max_batch_size=50)
+            responses = await _read_balances(provider, 5)
+            await provider.make_request("eth_sendRawTransaction", ["0x00"])
+            return responses, posts, provider.get_stats()
+        finally:
+            await server.close()
+
+    responses, posts, stats = asyncio.run(scenario())
+    # Responses are matched to callers by id, not by position
+    assert [int(r["result"], 16) for r in responses] == [3, 4, 5, 6, 7]
+    assert [len(body) if isinstance(body, list) else "single" for body in posts] == [5, "single"]
+    assert (stats["batches_sent"], stats["batched_calls"], stats["http_requests"]) == (1, 5, 2)
+
+
+def test_rejected_batch_falls_back_to_single_requests_for_good():
+    async def scenario():
+        server, posts = await _node(accept_batches=False)
+        try:
+            provider = BatchingHTTPProvider(str(server.make_url("/")))
+            first = await _read_balances(provider, 3)
+            second = await _read_balances(provider, 2)
+            return first + second, posts, provider
+        finally:
+            await server.close()
+
+    responses, posts, provider = asyncio.run(scenario())
+    assert [int(r["result"], 16) for r in responses] == [3, 4, 5, 3, 4]
+    assert not provider.batching_supported
+    # One rejected batch, then every call on its own
+    assert [isinstance(body, list) for body in posts] == [True] + [False] * 5
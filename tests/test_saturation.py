@@ -0,0 +1,95 @@
+import asyncio
+
+import utils.saturation as saturation
+from utils.saturation import SaturationSearch
+
+
+def _search(monkeypatch, **kwargs) -> SaturationSearch:
+    monkeypatch.setattr(saturation, "STAGE_COOLDOWN_SEC", 0)
+    kwargs.setdefault("target_p99_sec", 0.2)
+    return SaturationSearch(strategy="staged", stage_sec=1, **kwargs)
+
+
+def test_stragglers_are_cancelled_before_next_stage(monkeypatch):
+    running = 0
+
+    async def operation():
+        nonlocal running
+        running += 1
+        try:
+            await asyncio.sleep(10)
+        finally:
+            running -= 1
+
+    async def scenario():
+        stage = await _search(monkeypatch).run_stage("slow", operation, 20)
+        return stage, running
+
+    stage, still_running = asyncio.run(scenario())
+    assert still_running == 0
+    assert stage["unfinished"] == stage["started"] > 0
+    assert stage["success_rate"] == 0.0
+    assert not stage["passed"] and not stage["client_limited"]
+
+
+def test_shed_arrivals_stop_search_as_client_limited(monkeypatch):
+    async def operation():
+        await asyncio.sleep(0.1)
+
+    search = _search(monkeypatch, start_rate=10, growth_factor=10, max_rate=1000, max_outstanding=8)
+    result = asyncio.run(search.search("capped", operation))
+
+    assert result["max_sustainable_rate"] == 10
+    assert result["client_limited_at"] == 100
+    assert result["first_failing_rate"] is None
+    last = result["stages"][-1]
+    assert last["shed"] > 0 and last["success_rate"] == 1.0
+
+
+def test_nonce_slot_waits_mark_stage_client_limited(monkeypatch):
+    waits = {"nonce_slots": 0.0, "signing": 0.0}
+    slot = asyncio.Semaphore(1)
+
+    async def operation():
+        # One nonce slot: every operation queues behind the previous one
+        waited = asyncio.get_running_loop().time()
+        async with slot:
+            waits["nonce_slots"] += asyncio.get_running_loop().time() - waited
+            await asyncio.sleep(0.02)
+
+    search = _search(monkeypatch, client_waits=lambda: dict(waits), target_p99_sec=5)
+    stage = asyncio.run(search.run_stage("wallet", operation, 100))
+
+    assert stage["shed"] == 0 and stage["success_rate"] == 1.0
+    assert stage["client_wait_share"]["nonce_slots"] > 0.5
+    assert stage["client_wait_share"]["signing"] == 0.0
+    assert stage["client_limited"] and not stage["passed"]
+    assert any("nonce_slots" in limit for limit in stage["client_limits"])
+
+
+def test_shortfall_without_shedding_is_client_limited(monkeypatch):
+    class LaggingScheduler(saturation.OpenLoopScheduler):
+        """Stands in for a client that manages only part of the stage's arrivals"""
+
+        async def run(self, duration_sec=None):
+            await super().run(duration_sec / 2)
+            await asyncio.sleep(duration_sec / 2)
+
+    async def operation():
+        await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(saturation, "OpenLoopScheduler", LaggingScheduler)
+    stage = asyncio.run(_search(monkeypatch).run_stage("lagging", operation, 200))
+    assert stage["shed"] == 0 and stage["success_rate"] == 1.0
+    assert stage["achieved_rate"] < 150
+    assert stage["client_limited"] and not stage["passed"]
+    assert any("without shedding" in limit for limit in stage["client_limits"])
+
+
+def test_stage_at_pace_is_not_client_limited(monkeypatch):
+    async def operation():
+        await asyncio.sleep(0.01)
+
+    search = _search(monkeypatch, client_waits=lambda: {"signing": 0.0})
+    stage = asyncio.run(search.run_stage("fast", operation, 50))
+    assert stage["passed"] and not stage["client_limited"] and stage["client_limits"] == []
@@ -0,0 +1,35 @@
+import numpy as np
+
+from utils.data_parsers import DataParser
+from utils.sensor_dataset import SensorDataset
+
+HEADER = ["product_code", "location", "unit_price"]
+ROWS = [["10032", "4401", "12.5"], ["10045", "", "7"], ["10032", "4402", ""]]
+
+
+def test_declared_text_columns_keep_numeric_looking_values():
+    data = SensorDataset(HEADER, ROWS, text_columns=("product_code", "location"))
+    assert data.text("product_code", 0) == "10032"
+    assert data.text("location", 1, "Unknown") == "Unknown"
+    assert data.texts("location", np.array([0, 1, 2]), "Unknown") == ["4401", "Unknown", "4402"]
+    assert data.number("unit_price", 0, 0.0) == 12.5
+
+
+def test_undeclared_numeric_columns_are_formatted_back_to_text():
+    data = SensorDataset(HEADER, ROWS)
+    assert data.text("product_code", 1) == "10045"
+    assert data.text("unit_price", 0) == "12.5"
+    assert data.text("unit_price", 2, "n/a") == "n/a"
+    assert data.texts("product_code", np.array([2, 0])) == ["10032", "10032"]
+    assert data.text("missing", 0, "Unknown") == "Unknown"
+
+
+def test_sales_readings_keep_numeric_product_codes_and_locations(tmp_path):
+    (tmp_path / "sales_data_sample.csv").write_text(
+        "product_code,location,unit_price\n" + "\n".join(",".join(row) for row in ROWS) + "\n"
+    )
+    parser = DataParser(str(tmp_path))
+    assert parser.get_random_sales_data().product_code in {"10032", "10045"}
+    records = parser.get_sales_data_batch(50)
+    assert {record["product_code"] for record in records} <= {"10032", "10045"}
+    assert {record["location"] for record in records} <= {"4401", "4402", "Unknown"}
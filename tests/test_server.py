@@ -0,0 +1,69 @@
+import asyncio
+
+import aiohttp
+from aiohttp.test_utils import TestServer
+
+import server
+from utils.health_prober import HealthProber
+from utils.prometheus import CONTENT_TYPE
+
+
+def test_routes_report_readiness_from_cached_probes(monkeypatch):
+    state = {"lcore_up": False}
+
+    async def lcore_probe():
+        return state["lcore_up"]
+
+    async def rpc_probe():
+        return 42
+
+    prober = HealthProber(interval_sec=60, timeout_sec=1, failure_threshold=1, history=5)
+    prober.add_target("lcore_node", lcore_probe)
+    prober.add_target("rpc", rpc_probe)
+    monkeypatch.setattr(server, "health_prober", prober)
+    monkeypatch.setattr(server, "readiness", server.Readiness())
+
+    async def scenario():
+        app_server = TestServer(server.create_app())
+        await app_server.start_server()
+        results = {}
+        try:
+            async with aiohttp.ClientSession() as session:
+                async def get(path):
+                    async with session.get(app_server.make_url(path)) as response:
+                        if response.content_type == "application/json":
+                            return response.status, await response.json()
+                        return response.status, response.headers["Content-Type"], await response.text()
+
+                await prober.probe_all()
+                results["health"] = await get("/health")
+                results["ready_down"] = await get("/ready")
+                state["lcore_up"] = True
+                await prober.probe_all()
+                server.readiness.mark_started()
+                results["ready_up"] = await get("/ready")
+                results["metrics"] = await get("/metrics")
+                results["prometheus"] = await get("/metrics/prometheus")
+        finally:
+            await app_server.close()
+        return results
+
+    results = asyncio.run(scenario())
+    assert results["health"] == (200, {"status": "ok", "dependencies": {"lcore_node": False, "rpc": True}})
+
+    status, body = results["ready_down"]
+    assert status == 503 and not body["ready"]
+    assert body["checks"]["startup"] == {"ok": False}
+    assert body["checks"]["lcore_node"]["last_error"] == "probe returned failure"
+
+    status, body = results["ready_up"]
+    assert status == 200 and body["ready"]
+
+    status, body = results["metrics"]
+    assert status == 200
+    assert {"lcore_phases", "lcore_limiter", "lcore_breaker", "dependencies", "writers"} <= body.keys()
+    assert body["dependencies"]["lcore_node"]["probes"] == 2
+
+    status, content_type, text = results["prometheus"]
+    assert status == 200 and content_type == CONTENT_TYPE
+    assert "# TYPE" in text
@@ -0,0 +1,75 @@
+from utils.sharding import ShardLauncher, merge_breaker_stats, merge_fee_stats, merge_receipt_stats
+
+
+def test_breaker_counters_summed_gauges_not():
+    shards = [
+        {"state": "closed", "consecutive_failures": 1, "opened": 2, "shed": 10,
+         "retries": 5, "retries_denied": 1, "tokens": 9.5},
+        {"state": "open", "consecutive_failures": 4, "opened": 1, "shed": 3,
+         "retries": 7, "retries_denied": 0, "tokens": 0.4},
+    ]
+    merged = merge_breaker_stats(shards)
+
+    assert {k: merged[k] for k in ("opened", "shed", "retries", "retries_denied")} == {
+        "opened": 3, "shed": 13, "retries": 12, "retries_denied": 1,
+    }
+    assert merged["state"] == "open"
+    assert merged["consecutive_failures"] == 4
+    assert merged["tokens"] == 0.4
+    assert merged["shards"] == [
+        {"state": "closed", "consecutive_failures": 1, "tokens": 9.5},
+        {"state": "open", "consecutive_failures": 4, "tokens": 0.4},
+    ]
+
+
+def test_breaker_disabled_everywhere():
+    assert merge_breaker_stats([{}, {}]) == {}
+
+
+def test_receipt_stats_sum_work_and_take_latest_block():
+    merged = merge_receipt_stats([
+        {"pending": 3, "last_block": 100, "push_heads": True, "blocks_processed": 10, "receipts_resolved": 7, "rpc_calls": 20},
+        {"pending": 2, "last_block": 102, "push_heads": False, "blocks_processed": 12, "receipts_resolved": 5, "rpc_calls": 22},
+        {"pending": 0, "last_block": None, "push_heads": True, "blocks_processed": 0, "receipts_resolved": 0, "rpc_calls": 0},
+    ])
+    assert merged == {"pending": 5, "last_block": 102, "push_heads": False, "blocks_processed": 22,
+                      "receipts_resolved": 12, "rpc_calls": 42}
+
+
+def test_fee_stats_use_freshest_quote_and_stalest_age():
+    def fees(hits, misses, params, staleness):
+        return {"mode": "auto", "params": params, "hits": hits, "misses": misses, "hit_rate": 0.0, "refreshes": misses,
+                "refresh_errors": 0, "head_updates": 1, "staleness_sec": staleness}
+
+    merged = merge_fee_stats([
+        fees(9, 1, {"gasPrice": 1}, 4.0),
+        fees(5, 5, {"gasPrice": 2}, 0.5),
+        fees(0, 0, None, None),
+    ])
+    assert merged["params"] == {"gasPrice": 2}
+    assert merged["staleness_sec"] == 4.0
+    assert (merged["hits"], merged["misses"], merged["hit_rate"], merged["head_updates"]) == (14, 6, 0.7, 3)
+    assert merge_fee_stats([fees(0, 0, None, None)])["staleness_sec"] is None
+
+
+def test_totals_include_receipts_fees_and_wallet_ledgers():
+    def snapshot(shard, ledger):
+        return {
+            "dapp": {}, "dapp_status": {}, "iot": {}, "latency": {}, "rolling": {}, "lcore_phases": {},
+            "lcore_limiter": {"limit": 10, "in_flight": shard, "queued": 0, "increases": 1, "decreases": 0},
+            "lcore_breaker": {}, "load": [], "rpc": {},
+            "signing": {"queued": 0, "taken": 0, "queue_hits": 0, "resigned": 0, "signed": 0},
+            "receipts": {"pending": 1, "last_block": 50 + shard, "push_heads": True, "blocks_processed": 1,
+                         "receipts_resolved": 1, "rpc_calls": 1},
+            "fees": {"mode": "legacy", "params": None, "hits": 1, "misses": 1, "hit_rate": 0.5, "refreshes": 1,
+                     "refresh_errors": 0, "head_updates": 0, "staleness_sec": None},
+            "wallets": ledger,
+        }
+
+    launcher = ShardLauncher(lambda reports: None, 2)
+    launcher.snapshots = {0: snapshot(0, {"0xa": [1, 0]}), 1: snapshot(1, {"0xb": [2, 3]})}
+    totals = launcher.get_totals()
+    assert totals["receipts"]["pending"] == 2 and totals["receipts"]["last_block"] == 51
+    assert totals["fees"]["hits"] == 2
+    assert totals["wallets"] == {"0xa": [1, 0], "0xb": [2, 3]}
+    assert totals["lcore_limiter"]["limit"] == 20 and totals["lcore_limiter"]["in_flight"] == 1
@@ -0,0 +1,86 @@
+import asyncio
+import secrets
+from types import SimpleNamespace
+
+import pytest
+from eth_account import Account
+
+from utils.signing_pool import SignAheadPipeline, SigningPool
+from utils.wallet_manager import ManagedWallet, NonceManager, WalletType
+
+
+class FakeFees:
+    def __init__(self, gas_price):
+        self.gas_price = gas_price
+
+    async def get_fee_params(self):
+        return {"gasPrice": self.gas_price}
+
+
+@pytest.fixture
+def env(monkeypatch):
+    """Inline signing pool with a local nonce manager seeded at 0 and a settable fee quote"""
+    async def get_transaction_count(address, block_identifier):
+        return 0
+
+    monkeypatch.setattr("utils.wallet_manager.web3_async",
+                        SimpleNamespace(eth=SimpleNamespace(get_transaction_count=get_transaction_count)))
+    fees = FakeFees(100)
+    nonces = NonceManager({})
+    monkeypatch.setattr("utils.signing_pool.fee_oracle", fees)
+    monkeypatch.setattr("utils.signing_pool.wallet_manager", SimpleNamespace(nonce_manager=nonces))
+    key = "0x" + secrets.token_hex(32)
+    wallet = ManagedWallet(Account.from_key(key).address, key, WalletType.PAYMENT_USER, "user_0")
+    return SimpleNamespace(fees=fees, nonces=nonces, wallet=wallet)
+
+
+def test_take_serves_queued_transactions_in_nonce_order(env):
+    pipeline = SignAheadPipeline(SigningPool(workers=0), depth=3, fee_tolerance=0.9)
+
+    async def scenario():
+        taken = [await pipeline.take(env.wallet)]
+        await asyncio.gather(*pipeline._tasks)
+        taken += [await pipeline.take(env.wallet) for _ in range(3)]
+        await asyncio.gather(*pipeline._tasks)
+        return taken
+
+    taken = asyncio.run(scenario())
+    assert [item.nonce for item in taken] == [0, 1, 2, 3]
+    assert pipeline.queue_hits == 3 and pipeline.queued(env.wallet.address) == 3
+    assert Account.recover_transaction(taken[1].raw_tx) == env.wallet.address
+
+
+def test_stale_fee_transactions_are_resigned_with_the_same_nonce(env):
+    pipeline = SignAheadPipeline(SigningPool(workers=0), depth=2, fee_tolerance=0.9)
+
+    async def scenario():
+        await pipeline.take(env.wallet)
+        await asyncio.gather(*pipeline._tasks)
+        # Within tolerance: the queued signature is still good enough
+        env.fees.gas_price = 110
+        kept = await pipeline.take(env.wallet)
+        # Fee cap now below 90% of the quote
+        env.fees.gas_price = 200
+        resigned = await pipeline.take(env.wallet)
+        return kept, resigned
+
+    kept, resigned = asyncio.run(scenario())
+    assert (kept.nonce, kept.tx["gasPrice"]) == (1, 100)
+    assert (resigned.nonce, resigned.tx["gasPrice"]) == (2, 200)
+    assert pipeline.resigned == 1
+    assert Account.recover_transaction(resigned.raw_tx) == env.wallet.address
+
+
+def test_flush_hands_queued_nonces_back(env):
+    pipeline = SignAheadPipeline(SigningPool(workers=0), depth=3, fee_tolerance=0.9)
+
+    async def scenario():
+        item = await pipeline.take(env.wallet)
+        await asyncio.gather(*pipeline._tasks)
+        env.nonces.confirm(env.wallet.address, item.nonce)
+        pipeline.flush(env.wallet.address)
+        return await env.nonces.allocate(env.wallet.address)
+
+    assert asyncio.run(scenario()) == 1
+    assert pipeline.queued(env.wallet.address) == 0
+    assert env.nonces.get_stats()["resyncs"] == 0
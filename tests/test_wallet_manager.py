@@ -0,0 +1,157 @@
+import asyncio
+import csv
+import secrets
+
+import pytest
+from eth_account import Account
+
+from utils.wallet_manager import NonceManager, WalletManager, WalletType
+
+FIELDS = ["address", "private_key", "wallet_type", "label", "balance_eth", "nonce",
+          "total_transactions", "total_gas_used", "created_at"]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """WalletManager over a throwaway wallets CSV: one funder and three payment users"""
+    path = tmp_path / "wallets.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for wallet_type, label in [(WalletType.FUNDER, "funder"), *((WalletType.PAYMENT_USER, f"user_{i}") for i in range(3))]:
+            key = "0x" + secrets.token_hex(32)
+            writer.writerow({
+                "address": Account.from_key(key).address, "private_key": key, "wallet_type": wallet_type.value,
+                "label": label, "balance_eth": 0.0, "nonce": 0, "total_transactions": 0, "total_gas_used": 0,
+                "created_at": "",
+            })
+    return WalletManager(str(path))
+
+
+def test_ledger_round_trips_between_processes(manager, tmp_path):
+    users = manager.get_wallets_by_type(WalletType.PAYMENT_USER)
+    manager._set_balance(users[0], 5 * 10**18)
+    users[0].reserved_wei = 10**15
+    ledger = manager.get_ledger()
+    assert ledger[users[0].address] == [5 * 10**18, 10**15]
+    assert ledger[users[1].address] == [None, 0]
+
+    # The launcher's copy of the same wallets mirrors the shard's ledger
+    parent = WalletManager(str(manager.wallets_csv_file))
+    parent.set_ledger({**ledger, "0x0000000000000000000000000000000000000001": [1, 0]})
+    mirrored = parent.wallets[users[0].address]
+    assert (mirrored.balance_wei, mirrored.reserved_wei, mirrored.balance_eth) == (5 * 10**18, 10**15, 5.0)
+    assert parent.wallets[users[1].address].balance_wei is None
+
+
+class FakeChain:
+    """Stands in for ``web3_async``; ``get_balance`` can be held to interleave ledger updates"""
+
+    def __init__(self, balance_wei=0, pending_nonce=0):
+        self.balance_wei = balance_wei
+        self.pending_nonce = pending_nonce
+        self.reads = 0
+        self.nonce_reads = 0
+        self.hold = None
+        self.eth = self
+
+    async def get_balance(self, address):
+        self.reads += 1
+        if self.hold is not None:
+            await self.hold.wait()
+        return self.balance_wei
+
+    async def get_transaction_count(self, address, block_identifier):
+        self.nonce_reads += 1
+        return self.pending_nonce
+
+
+def test_reconcile_skips_wallets_with_transactions_in_flight(manager, monkeypatch):
+    chain = FakeChain(10 * 10**18)
+    monkeypatch.setattr("utils.wallet_manager.web3_async", chain)
+    user = manager.get_wallets_by_type(WalletType.PAYMENT_USER)[0]
+
+    async def scenario():
+        assert await manager.reserve_funds(user.address, 10**18)
+        # Reading now would return the pre-mining balance, which settle_funds debits again later
+        assert not await manager.reconcile_balance(user.address)
+        manager.settle_funds(user.address, 10**18, 4 * 10**17)
+        assert user.balance_wei == 10 * 10**18 - 4 * 10**17
+
+        chain.balance_wei = user.balance_wei
+        assert await manager.reconcile_balance(user.address)
+
+    asyncio.run(scenario())
+    assert chain.reads == 2
+
+
+def test_reconcile_discards_reads_that_raced_a_settle(manager, monkeypatch):
+    chain = FakeChain(10 * 10**18)
+    monkeypatch.setattr("utils.wallet_manager.web3_async", chain)
+    user = manager.get_wallets_by_type(WalletType.PAYMENT_USER)[0]
+    manager._set_balance(user, 10 * 10**18)
+
+    async def scenario():
+        chain.hold = asyncio.Event()
+        read = asyncio.create_task(manager.reconcile_balance(user.address))
+        await asyncio.sleep(0)
+        assert await manager.reserve_funds(user.address, 10**18)
+        manager.settle_funds(user.address, 10**18, 10**18)
+        chain.hold.set()
+        return await read
+
+    assert not asyncio.run(scenario())
+    assert user.balance_wei == 9 * 10**18
+
+
+def test_nonces_are_allocated_locally_and_handed_back(monkeypatch):
+    chain = FakeChain(pending_nonce=7)
+    monkeypatch.setattr("utils.wallet_manager.web3_async", chain)
+    nonces = NonceManager({})
+
+    async def scenario():
+        assert [await nonces.allocate("0xa") for _ in range(3)] == [7, 8, 9]
+        # The newest nonce is reused; an older one leaves a gap that forces a resync
+        nonces.discard("0xa", 9)
+        assert await nonces.allocate("0xa") == 9
+        nonces.confirm("0xa", 7)
+        assert nonces.pending_count("0xa") == 2
+        nonces.discard("0xa", 8)
+        chain.pending_nonce = 8
+        return await nonces.allocate("0xa")
+
+    assert asyncio.run(scenario()) == 8
+    assert chain.nonce_reads == 2
+    assert nonces.get_stats()["resyncs"] == 1
+
+
+def test_nonce_too_low_resyncs_from_the_node(monkeypatch):
+    chain = FakeChain(pending_nonce=0)
+    monkeypatch.setattr("utils.wallet_manager.web3_async", chain)
+    nonces = NonceManager({})
+
+    async def scenario():
+        nonce = await nonces.allocate("0xa")
+        # Someone else used the wallet; the node is ahead of our counter
+        chain.pending_nonce = 5
+        nonces.discard("0xa", nonce, ValueError({"code": -32000, "message": "nonce too low"}))
+        return await nonces.allocate("0xa")
+
+    assert asyncio.run(scenario()) == 5
+    assert nonces.get_stats() == {"pending": 1, "resyncs": 1, "slot_waits": 0, "slot_wait_sec": 0.0}
+
+
+def test_allocation_waits_for_a_free_slot(monkeypatch):
+    monkeypatch.setattr("utils.wallet_manager.web3_async", FakeChain())
+    nonces = NonceManager({}, max_pending_per_wallet=1)
+
+    async def scenario():
+        first = await nonces.allocate("0xa")
+        second = asyncio.create_task(nonces.allocate("0xa"))
+        await asyncio.sleep(0.01)
+        assert not second.done()
+        nonces.confirm("0xa", first)
+        return await second
+
+    assert asyncio.run(scenario()) == 1
+    assert nonces.get_stats()["slot_waits"] == 1
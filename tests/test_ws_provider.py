@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils import ws_provider
+from utils.ws_provider import WebSocketRPCProvider
+
+
+class FakeNode:
+    """WebSocket JSON-RPC node: numbered eth_subscribe ids, "0x1" for anything else"""
+
+    def __init__(self):
+        self.subscription_ids = []
+        self.sockets = []
+        self.connections = 0
+
+    async def handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self.sockets.append(ws)
+        self.subscription_ids.append([])
+        async for message in ws:
+            call = json.loads(message.data)
+            result = "0x1"
+            if call["method"] == "eth_subscribe":
+                result = hex(sum(len(ids) for ids in self.subscription_ids) + 1)
+                self.subscription_ids[-1].append(result)
+            await ws.send_json({"jsonrpc": "2.0", "id": call["id"], "result": result})
+        return ws
+
+    async def push_heads(self):
+        """One newHeads notification per subscription on the latest connection"""
+        for subscription in self.subscription_ids[-1]:
+            await self.sockets[-1].send_json({
+                "jsonrpc": "2.0",
+                "method": "eth_subscription",
+                "params": {"subscription": subscription, "result": {"number": "0x10"}},
+            })
+
+
+async def _start(node):
+    app = web.Application()
+    app.router.add_get("/", node.handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server, WebSocketRPCProvider(str(server.make_url("/")).replace("http", "ws"), request_timeout=2)
+
+
+async def _until(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_subscribe_right_after_connect_subscribes_once():
+    async def scenario():
+        node = FakeNode()
+        server, provider = await _start(node)
+        heads = []
+        try:
+            provider._ensure_running()
+            # Resumes before the connect-time _resubscribe task has run
+            await provider._connected.wait()
+            await provider.subscribe("newHeads", heads.append)
+            await asyncio.sleep(0.05)
+            await node.push_heads()
+            await _until(lambda: heads)
+            await asyncio.sleep(0.05)
+            return node.subscription_ids, heads
+        finally:
+            await provider.disconnect()
+            await server.close()
+
+    subscription_ids, heads = asyncio.run(scenario())
+    assert subscription_ids == [["0x1"]]
+    assert heads == [{"number": "0x10"}]
+
+
+def test_reconnect_resubscribes(monkeypatch):
+    monkeypatch.setattr(ws_provider, "RECONNECT_INITIAL_SEC", 0.01)
+
+    async def scenario():
+        node = FakeNode()
+        server, provider = await _start(node)
+        heads = []
+        try:
+            await provider.subscribe("newHeads", heads.append)
+            assert (await provider.make_request("eth_blockNumber", []))["result"] == "0x1"
+            await node.sockets[-1].close()
+            await _until(lambda: node.connections == 2 and node.subscription_ids[-1])
+            await node.push_heads()
+            await _until(lambda: heads)
+            block = await provider.make_request("eth_blockNumber", [])
+            return node.subscription_ids, heads, block, provider.get_stats()
+        finally:
+            await provider.disconnect()
+            await server.close()
+
+    subscription_ids, heads, block, stats = asyncio.run(scenario())
+    assert subscription_ids == [["0x1"], ["0x2"]]
+    assert heads == [{"number": "0x10"}]
+    assert block["result"] == "0x1"
+    assert stats["reconnects"] == 1 and stats["subscriptions"] == 1 and stats["connected"]
@@ -0,0 +1,300 @@
+import csv
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_FLUSH = object()
+_CLOSE = object()
+
+# Backoff between attempts to reopen storage that failed
+REOPEN_MIN_SEC = 1.0
+REOPEN_MAX_SEC = 60.0
+
+_writers: "weakref.WeakSet[BufferedWriter]" = weakref.WeakSet()
+
+
+def get_writer_stats() -> Dict[str, Dict[str, Any]]:
+    """:meth:`BufferedWriter.get_stats` of every live writer, by name"""
+    return {writer.name: writer.get_stats() for writer in list(_writers)}
+
+
+class BufferedWriter:
+    """Batches records on a queue and hands them to a background thread.
+
+    :meth:`write` only puts the record on a queue, so callers on the event
+    loop never touch the disk. The writer thread collects records and passes
+    them to :meth:`_write_batch` in one go once ``max_rows`` are waiting or
+    ``flush_interval_sec`` has passed since the last flush. Subclasses
+    implement the storage: :meth:`_open` and :meth:`_close` run on the writer
+    thread, as does :meth:`_after_flush`.
+
+    If opening the storage or finishing a flush (e.g. rotating a file) fails,
+    the writer is marked ``failed`` and the thread keeps running. It retries
+    :meth:`_open` with exponential backoff and meanwhile drops the records
+    it takes off the queue, counting them in ``rows_dropped``. That way a
+    full disk does not make the queue grow without bound.
+    """
+
+    def __init__(self, name: str, max_rows: int = 500, flush_interval_sec: float = 1.0):
+        self.name = name
+        self.max_rows = max(1, max_rows)
+        self.flush_interval_sec = flush_interval_sec
+
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        # Storage state (writer thread)
+        self._storage_open = False
+        self._reopen_at = 0.0
+        self._reopen_delay = REOPEN_MIN_SEC
+        self.failed = False
+        self.last_error: Optional[str] = None
+
+        # Counters
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.flushes = 0
+        _writers.add(self)
+
+    def write(self, row: Any):
+        """Queue one record (never blocks)"""
+        if self._closed:
+            return
+        self._ensure_started()
+        self._queue.put(row)
+
+    def flush(self, timeout_sec: float = 10.0):
+        """Write everything queued so far and wait until it is stored"""
+        if self._thread is None or self._closed:
+            return
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait(timeout_sec)
+
+    def close(self, timeout_sec: float = 10.0):
+        """Flush remaining records and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_CLOSE)
+            self._thread.join(timeout_sec)
+
+    @property
+    def backlog(self) -> int:
+        """Records queued but not yet handed to the writer thread"""
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "flushes": self.flushes,
+            "backlog": self.backlog,
+            "failed": self.failed,
+            "last_error": self.last_error,
+        }
+
+    # ------------------------------------------------------------------
+    # Storage hooks (run on the writer thread)
+    # ------------------------------------------------------------------
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _write_batch(self, batch: List[Any]):
+        raise NotImplementedError
+
+    def _after_flush(self):
+        pass
+
+    def _close(self):
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"writer-{self.name}", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        self._reopen()
+        batch: List[Any] = []
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_interval_sec - (time.monotonic() - last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _CLOSE:
+                self._flush(batch)
+                if self._storage_open:
+                    try:
+                        self._close()
+                    except Exception as e:
+                        logger.error(f"Failed to close {self.name}: {e}")
+                return
+            if isinstance(item, tuple) and item and item[0] is _FLUSH:
+                self._flush(batch)
+                batch = []
+                last_flush = time.monotonic()
+                item[1].set()
+                continue
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.max_rows or time.monotonic() - last_flush >= self.flush_interval_sec:
+                self._flush(batch)
+                batch = []
+                last_flush = time.monotonic()
+
+    def _flush(self, batch: List[Any]):
+        if not self._storage_open and time.monotonic() >= self._reopen_at:
+            self._reopen()
+        if not self._storage_open:
+            self.rows_dropped += len(batch)
+            return
+        if batch:
+            try:
+                self._write_batch(batch)
+                self.rows_written += len(batch)
+                self.flushes += 1
+            except Exception as e:
+                self.rows_dropped += len(batch)
+                logger.error(f"Failed to write {len(batch)} rows to {self.name}: {e}")
+        try:
+            self._after_flush()
+        except Exception as e:
+            self._storage_failed("finish a flush of", e)
+
+    def _reopen(self):
+        try:
+            self._open()
+        except Exception as e:
+            self._storage_failed("open", e)
+            return
+        if self.failed:
+            logger.info(f"{self.name} reopened after failure; {self.rows_dropped} rows dropped so far")
+        self._storage_open = True
+        self.failed = False
+        self.last_error = None
+        self._reopen_delay = REOPEN_MIN_SEC
+
+    def _storage_failed(self, action: str, error: Exception):
+        """Drop rows until :meth:`_open` succeeds again, retried with backoff"""
+        logger.error(f"Failed to {action} {self.name} (retrying in {self._reopen_delay:.0f}s, dropping rows meanwhile): {error}")
+        if self._storage_open:
+            try:
+                self._close()
+            except Exception:
+                pass
+        self._storage_open = False
+        self.failed = True
+        self.last_error = str(error)
+        self._reopen_at = time.monotonic() + self._reopen_delay
+        self._reopen_delay = min(self._reopen_delay * 2, REOPEN_MAX_SEC)
+
+
+class BufferedCSVWriter(BufferedWriter):
+    """Append-only CSV log written by a background thread.
+
+    The writer thread keeps the file open and appends each batch with a
+    single ``writerows`` call.
+
+    The active file is rotated when it exceeds ``rotate_bytes`` or is older
+    than ``rotate_interval_sec`` (0 disables either check): it is renamed to
+    ``<stem>.<YYYYmmdd-HHMMSS><suffix>``, gzipped if ``compress`` is set, and
+    a fresh file with a header row is started.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fieldnames: Sequence[str],
+        max_rows: int = 500,
+        flush_interval_sec: float = 1.0,
+        rotate_bytes: int = 0,
+        rotate_interval_sec: float = 0,
+        compress: bool = False,
+    ):
+        super().__init__(Path(path).name, max_rows, flush_interval_sec)
+        self.path = Path(path)
+        self.fieldnames = list(fieldnames)
+        self.rotate_bytes = rotate_bytes
+        self.rotate_interval_sec = rotate_interval_sec
+        self.compress = compress
+
+        self._file = None
+        self._writer = None
+        self._opened_at = 0.0
+        self._rows_in_file = 0
+        self.rotations = 0
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, "a", newline="")
+        self._writer = csv.writer(self._file)
+        if new_file:
+            self._writer.writerow(self.fieldnames)
+            self._file.flush()
+        self._opened_at = time.time()
+        self._rows_in_file = 0
+
+    def _write_batch(self, batch: List[Sequence[Any]]):
+        self._writer.writerows(batch)
+        self._file.flush()
+        self._rows_in_file += len(batch)
+
+    def _after_flush(self):
+        if self._should_rotate():
+            self._rotate()
+
+    def _close(self):
+        self._file.close()
+
+    def _should_rotate(self) -> bool:
+        if self._rows_in_file == 0:
+            return False
+        if self.rotate_bytes > 0 and self._file.tell() >= self.rotate_bytes:
+            return True
+        return self.rotate_interval_sec > 0 and time.time() - self._opened_at >= self.rotate_interval_sec
+
+    def _rotate(self):
+        self._file.close()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        rotated = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        n = 1
+        while rotated.exists() or Path(f"{rotated}.gz").exists():
+            rotated = self.path.with_name(f"{self.path.stem}.{stamp}-{n}{self.path.suffix}")
+            n += 1
+        try:
+            os.replace(self.path, rotated)
+            if self.compress:
+                with open(rotated, "rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                rotated.unlink()
+            self.rotations += 1
+        except Exception as e:
+            logger.error(f"Failed to rotate {self.path}: {e}")
+        self._open()
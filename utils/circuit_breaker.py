@@ -0,0 +1,104 @@
+import time
+from enum import Enum
+from typing import Any, Callable, Dict
+
+
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker for one downstream service.
+
+    - closed: calls go through; ``failure_threshold`` consecutive failures open it.
+    - open: :meth:`allow` refuses every call (counted in ``shed``) until
+      ``reset_timeout_sec`` has passed, then the breaker turns half-open.
+    - half-open: up to ``half_open_max_calls`` trial calls go through. A
+      success closes the breaker, a failure opens it again. A trial whose
+      outcome never arrives is replaced after another ``reset_timeout_sec``.
+
+    Callers check :meth:`allow` before each attempt and report the outcome
+    with :meth:`record_success`, :meth:`record_failure` or, for attempts that
+    ended without a verdict on the service (e.g. cancelled), :meth:`release`.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout_sec: float = 10.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_sec = reset_timeout_sec
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.clock = clock
+        self._state = BreakerState.CLOSED
+        self._changed_at = clock()
+        self.consecutive_failures = 0
+        self._trials = 0
+        self._trial_started_at = 0.0
+        self.opened = 0
+        self.shed = 0
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state is BreakerState.OPEN and self.clock() - self._changed_at >= self.reset_timeout_sec:
+            self._set_state(BreakerState.HALF_OPEN)
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go through now"""
+        state = self.state
+        if state is BreakerState.CLOSED:
+            return True
+        if state is BreakerState.HALF_OPEN:
+            now = self.clock()
+            if self._trials >= self.half_open_max_calls and now - self._trial_started_at >= self.reset_timeout_sec:
+                self._trials = 0
+            if self._trials < self.half_open_max_calls:
+                self._trials += 1
+                self._trial_started_at = now
+                return True
+        self.shed += 1
+        return False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        if self._state is BreakerState.HALF_OPEN:
+            self._set_state(BreakerState.CLOSED)
+
+    def record_failure(self):
+        state = self.state
+        if state is BreakerState.HALF_OPEN:
+            self._open()
+        elif state is BreakerState.CLOSED:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def release(self):
+        """An allowed call ended without telling whether the service is healthy"""
+        if self._state is BreakerState.HALF_OPEN and self._trials > 0:
+            self._trials -= 1
+
+    def _open(self):
+        self.opened += 1
+        self._set_state(BreakerState.OPEN)
+
+    def _set_state(self, state: BreakerState):
+        self._state = state
+        self._changed_at = self.clock()
+        self._trials = 0
+        if state is BreakerState.CLOSED:
+            self.consecutive_failures = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "opened": self.opened,
+            "shed": self.shed,
+        }
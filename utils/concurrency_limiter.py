@@ -0,0 +1,111 @@
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict
+
+
+class AIMDLimiter:
+    """Adaptive in-flight limit using additive increase / multiplicative decrease.
+
+    Callers take a slot with :meth:`acquire` (waiting in FIFO order while
+    ``limit`` requests are in flight) and hand it back with :meth:`release`,
+    reporting whether the request went well and how long it took.
+
+    - A healthy completion (success and latency within ``latency_target_sec``)
+      raises the limit by ``1 / limit``, i.e. by about one per round of
+      ``limit`` requests, as long as at least half the limit was in use.
+    - An unhealthy one (failure, timeout or slow answer) multiplies the limit
+      by ``backoff``. Requests that were already in flight when the limit was
+      cut do not cut it again, so one slow burst costs a single decrease.
+
+    Against a node that slows down under load the limit settles around the
+    concurrency it can actually serve within the latency target, and the
+    excess waits in the queue instead of timing out at the node.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 256,
+        latency_target_sec: float = 5.0,
+        backoff: float = 0.5,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.latency_target_sec = latency_target_sec
+        self.backoff = backoff
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Bumped on every decrease; slots taken before it don't count against the new limit
+        self._epoch = 0
+        self.increases = 0
+        self.decreases = 0
+        self.completed = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> int:
+        """Wait for a free slot; returns a token to pass to :meth:`release`"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return self._epoch
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+            else:
+                # The slot was handed over just before the cancellation; pass it on
+                self.in_flight -= 1
+                self._wake()
+            raise
+        return self._epoch
+
+    def release(self, token: int, healthy: bool, latency_sec: float):
+        """Return a slot, adjusting the limit from the request's outcome"""
+        in_use = self.in_flight
+        self.in_flight -= 1
+        self.completed += 1
+        if healthy and latency_sec <= self.latency_target_sec:
+            if in_use * 2 >= self.limit and self._limit < self.max_limit:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+                self.increases += 1
+        elif token == self._epoch:
+            self._limit = max(self.min_limit, self._limit * self.backoff)
+            self._epoch += 1
+            self.decreases += 1
+        self._wake()
+
+    def release_unused(self, token: int):
+        """Return a slot that was not used for a request, leaving the limit as it is"""
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.limit:
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "completed": self.completed,
+        }
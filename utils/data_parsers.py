@@ -1,11 +1,14 @@
-import csv
 import json
 import random
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 
+import numpy as np
+
+from utils.sensor_dataset import SensorDataset
+
 
 @dataclass
 class EVSensorData:
@@ -54,52 +57,80 @@ class SalesTransactionData:
     device_id: str = "POS_001"
 
 
+# Per-field variance of generated readings, shared by the batch generators:
+# (field / CSV column, default when the dataset lacks it, +/- spread)
+EV_VARIANCE: List[Tuple[str, float, float]] = [
+    ("battery_voltage", 380.0, 5.0),
+    ("battery_current", 0.0, 2.0),
+    ("battery_temperature", 25.0, 1.0),
+    ("motor_temperature", 60.0, 3.0),
+    ("speed", 50.0, 10.0),
+    ("acceleration", 0.0, 0.5),
+    ("energy_consumption", 20.0, 2.0),
+]
+GREENHOUSE_VARIANCE: List[Tuple[str, float, float]] = [
+    ("temperature", 23.0, 1.0),
+    ("humidity", 60.0, 5.0),
+    ("soil_moisture", 50.0, 3.0),
+    ("light_intensity", 500.0, 50.0),
+    ("co2_level", 400.0, 20.0),
+    ("ph_level", 6.8, 0.2),
+]
+SALES_VARIANCE: List[Tuple[str, float, float]] = [
+    ("unit_price", 50.0, 10.0),
+]
+
+CUSTOMER_SEGMENTS = ["Small", "Medium", "Large"]
+# Sales identifiers kept as text even when a dataset's values are all digits
+SALES_TEXT_COLUMNS = ("transaction_id", "product_code", "location")
+
+
 class DataParser:
-    """Base class for parsing CSV data and generating IoT device payloads"""
+    """Base class for parsing CSV data and generating IoT device payloads
+    
+    Each dataset is parsed once into a :class:`SensorDataset` (typed numeric
+    columns, interned categorical ones); readings are sampled by indexing
+    into those columns, so no strings are parsed per reading.
+    """
     
     def __init__(self, data_dir: str = "smartcity-test/data"):
         self.data_dir = Path(data_dir)
-        self.ev_data_cache: List[Dict[str, Any]] = []
-        self.greenhouse_data_cache: List[Dict[str, Any]] = []
-        self.sales_data_cache: List[Dict[str, Any]] = []
+        self.ev_data = SensorDataset([], [])
+        self.greenhouse_data = SensorDataset([], [])
+        self.sales_data = SensorDataset([], [])
+        self._rng = np.random.default_rng()
         self._load_data()
     
     def _load_data(self):
-        """Load and cache all CSV data"""
+        """Load all CSV data into typed columns, falling back to synthetic data per missing dataset"""
         try:
             # Load EV data
             ev_file = self.data_dir / "EV_Predictive_Maintenance_Dataset_15min.csv"
             if ev_file.exists():
-                with open(ev_file, 'r') as f:
-                    reader = csv.DictReader(f)
-                    self.ev_data_cache = list(reader)
+                self.ev_data = SensorDataset.from_csv(ev_file)
             
             # Load greenhouse data
             greenhouse_file = self.data_dir / "Greenhouse Plant Growth Metrics.csv"
             if greenhouse_file.exists():
-                with open(greenhouse_file, 'r') as f:
-                    reader = csv.DictReader(f)
-                    self.greenhouse_data_cache = list(reader)
+                self.greenhouse_data = SensorDataset.from_csv(greenhouse_file)
             
             # Load sales data
             sales_file = self.data_dir / "sales_data_sample.csv"
             if sales_file.exists():
-                with open(sales_file, 'r') as f:
-                    reader = csv.DictReader(f)
-                    self.sales_data_cache = list(reader)
+                self.sales_data = SensorDataset.from_csv(sales_file, SALES_TEXT_COLUMNS)
                     
         except Exception as e:
             print(f"Warning: Could not load CSV data: {e}")
-            # Generate fallback synthetic data
-            self._generate_fallback_data()
+        
+        # Generate fallback synthetic data for anything that did not load
+        self._generate_fallback_data()
     
     def _generate_fallback_data(self):
         """Generate synthetic data if CSV files are not available"""
         # Generate synthetic EV data
-        for i in range(100):
-            timestamp = (datetime.now() - timedelta(hours=i)).isoformat()
-            self.ev_data_cache.append({
-                'timestamp': timestamp,
+        if not len(self.ev_data):
+            self.ev_data = SensorDataset.from_records([{
+                'timestamp': (datetime.now() - timedelta(hours=i)).isoformat(),
                 'battery_voltage': round(random.uniform(350, 400), 2),
                 'battery_current': round(random.uniform(-50, 50), 2),
                 'battery_temperature': round(random.uniform(20, 35), 2),
@@ -107,70 +138,64 @@ class DataParser:
                 'speed': round(random.uniform(0, 120), 2),
                 'acceleration': round(random.uniform(-3, 3), 2),
                 'energy_consumption': round(random.uniform(15, 25), 2)
-            })
+            } for i in range(100)])
         
         # Generate synthetic greenhouse data
-        for i in range(100):
-            timestamp = (datetime.now() - timedelta(hours=i)).isoformat()
-            self.greenhouse_data_cache.append({
-                'timestamp': timestamp,
+        if not len(self.greenhouse_data):
+            self.greenhouse_data = SensorDataset.from_records([{
+                'timestamp': (datetime.now() - timedelta(hours=i)).isoformat(),
                 'temperature': round(random.uniform(18, 28), 2),
                 'humidity': round(random.uniform(40, 80), 2),
                 'soil_moisture': round(random.uniform(30, 70), 2),
                 'light_intensity': round(random.uniform(200, 800), 2),
                 'co2_level': round(random.uniform(300, 500), 2),
                 'ph_level': round(random.uniform(6.0, 7.5), 2)
-            })
+            } for i in range(100)])
         
         # Generate synthetic sales data
-        for i in range(100):
-            timestamp = (datetime.now() - timedelta(hours=i)).isoformat()
-            self.sales_data_cache.append({
-                'timestamp': timestamp,
+        if not len(self.sales_data):
+            self.sales_data = SensorDataset.from_records([{
+                'timestamp': (datetime.now() - timedelta(hours=i)).isoformat(),
                 'transaction_id': f"TXN_{random.randint(10000, 99999)}",
                 'product_code': f"PROD_{random.randint(100, 999)}",
                 'quantity': random.randint(1, 10),
                 'unit_price': round(random.uniform(10, 500), 2),
                 'total_amount': round(random.uniform(10, 2000), 2)
-            })
+            } for i in range(100)], SALES_TEXT_COLUMNS)
     
     def get_random_ev_data(self, device_id: Optional[str] = None) -> EVSensorData:
         """Get random EV sensor data with realistic variance"""
-        if not self.ev_data_cache:
-            self._generate_fallback_data()
-        
-        base_data = random.choice(self.ev_data_cache)
+        data = self.ev_data
+        row = random.randrange(len(data))
         
         # Add realistic variance to the data
         return EVSensorData(
             timestamp=datetime.now().isoformat(),
-            battery_voltage=float(base_data.get('battery_voltage', 380)) + random.uniform(-5, 5),
-            battery_current=float(base_data.get('battery_current', 0)) + random.uniform(-2, 2),
-            battery_temperature=float(base_data.get('battery_temperature', 25)) + random.uniform(-1, 1),
-            motor_temperature=float(base_data.get('motor_temperature', 60)) + random.uniform(-3, 3),
-            speed=max(0, float(base_data.get('speed', 50)) + random.uniform(-10, 10)),
-            acceleration=float(base_data.get('acceleration', 0)) + random.uniform(-0.5, 0.5),
+            battery_voltage=data.number('battery_voltage', row, 380) + random.uniform(-5, 5),
+            battery_current=data.number('battery_current', row, 0) + random.uniform(-2, 2),
+            battery_temperature=data.number('battery_temperature', row, 25) + random.uniform(-1, 1),
+            motor_temperature=data.number('motor_temperature', row, 60) + random.uniform(-3, 3),
+            speed=max(0, data.number('speed', row, 50) + random.uniform(-10, 10)),
+            acceleration=data.number('acceleration', row, 0) + random.uniform(-0.5, 0.5),
             regenerative_braking=random.uniform(0, 1),
-            energy_consumption=float(base_data.get('energy_consumption', 20)) + random.uniform(-2, 2),
+            energy_consumption=data.number('energy_consumption', row, 20) + random.uniform(-2, 2),
             distance_traveled=random.uniform(0, 100),
             device_id=device_id or f"EV_{random.randint(100, 999)}"
         )
     
     def get_random_greenhouse_data(self, device_id: Optional[str] = None) -> GreenhouseSensorData:
         """Get random greenhouse sensor data with realistic variance"""
-        if not self.greenhouse_data_cache:
-            self._generate_fallback_data()
-        
-        base_data = random.choice(self.greenhouse_data_cache)
+        data = self.greenhouse_data
+        row = random.randrange(len(data))
         
         return GreenhouseSensorData(
             timestamp=datetime.now().isoformat(),
-            temperature=float(base_data.get('temperature', 23)) + random.uniform(-1, 1),
-            humidity=float(base_data.get('humidity', 60)) + random.uniform(-5, 5),
-            soil_moisture=float(base_data.get('soil_moisture', 50)) + random.uniform(-3, 3),
-            light_intensity=float(base_data.get('light_intensity', 500)) + random.uniform(-50, 50),
-            co2_level=float(base_data.get('co2_level', 400)) + random.uniform(-20, 20),
-            ph_level=float(base_data.get('ph_level', 6.8)) + random.uniform(-0.2, 0.2),
+            temperature=data.number('temperature', row, 23) + random.uniform(-1, 1),
+            humidity=data.number('humidity', row, 60) + random.uniform(-5, 5),
+            soil_moisture=data.number('soil_moisture', row, 50) + random.uniform(-3, 3),
+            light_intensity=data.number('light_intensity', row, 500) + random.uniform(-50, 50),
+            co2_level=data.number('co2_level', row, 400) + random.uniform(-20, 20),
+            ph_level=data.number('ph_level', row, 6.8) + random.uniform(-0.2, 0.2),
             nutrient_level=random.uniform(5, 15),
             plant_height=random.uniform(10, 50),
             leaf_count=random.randint(5, 25),
@@ -180,26 +205,93 @@ class DataParser:
     
     def get_random_sales_data(self, device_id: Optional[str] = None) -> SalesTransactionData:
         """Get random sales transaction data with realistic variance"""
-        if not self.sales_data_cache:
-            self._generate_fallback_data()
-        
-        base_data = random.choice(self.sales_data_cache)
+        data = self.sales_data
+        row = random.randrange(len(data))
         
         quantity = random.randint(1, 5)
-        unit_price = float(base_data.get('unit_price', 50)) + random.uniform(-10, 10)
+        unit_price = data.number('unit_price', row, 50) + random.uniform(-10, 10)
         
         return SalesTransactionData(
             timestamp=datetime.now().isoformat(),
             transaction_id=f"TXN_{random.randint(100000, 999999)}",
-            product_code=base_data.get('product_code', f"PROD_{random.randint(100, 999)}"),
+            product_code=data.text('product_code', row) or f"PROD_{random.randint(100, 999)}",
             quantity=quantity,
             unit_price=max(1, unit_price),
             total_amount=quantity * max(1, unit_price),
-            customer_segment=random.choice(['Small', 'Medium', 'Large']),
-            location=base_data.get('location', 'Unknown'),
+            customer_segment=random.choice(CUSTOMER_SEGMENTS),
+            location=data.text('location', row, 'Unknown'),
             device_id=device_id or f"POS_{random.randint(100, 999)}"
         )
     
+    # ------------------------------------------------------------------
+    # Batch generation
+    # ------------------------------------------------------------------
+    
+    def _vary(self, data: SensorDataset, rows: np.ndarray,
+              variance: List[Tuple[str, float, float]]) -> Dict[str, np.ndarray]:
+        """Sampled base rows plus uniform noise, one array per field"""
+        count = len(rows)
+        return {
+            field: data.numbers(field, default)[rows] + self._rng.uniform(-spread, spread, count)
+            for field, default, spread in variance
+        }
+    
+    @staticmethod
+    def _to_records(timestamp: str, fields: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Per-field arrays (or lists) -> one plain dict per reading"""
+        names = ["timestamp", *fields]
+        values = [value.tolist() if isinstance(value, np.ndarray) else value for value in fields.values()]
+        return [dict(zip(names, (timestamp, *row))) for row in zip(*values)]
+    
+    def get_ev_data_batch(self, count: int) -> List[Dict[str, Any]]:
+        """``count`` EV readings generated in one vectorized pass
+        
+        Same fields and variance as :meth:`get_random_ev_data` (without
+        ``device_id``), as plain dicts of Python numbers ready for
+        :meth:`to_iot_payloads`. All readings share one timestamp.
+        """
+        rows = self._rng.integers(0, len(self.ev_data), count)
+        fields = self._vary(self.ev_data, rows, EV_VARIANCE)
+        np.maximum(fields["speed"], 0, out=fields["speed"])
+        fields["regenerative_braking"] = self._rng.uniform(0, 1, count)
+        fields["distance_traveled"] = self._rng.uniform(0, 100, count)
+        return self._to_records(datetime.now().isoformat(), fields)
+    
+    def get_greenhouse_data_batch(self, count: int) -> List[Dict[str, Any]]:
+        """``count`` greenhouse readings in one vectorized pass (see :meth:`get_ev_data_batch`)"""
+        rows = self._rng.integers(0, len(self.greenhouse_data), count)
+        fields = self._vary(self.greenhouse_data, rows, GREENHOUSE_VARIANCE)
+        fields["nutrient_level"] = self._rng.uniform(5, 15, count)
+        fields["plant_height"] = self._rng.uniform(10, 50, count)
+        fields["leaf_count"] = self._rng.integers(5, 26, count)
+        fields["growth_rate"] = self._rng.uniform(0.1, 0.5, count)
+        return self._to_records(datetime.now().isoformat(), fields)
+    
+    def get_sales_data_batch(self, count: int) -> List[Dict[str, Any]]:
+        """``count`` sales transactions in one vectorized pass (see :meth:`get_ev_data_batch`)"""
+        data = self.sales_data
+        rows = self._rng.integers(0, len(data), count)
+        fields = self._vary(data, rows, SALES_VARIANCE)
+        unit_price = np.maximum(fields["unit_price"], 1)
+        quantity = self._rng.integers(1, 6, count)
+        codes = self._rng.integers(100, 1000, count).tolist()
+        return self._to_records(datetime.now().isoformat(), {
+            "transaction_id": [f"TXN_{n}" for n in self._rng.integers(100000, 1000000, count).tolist()],
+            "product_code": [
+                code or f"PROD_{n}" for code, n in zip(data.texts("product_code", rows), codes)
+            ],
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "total_amount": quantity * unit_price,
+            "customer_segment": [CUSTOMER_SEGMENTS[i] for i in self._rng.integers(0, 3, count).tolist()],
+            "location": data.texts("location", rows, "Unknown"),
+        })
+    
+    def to_iot_payloads(self, readings: Sequence[Dict[str, Any]]) -> List[str]:
+        """JSON payloads for a batch of readings (same format as :meth:`to_iot_payload`)"""
+        encode = json.JSONEncoder(sort_keys=True).encode
+        return [encode(reading) for reading in readings]
+    
     def to_iot_payload(self, sensor_data) -> str:
         """Convert sensor data to JSON payload for IoT submission"""
         if isinstance(sensor_data, (EVSensorData, GreenhouseSensorData, SalesTransactionData)):
@@ -1,10 +1,14 @@
+import asyncio
+import hashlib
 import random
 import secrets
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
 from enum import Enum
 
-from utils.data_parsers import data_parser, EVSensorData, GreenhouseSensorData, SalesTransactionData
+from config.settings import IOT_DEVICE_COUNT, IOT_DEVICE_ID_START, SHARD_INDEX, SHARD_COUNT
+from utils.data_parsers import data_parser
 
 
 class DeviceType(Enum):
@@ -14,165 +18,346 @@ class DeviceType(Enum):
     POS_TERMINAL = "pos_terminal"
 
 
-@dataclass
+# Device types in code order: (type, device id prefix, locations)
+DEVICE_TYPES = [
+    (DeviceType.EV_SENSOR, "EV", ["Downtown", "Suburb", "Highway", "Parking_Lot"]),
+    (DeviceType.GREENHOUSE, "GH", ["Farm_A", "Farm_B", "Research_Lab", "Urban_Garden"]),
+    (DeviceType.POS_TERMINAL, "POS", ["Store_1", "Store_2", "Mall", "Airport"]),
+]
+_TYPE_CODES = {prefix: code for code, (_, prefix, _) in enumerate(DEVICE_TYPES)}
+
+
 class IoTDevice:
-    """Represents an IoT device with unique identity"""
-    device_id: str
-    device_type: DeviceType
-    location: str
-    public_key: str
-    is_registered: bool = False
-    last_data_timestamp: Optional[str] = None
-    total_submissions: int = 0
-    failed_submissions: int = 0
+    """Represents an IoT device with unique identity
+
+    A live view of one row of a :class:`DeviceSimulator` fleet: attributes
+    are read from the fleet's columns, so they always reflect the latest
+    registration state and submission counters.
+    """
+    __slots__ = ("fleet", "index")
+
+    def __init__(self, fleet: "DeviceSimulator", index: int):
+        self.fleet = fleet
+        self.index = index
+
+    @property
+    def device_id(self) -> str:
+        return self.fleet._device_id(self.index)
+
+    @property
+    def device_type(self) -> DeviceType:
+        return DEVICE_TYPES[self.fleet.type_codes[self.index]][0]
+
+    @property
+    def location(self) -> str:
+        return DEVICE_TYPES[self.fleet.type_codes[self.index]][2][self.fleet.location_codes[self.index]]
+
+    @property
+    def public_key(self) -> str:
+        return self.fleet._public_key(self.index)
+
+    @property
+    def is_registered(self) -> bool:
+        return bool(self.fleet.registered_flags[self.index])
+
+    @property
+    def last_data_timestamp(self) -> Optional[str]:
+        timestamp = self.fleet.last_submission_at[self.index]
+        return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+    @property
+    def total_submissions(self) -> int:
+        return self.fleet.submissions[self.index]
+
+    @property
+    def failed_submissions(self) -> int:
+        return self.fleet.failures[self.index]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, IoTDevice) and other.fleet is self.fleet and other.index == self.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.fleet), self.index))
+
+    def __repr__(self) -> str:
+        return f"IoTDevice({self.device_id!r}, {self.device_type.value}, {self.location!r})"
 
 
 class DeviceSimulator:
-    """Manages a fleet of simulated IoT devices"""
-    
-    def __init__(self, num_devices: int = 10):
-        self.devices: Dict[str, IoTDevice] = {}
-        self.device_pool: List[str] = []
-        self._initialize_devices(num_devices)
-    
-    def _initialize_devices(self, num_devices: int):
-        """Initialize a fleet of diverse IoT devices"""
-        device_types = [
-            (DeviceType.EV_SENSOR, "EV", ["Downtown", "Suburb", "Highway", "Parking_Lot"]),
-            (DeviceType.GREENHOUSE, "GH", ["Farm_A", "Farm_B", "Research_Lab", "Urban_Garden"]),
-            (DeviceType.POS_TERMINAL, "POS", ["Store_1", "Store_2", "Mall", "Airport"])
-        ]
-        
-        devices_per_type = max(1, num_devices // len(device_types))
-        
-        for device_type, prefix, locations in device_types:
-            for i in range(devices_per_type):
-                device_id = f"{prefix}_{random.randint(1000, 9999)}"
-                location = random.choice(locations)
-                
-                device = IoTDevice(
-                    device_id=device_id,
-                    device_type=device_type,
-                    location=location,
-                    public_key=secrets.token_hex(32)
-                )
-                
-                self.devices[device_id] = device
-                self.device_pool.append(device_id)
-        
-        # Fill remaining slots with random devices
-        while len(self.devices) < num_devices:
-            device_type, prefix, locations = random.choice(device_types)
-            device_id = f"{prefix}_{random.randint(1000, 9999)}"
-            
-            if device_id not in self.devices:
-                device = IoTDevice(
-                    device_id=device_id,
-                    device_type=device_type,
-                    location=random.choice(locations),
-                    public_key=secrets.token_hex(32)
-                )
-                self.devices[device_id] = device
-                self.device_pool.append(device_id)
-    
-    def get_random_device(self) -> IoTDevice:
-        """Get a random device from the fleet"""
-        device_id = random.choice(self.device_pool)
-        return self.devices[device_id]
-    
+    """Manages a fleet of simulated IoT devices
+
+    The fleet is stored column-wise (struct of arrays): one byte each for
+    device type and location, typed arrays for the submission counters and
+    last submission time, and no per-device objects, so a million devices
+    take ~30 MB. Device ids are derived from the row index and public keys
+    from a per-run secret, so neither is stored. Registered and unregistered
+    rows are kept in two index arrays (with each row's position, for O(1)
+    swap-removal), which makes picking a random device to register or to
+    submit data O(1); fleet totals are maintained as counters.
+    """
+
+    def __init__(self, num_devices: int = 10, shard_index: int = 0, shard_count: int = 1,
+                 id_start: int = IOT_DEVICE_ID_START):
+        """Create the fleet.
+
+        With ``shard_count > 1`` this process simulates only its share of
+        ``num_devices``: the first ``num_devices % shard_count`` shards get one
+        device more than the rest, so the shards add up to exactly
+        ``num_devices`` (a shard may be empty if there are fewer devices than
+        shards). Row ``i`` of shard ``s`` gets device number
+        ``id_start + i * shard_count + s``, so device ids never collide,
+        within a shard or across shard processes. Types continue one
+        round-robin across the shards, so the whole fleet has a device of
+        each type once ``num_devices`` reaches the number of types.
+        """
+        self.shard_index = shard_index
+        self.shard_count = max(1, shard_count)
+        self.id_start = id_start
+        self._key_secret = secrets.token_bytes(16)
+        base, extra = divmod(max(0, num_devices), self.shard_count)
+        # Devices in the shards before this one, where its round-robin resumes
+        first_type = shard_index * base + min(shard_index, extra)
+        self._initialize_devices(base + (shard_index < extra), first_type)
+
+    def _initialize_devices(self, num_devices: int, first_type: int = 0):
+        """Initialize a fleet of diverse IoT devices (types round-robin from ``first_type``, random locations)"""
+        type_count = len(DEVICE_TYPES)
+        self.type_codes = bytearray((first_type + i) % type_count for i in range(num_devices))
+        self.location_codes = bytearray(
+            random.randrange(len(DEVICE_TYPES[code][2])) for code in self.type_codes
+        )
+        self.registered_flags = bytearray(num_devices)
+        self.submissions = array("I", bytes(4 * num_devices))
+        self.failures = array("I", bytes(4 * num_devices))
+        self.last_submission_at = array("d", bytes(8 * num_devices))
+        # Row indices of each set, and each row's position within its set
+        self._unregistered = array("i", range(num_devices))
+        self._registered = array("i")
+        self._position = array("i", range(num_devices))
+
+        self.total_submissions = 0
+        self.total_failures = 0
+        self.device_type_counts: Dict[str, int] = {
+            device_type.value: self.type_codes.count(code) for code, (device_type, _, _) in enumerate(DEVICE_TYPES)
+        }
+
+    def __len__(self) -> int:
+        return len(self.type_codes)
+
+    # ------------------------------------------------------------------
+    # Row <-> id
+    # ------------------------------------------------------------------
+
+    def _device_id(self, index: int) -> str:
+        prefix = DEVICE_TYPES[self.type_codes[index]][1]
+        return f"{prefix}_{self.id_start + index * self.shard_count + self.shard_index}"
+
+    def _index_of(self, device_id: str) -> Optional[int]:
+        prefix, _, number = device_id.rpartition("_")
+        if not number.isdigit():
+            return None
+        index, shard = divmod(int(number) - self.id_start, self.shard_count)
+        if shard != self.shard_index or not 0 <= index < len(self.type_codes):
+            return None
+        if _TYPE_CODES.get(prefix) != self.type_codes[index]:
+            return None
+        return index
+
+    def _public_key(self, index: int) -> str:
+        return hashlib.blake2b(index.to_bytes(8, "little"), key=self._key_secret, digest_size=32).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Lookup & sampling
+    # ------------------------------------------------------------------
+
+    def get_random_device(self) -> Optional[IoTDevice]:
+        """Get a random device from the fleet (None if this shard has no devices)"""
+        return IoTDevice(self, random.randrange(len(self.type_codes))) if self.type_codes else None
+
     def get_device_by_id(self, device_id: str) -> Optional[IoTDevice]:
         """Get a specific device by ID"""
-        return self.devices.get(device_id)
-    
+        index = self._index_of(device_id)
+        return IoTDevice(self, index) if index is not None else None
+
     def get_unregistered_devices(self) -> List[IoTDevice]:
-        """Get list of devices that haven't been registered yet"""
-        return [device for device in self.devices.values() if not device.is_registered]
-    
+        """Get list of devices that haven't been registered yet (O(n); prefer the sampling methods)"""
+        return [IoTDevice(self, index) for index in self._unregistered]
+
     def get_registered_devices(self) -> List[IoTDevice]:
-        """Get list of registered devices"""
-        return [device for device in self.devices.values() if device.is_registered]
-    
+        """Get list of registered devices (O(n); prefer the sampling methods)"""
+        return [IoTDevice(self, index) for index in self._registered]
+
+    def get_device_for_registration(self) -> Optional[IoTDevice]:
+        """Get a device that needs registration"""
+        unregistered = self._unregistered
+        return IoTDevice(self, unregistered[random.randrange(len(unregistered))]) if unregistered else None
+
+    def get_device_for_data_submission(self) -> Optional[IoTDevice]:
+        """Get a registered device for data submission"""
+        registered = self._registered
+        return IoTDevice(self, registered[random.randrange(len(registered))]) if registered else None
+
+    # ------------------------------------------------------------------
+    # State updates
+    # ------------------------------------------------------------------
+
     def mark_device_registered(self, device_id: str) -> bool:
         """Mark a device as registered"""
-        if device_id in self.devices:
-            self.devices[device_id].is_registered = True
-            return True
-        return False
-    
+        index = self._index_of(device_id)
+        if index is None:
+            return False
+        if not self.registered_flags[index]:
+            self.registered_flags[index] = 1
+            # Swap-remove from the unregistered set, append to the registered one
+            position = self._position[index]
+            last = self._unregistered.pop()
+            if last != index:
+                self._unregistered[position] = last
+                self._position[last] = position
+            self._position[index] = len(self._registered)
+            self._registered.append(index)
+        return True
+
     def generate_sensor_data(self, device: IoTDevice) -> Tuple[str, str]:
         """Generate sensor data for a specific device
-        
+
         Returns:
             Tuple of (device_id, json_payload)
         """
-        if device.device_type == DeviceType.EV_SENSOR:
-            sensor_data = data_parser.get_random_ev_data(device.device_id)
-        elif device.device_type == DeviceType.GREENHOUSE:
-            sensor_data = data_parser.get_random_greenhouse_data(device.device_id)
-        elif device.device_type == DeviceType.POS_TERMINAL:
-            sensor_data = data_parser.get_random_sales_data(device.device_id)
+        device_id = device.device_id
+        device_type = device.device_type
+        if device_type == DeviceType.EV_SENSOR:
+            sensor_data = data_parser.get_random_ev_data(device_id)
+        elif device_type == DeviceType.GREENHOUSE:
+            sensor_data = data_parser.get_random_greenhouse_data(device_id)
+        elif device_type == DeviceType.POS_TERMINAL:
+            sensor_data = data_parser.get_random_sales_data(device_id)
         else:
             # Fallback to EV data
-            sensor_data = data_parser.get_random_ev_data(device.device_id)
-        
+            sensor_data = data_parser.get_random_ev_data(device_id)
+
         payload = data_parser.to_iot_payload(sensor_data)
-        return device.device_id, payload
-    
-    def update_device_stats(self, device_id: str, success: bool, timestamp: str):
-        """Update device statistics after data submission"""
-        if device_id in self.devices:
-            device = self.devices[device_id]
-            device.total_submissions += 1
-            device.last_data_timestamp = timestamp
-            
-            if not success:
-                device.failed_submissions += 1
-    
+        return device_id, payload
+
+    def generate_sensor_data_batch(self, devices: Sequence[IoTDevice]) -> List[Tuple[str, str]]:
+        """Sensor data for many devices at once, generated per device type in one vectorized pass
+
+        Returns:
+            List of (device_id, json_payload), in the order of ``devices``
+        """
+        generators = {
+            DeviceType.EV_SENSOR: data_parser.get_ev_data_batch,
+            DeviceType.GREENHOUSE: data_parser.get_greenhouse_data_batch,
+            DeviceType.POS_TERMINAL: data_parser.get_sales_data_batch,
+        }
+        by_type: Dict[DeviceType, List[int]] = {}
+        for position, device in enumerate(devices):
+            by_type.setdefault(device.device_type, []).append(position)
+
+        result: List[Optional[Tuple[str, str]]] = [None] * len(devices)
+        for device_type, positions in by_type.items():
+            readings = generators.get(device_type, data_parser.get_ev_data_batch)(len(positions))
+            for position, payload in zip(positions, data_parser.to_iot_payloads(readings)):
+                result[position] = (devices[position].device_id, payload)
+        return result
+
+    def update_device_stats(self, device_id: str, success: bool, timestamp: float):
+        """Update device statistics after data submission (``timestamp``: unix seconds)"""
+        index = self._index_of(device_id)
+        if index is None:
+            return
+        self.submissions[index] += 1
+        self.total_submissions += 1
+        self.last_submission_at[index] = timestamp
+        if not success:
+            self.failures[index] += 1
+            self.total_failures += 1
+
+    # ------------------------------------------------------------------
+    # Statistics
+    # ------------------------------------------------------------------
+
     def get_device_success_rate(self, device_id: str) -> float:
         """Get success rate for a specific device"""
-        device = self.devices.get(device_id)
-        if not device or device.total_submissions == 0:
+        index = self._index_of(device_id)
+        if index is None or self.submissions[index] == 0:
             return 0.0
-        
-        success_count = device.total_submissions - device.failed_submissions
-        return success_count / device.total_submissions
-    
+
+        return (self.submissions[index] - self.failures[index]) / self.submissions[index]
+
     def get_fleet_stats(self) -> Dict[str, any]:
-        """Get overall fleet statistics"""
-        total_devices = len(self.devices)
-        registered_devices = len(self.get_registered_devices())
-        total_submissions = sum(device.total_submissions for device in self.devices.values())
-        total_failures = sum(device.failed_submissions for device in self.devices.values())
-        
+        """Get overall fleet statistics (O(1), from running totals)"""
+        total_devices = len(self.type_codes)
+        registered_devices = len(self._registered)
+
         success_rate = 0.0
-        if total_submissions > 0:
-            success_rate = (total_submissions - total_failures) / total_submissions
-        
-        device_type_counts = {}
-        for device in self.devices.values():
-            device_type = device.device_type.value
-            device_type_counts[device_type] = device_type_counts.get(device_type, 0) + 1
-        
+        if self.total_submissions > 0:
+            success_rate = (self.total_submissions - self.total_failures) / self.total_submissions
+
         return {
             "total_devices": total_devices,
             "registered_devices": registered_devices,
             "registration_rate": registered_devices / total_devices if total_devices > 0 else 0,
-            "total_submissions": total_submissions,
-            "total_failures": total_failures,
+            "total_submissions": self.total_submissions,
+            "total_failures": self.total_failures,
             "success_rate": success_rate,
-            "device_types": device_type_counts
+            "device_types": dict(self.device_type_counts)
+        }
+
+
+class SensorDataBatcher:
+    """Generates the payloads of concurrent submissions together
+
+    :meth:`generate` queues its device and waits; the queue is turned into
+    payloads by one :meth:`DeviceSimulator.generate_sensor_data_batch` call
+    on the next event-loop iteration. Every submission the load scheduler
+    starts in one tick is therefore generated in a single vectorized pass
+    rather than one reading at a time.
+    """
+
+    def __init__(self, simulator: DeviceSimulator):
+        self.simulator = simulator
+        self._pending: List[Tuple[IoTDevice, asyncio.Future]] = []
+        self.batches = 0
+        self.generated = 0
+
+    async def generate(self, device: IoTDevice) -> Tuple[str, str]:
+        """Sensor data for ``device``, generated with the other devices queued this tick
+
+        Returns:
+            Tuple of (device_id, json_payload)
+        """
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            loop.call_soon(self._generate_pending)
+        future = loop.create_future()
+        self._pending.append((device, future))
+        return await future
+
+    def _generate_pending(self):
+        pending, self._pending = self._pending, []
+        try:
+            results = self.simulator.generate_sensor_data_batch([device for device, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.generated += len(pending)
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict[str, any]:
+        """Batches generated and their average size"""
+        return {
+            "batches": self.batches,
+            "generated": self.generated,
+            "avg_batch_size": round(self.generated / self.batches, 2) if self.batches else 0.0,
         }
-    
-    def get_device_for_registration(self) -> Optional[IoTDevice]:
-        """Get a device that needs registration"""
-        unregistered = self.get_unregistered_devices()
-        return random.choice(unregistered) if unregistered else None
-    
-    def get_device_for_data_submission(self) -> Optional[IoTDevice]:
-        """Get a registered device for data submission"""
-        registered = self.get_registered_devices()
-        return random.choice(registered) if registered else None
 
 
 # Global device simulator instance
-device_simulator = DeviceSimulator(num_devices=15) 
\ No newline at end of file
+device_simulator = DeviceSimulator(num_devices=IOT_DEVICE_COUNT, shard_index=SHARD_INDEX, shard_count=SHARD_COUNT)
+sensor_data_batcher = SensorDataBatcher(device_simulator)
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from config.settings import (
+    web3_async,
+    FIXED_GAS_PRICE_WEI,
+    FEE_MODE,
+    FEE_ORACLE_TTL_SEC,
+    FEE_PRIORITY_PERCENTILE,
+)
+from utils.receipt_tracker import receipt_tracker
+
+# Number of recent blocks sampled by eth_feeHistory for the priority fee
+FEE_HISTORY_BLOCKS = 5
+
+
+def max_fee_per_gas(fee_params: Dict[str, int]) -> int:
+    """Worst-case price per gas for a transaction built with ``fee_params``"""
+    if "maxFeePerGas" in fee_params:
+        return fee_params["maxFeePerGas"]
+    return fee_params["gasPrice"]
+
+
+class FeeOracle:
+    """Shared, cached source of transaction fee parameters.
+
+    Fee data is fetched at most once per ``ttl`` seconds and is invalidated
+    whenever the receipt tracker sees a new block; concurrent callers share a
+    single in-flight refresh. In EIP-1559 mode the base fee of each new block
+    is taken straight from the block the tracker already fetched, so a new
+    head does not cost an extra RPC call.
+
+    Modes:
+        legacy  – ``gasPrice`` from ``eth_gasPrice``
+        eip1559 – ``maxFeePerGas`` / ``maxPriorityFeePerGas`` from ``eth_feeHistory``
+        auto    – eip1559 if the chain reports a base fee, legacy otherwise
+    """
+
+    def __init__(
+        self,
+        w3=web3_async,
+        mode: str = FEE_MODE,
+        ttl: float = FEE_ORACLE_TTL_SEC,
+        priority_percentile: float = FEE_PRIORITY_PERCENTILE,
+        fixed_gas_price: int = FIXED_GAS_PRICE_WEI,
+    ):
+        self.w3 = w3
+        self.mode = mode.lower()
+        self.ttl = ttl
+        self.priority_percentile = priority_percentile
+        self.fixed_gas_price = fixed_gas_price
+
+        self._params: Optional[Dict[str, int]] = None
+        self._fetched_at = 0.0
+        self._updated_at = 0.0
+        self._invalidated = False
+        self._refresh_lock = asyncio.Lock()
+        self._priority_fee: Optional[int] = None
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.head_updates = 0
+        # Fleet-wide stats reported instead of the local ones (sharded launcher)
+        self._fleet_stats: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def get_fee_params(self) -> Dict[str, int]:
+        """Return fee fields ready to merge into a transaction dict"""
+        if self.fixed_gas_price > 0:
+            self.hits += 1
+            return {"gasPrice": self.fixed_gas_price}
+
+        if self._is_fresh():
+            self.hits += 1
+            return dict(self._params)  # type: ignore[arg-type]
+
+        async with self._refresh_lock:
+            # Another waiter may have refreshed while we queued for the lock
+            if self._is_fresh():
+                self.hits += 1
+            else:
+                self.misses += 1
+                await self._refresh()
+        return dict(self._params)  # type: ignore[arg-type]
+
+    def on_new_head(self, block: Any):
+        """Head listener: update the base fee in place or drop the cached value"""
+        self.head_updates += 1
+        base_fee = block.get("baseFeePerGas") if hasattr(block, "get") else None
+        if (
+            self._params is not None
+            and "maxFeePerGas" in self._params
+            and base_fee is not None
+            and self._priority_fee is not None
+        ):
+            # Priority fee stays until the TTL forces a full fee-history refresh
+            self._params = self._eip1559_params(base_fee, self._priority_fee)
+            self._updated_at = time.time()
+        else:
+            self._invalidated = True
+
+    @property
+    def staleness_sec(self) -> Optional[float]:
+        """Age of the cached fee data, or None before the first fetch"""
+        if self._params is None:
+            return None
+        return time.time() - self._updated_at
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache statistics for monitoring"""
+        if self._fleet_stats is not None:
+            return dict(self._fleet_stats)
+        staleness = self.staleness_sec
+        return {
+            "mode": self.mode,
+            "params": dict(self._params) if self._params else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "head_updates": self.head_updates,
+            "staleness_sec": round(staleness, 3) if staleness is not None else None,
+        }
+
+    def set_fleet_stats(self, stats: Dict[str, Any]):
+        """Report these stats instead of the local ones (sharded launcher)"""
+        self._fleet_stats = stats
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._params is not None
+            and not self._invalidated
+            and time.time() - self._fetched_at < self.ttl
+        )
+
+    @staticmethod
+    def _eip1559_params(base_fee: int, priority_fee: int) -> Dict[str, int]:
+        # 2x base fee leaves headroom for several consecutive full blocks
+        return {
+            "maxFeePerGas": 2 * base_fee + priority_fee,
+            "maxPriorityFeePerGas": priority_fee,
+        }
+
+    async def _refresh(self):
+        try:
+            if self.mode == "legacy":
+                params = {"gasPrice": await self.w3.eth.gas_price}
+            else:
+                params = await self._fetch_eip1559()
+                if params is None:
+                    if self.mode == "eip1559":
+                        raise ValueError("chain reports no base fee; EIP-1559 fees unavailable")
+                    self.mode = "legacy"
+                    params = {"gasPrice": await self.w3.eth.gas_price}
+        except Exception as e:
+            self.refresh_errors += 1
+            if self._params is None:
+                raise
+            # Keep serving the last known value rather than failing every send
+            logging.warning(f"Fee oracle refresh failed, reusing cached fees: {e}")
+            self._fetched_at = time.time()
+            self._invalidated = False
+            return
+
+        self._params = params
+        self._fetched_at = self._updated_at = time.time()
+        self._invalidated = False
+        self.refreshes += 1
+
+    async def _fetch_eip1559(self) -> Optional[Dict[str, int]]:
+        history = await self.w3.eth.fee_history(FEE_HISTORY_BLOCKS, "latest", [self.priority_percentile])
+        base_fees = history.get("baseFeePerGas") or []
+        if not base_fees or base_fees[-1] is None:
+            return None
+
+        rewards = sorted(r[0] for r in history.get("reward") or [] if r)
+        priority_fee = rewards[len(rewards) // 2] if rewards else 0
+        self._priority_fee = priority_fee
+        # The last baseFeePerGas entry is the base fee of the next block
+        return self._eip1559_params(base_fees[-1], priority_fee)
+
+
+# Global fee oracle instance, refreshed on every block the receipt tracker sees
+fee_oracle = FeeOracle()
+receipt_tracker.add_head_listener(fee_oracle.on_new_head)
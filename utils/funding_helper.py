@@ -3,9 +3,11 @@ import time
 from typing import List, Dict, Any
 from web3 import Web3
 
-from config.settings import web3_http as w3, DEFAULT_GAS_LIMIT, DEFAULT_FUNDING_AMOUNT_ETH
+from config.settings import web3_async as w3, DEFAULT_GAS_LIMIT, DEFAULT_FUNDING_AMOUNT_ETH
 from utils.wallet_manager import wallet_manager, WalletType, ManagedWallet
-from utils.tx_builder import build_base_tx
+from utils.tx_builder import build_base_tx, submit_raw_tx
+from utils.receipt_tracker import receipt_tracker
+from utils.signing_pool import signing_pool
 
 
 class FundingHelper:
@@ -31,7 +33,7 @@ class FundingHelper:
         print(f"💰 Amount per wallet: {amount_per_wallet_eth} ETH")
         
         # Check funder balance
-        funder_balance_wei = self.w3.eth.get_balance(funder_address)
+        funder_balance_wei = await self.w3.eth.get_balance(funder_address)
         funder_balance_eth = self.w3.from_wei(funder_balance_wei, 'ether')
         
         print(f"💳 Funder balance: {funder_balance_eth} ETH")
@@ -50,67 +52,17 @@ class FundingHelper:
                 "error": f"Insufficient funds. Need {total_needed_eth + estimated_gas_cost_eth} ETH, have {funder_balance_eth} ETH"
             }
         
-        # Fund each wallet
-        results = []
-        successful_transfers = 0
-        failed_transfers = 0
-        
-        for wallet in wallet_manager.wallets.values():
-            try:
-                print(f"💸 Funding {wallet.label} ({wallet.address})...")
-                
-                # Build transaction
-                GAS_LIMIT_ETH_TRANSFER = 21_000
-
-                tx = await build_base_tx(funder_address)
-                tx.update({
-                    "to": wallet.address,
-                    "value": self.w3.to_wei(amount_per_wallet_eth, 'ether'),
-                    "gas": GAS_LIMIT_ETH_TRANSFER,
-                })
-                
-                # Sign and send
-                signed_tx = self.w3.eth.account.sign_transaction(tx, funder_private_key)
-                tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-                
-                # Wait for confirmation
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
-                
-                if receipt.status == 1:
-                    successful_transfers += 1
-                    print(f"✅ Success: {wallet.label} funded with {amount_per_wallet_eth} ETH")
-                    results.append({
-                        "wallet": wallet.label,
-                        "address": wallet.address,
-                        "success": True,
-                        "tx_hash": receipt.transactionHash.hex(),
-                        "amount_eth": amount_per_wallet_eth
-                    })
-                else:
-                    failed_transfers += 1
-                    print(f"❌ Failed: {wallet.label} transaction reverted")
-                    results.append({
-                        "wallet": wallet.label,
-                        "address": wallet.address,
-                        "success": False,
-                        "error": "Transaction reverted"
-                    })
-                
-                # Small delay between transactions
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                failed_transfers += 1
-                print(f"❌ Error funding {wallet.label}: {e}")
-                results.append({
-                    "wallet": wallet.label,
-                    "address": wallet.address,
-                    "success": False,
-                    "error": str(e)
-                })
+        # Fund every wallet concurrently; the nonce manager pipelines up to
+        # MAX_PENDING_TX_PER_WALLET transfers from the funder at a time.
+        results = await asyncio.gather(*(
+            self._fund_wallet(wallet, funder_address, funder_private_key, amount_per_wallet_eth)
+            for wallet in list(wallet_manager.wallets.values())
+        ))
+        successful_transfers = sum(1 for r in results if r["success"])
+        failed_transfers = len(results) - successful_transfers
         
         # Update all wallet balances
-        wallet_manager.update_all_balances()
+        await wallet_manager.refresh_all_balances()
         
         summary = {
             "success": True,
@@ -129,6 +81,62 @@ class FundingHelper:
         
         return summary
     
+    async def _fund_wallet(self, wallet: ManagedWallet, funder_address: str, funder_private_key: str, amount_per_wallet_eth: float) -> Dict[str, Any]:
+        """Send one funding transfer and wait for it to be mined"""
+        try:
+            print(f"💸 Funding {wallet.label} ({wallet.address})...")
+            
+            # Build transaction
+            GAS_LIMIT_ETH_TRANSFER = 21_000
+
+            tx = await build_base_tx(funder_address)
+            nonce = tx["nonce"]
+            tx.update({
+                "to": wallet.address,
+                "value": self.w3.to_wei(amount_per_wallet_eth, 'ether'),
+                "gas": GAS_LIMIT_ETH_TRANSFER,
+            })
+            
+            # Sign and send
+            try:
+                raw_tx, _ = await signing_pool.sign(tx, funder_private_key)
+            except BaseException:
+                wallet_manager.nonce_manager.discard(funder_address, nonce)
+                raise
+            tx_hash = await submit_raw_tx(funder_address, nonce, raw_tx)
+            
+            # Wait for confirmation
+            try:
+                receipt, _ = await receipt_tracker.wait_for_receipt(tx_hash, timeout=60)
+            finally:
+                wallet_manager.nonce_manager.confirm(funder_address, nonce)
+            
+            if receipt.status == 1:
+                print(f"✅ Success: {wallet.label} funded with {amount_per_wallet_eth} ETH")
+                return {
+                    "wallet": wallet.label,
+                    "address": wallet.address,
+                    "success": True,
+                    "tx_hash": receipt.transactionHash.hex(),
+                    "amount_eth": amount_per_wallet_eth
+                }
+            print(f"❌ Failed: {wallet.label} transaction reverted")
+            return {
+                "wallet": wallet.label,
+                "address": wallet.address,
+                "success": False,
+                "error": "Transaction reverted"
+            }
+            
+        except Exception as e:
+            print(f"❌ Error funding {wallet.label}: {e}")
+            return {
+                "wallet": wallet.label,
+                "address": wallet.address,
+                "success": False,
+                "error": str(e)
+            }
+    
     def generate_funding_addresses_list(self) -> List[str]:
         """Generate a list of all wallet addresses for manual funding"""
         addresses = []
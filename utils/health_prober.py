@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from config.settings import (
+    HEALTH_PROBE_INTERVAL_SEC,
+    HEALTH_PROBE_TIMEOUT_SEC,
+    HEALTH_PROBE_FAILURE_THRESHOLD,
+    HEALTH_PROBE_HISTORY,
+    web3_async,
+)
+from utils.latency_histogram import LatencyHistogram
+from utils.lcore_client import lcore_client
+
+
+class TargetHealth:
+    """Cached health of one dependency, updated by :class:`HealthProber`"""
+
+    def __init__(self, name: str, probe: Callable[[], Awaitable[Any]], history: int):
+        self.name = name
+        self.probe = probe
+        # None until the first probe has finished
+        self.healthy: Optional[bool] = None
+        self.consecutive_failures = 0
+        self.last_checked: Optional[float] = None
+        self.last_latency_sec: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.changed_at = time.time()
+        self.probes = 0
+        self.failures = 0
+        self.latency = LatencyHistogram()
+        # (unix time, latency seconds, ok) of the latest probes
+        self.history: Deque[Tuple[float, float, bool]] = deque(maxlen=history)
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "since": self.changed_at,
+            "last_checked": self.last_checked,
+            "last_latency_sec": round(self.last_latency_sec, 4) if self.last_latency_sec is not None else None,
+            "last_error": self.last_error,
+            "consecutive_failures": self.consecutive_failures,
+            "probes": self.probes,
+            "failures": self.failures,
+            "latency": self.latency.get_summary(),
+            "history": [[round(t, 3), round(latency, 4), ok] for t, latency, ok in self.history],
+        }
+
+
+class HealthProber:
+    """Probes every dependency on a fixed interval and caches the result.
+
+    One background task (:meth:`run_forever`) calls each target's probe every
+    ``interval_sec``, so request volume against the dependencies does not
+    grow with the load, and callers read the cached state with
+    :meth:`is_healthy` / :meth:`is_available` in O(1) instead of making a
+    round trip. A probe fails if it raises, returns ``False`` or takes longer
+    than ``timeout_sec``; a target turns unhealthy after
+    ``failure_threshold`` consecutive failures and healthy again on the
+    first success. Probe latencies are kept in a histogram and the last
+    ``history`` samples.
+    """
+
+    def __init__(
+        self,
+        interval_sec: float = HEALTH_PROBE_INTERVAL_SEC,
+        timeout_sec: float = HEALTH_PROBE_TIMEOUT_SEC,
+        failure_threshold: int = HEALTH_PROBE_FAILURE_THRESHOLD,
+        history: int = HEALTH_PROBE_HISTORY,
+    ):
+        self.interval_sec = interval_sec
+        self.timeout_sec = timeout_sec
+        self.failure_threshold = max(1, failure_threshold)
+        self.history = history
+        self.targets: Dict[str, TargetHealth] = {}
+
+    def add_target(self, name: str, probe: Callable[[], Awaitable[Any]]):
+        """Register ``probe()``, an async call that succeeds while ``name`` is up"""
+        self.targets[name] = TargetHealth(name, probe, self.history)
+
+    def is_healthy(self, name: str) -> bool:
+        """Last known health of ``name``; False until it has been probed"""
+        return self.targets[name].healthy is True
+
+    def is_available(self, name: str) -> bool:
+        """Like :meth:`is_healthy`, but optimistic before the first probe (for pausing load)"""
+        return self.targets[name].healthy is not False
+
+    def dependency_check(self, *names: str) -> Callable[[], bool]:
+        """``check()`` that is False while any of ``names`` is down (for ``OpenLoopScheduler.is_available``)"""
+        return lambda: all(self.is_available(name) for name in names)
+
+    def all_healthy(self) -> bool:
+        return all(target.healthy is True for target in self.targets.values())
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: target.get_status() for name, target in self.targets.items()}
+
+    async def probe_all(self):
+        """Probe every target once, concurrently"""
+        await asyncio.gather(*(self._probe(target) for target in self.targets.values()))
+
+    async def run_forever(self):
+        while True:
+            started = time.monotonic()
+            await self.probe_all()
+            await asyncio.sleep(max(0.0, self.interval_sec - (time.monotonic() - started)))
+
+    async def _probe(self, target: TargetHealth):
+        start = time.monotonic()
+        error = None
+        try:
+            if await asyncio.wait_for(target.probe(), self.timeout_sec) is False:
+                error = "probe returned failure"
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout_sec}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        latency = time.monotonic() - start
+
+        target.probes += 1
+        target.last_checked = time.time()
+        target.last_latency_sec = latency
+        target.last_error = error
+        target.latency.record(latency)
+        target.history.append((target.last_checked, latency, error is None))
+        if error is None:
+            target.consecutive_failures = 0
+            healthy = True
+        else:
+            target.failures += 1
+            target.consecutive_failures += 1
+            healthy = False if target.consecutive_failures >= self.failure_threshold else target.healthy
+        if healthy != target.healthy:
+            if healthy is False:
+                logging.warning(f"{target.name} is DOWN: {error}")
+            elif target.healthy is False:
+                logging.info(f"{target.name} is back UP")
+            target.healthy = healthy
+            target.changed_at = target.last_checked
+
+
+async def _probe_rpc() -> int:
+    return await web3_async.eth.block_number
+
+
+# Global prober for lcore-node (/status) and the chain RPC endpoint (eth_blockNumber)
+health_prober = HealthProber()
+health_prober.add_target("lcore_node", lcore_client.health_check)
+health_prober.add_target("rpc", _probe_rpc)
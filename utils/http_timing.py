@@ -0,0 +1,113 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import aiohttp
+
+# Client-side phases, in request order
+PHASES = ("queued", "dns", "connect", "send", "wait", "body")
+
+
+@dataclass
+class RequestTiming:
+    """Timestamps of one HTTP request, filled in by :func:`create_trace_config`.
+
+    Pass an instance as ``trace_request_ctx`` of a session request, then call
+    :meth:`body_read` once the body has been consumed.
+    """
+    started: Optional[float] = None
+    queued_start: Optional[float] = None
+    queued_end: Optional[float] = None
+    dns_start: Optional[float] = None
+    dns_end: Optional[float] = None
+    connect_start: Optional[float] = None
+    connect_end: Optional[float] = None
+    connection_reused: bool = False
+    sent: Optional[float] = None
+    headers_received: Optional[float] = None
+    body_done: Optional[float] = None
+    # Durations (seconds) reported by the server in its Server-Timing header
+    server_timing: Dict[str, float] = field(default_factory=dict)
+
+    def body_read(self, response: aiohttp.ClientResponse):
+        """Mark the body as read and pick up the response's Server-Timing header"""
+        self.body_done = time.perf_counter()
+        header = response.headers.get("Server-Timing")
+        if header:
+            self.server_timing = parse_server_timing(header)
+
+    def phases(self) -> Dict[str, float]:
+        """Duration (seconds) of each client-side phase that took place"""
+        result: Dict[str, float] = {}
+        if self.queued_start is not None and self.queued_end is not None:
+            result["queued"] = self.queued_end - self.queued_start
+        dns = 0.0
+        if self.dns_start is not None and self.dns_end is not None:
+            dns = result["dns"] = self.dns_end - self.dns_start
+        if self.connect_start is not None and self.connect_end is not None:
+            # aiohttp resolves the host inside connection setup
+            result["connect"] = max(0.0, self.connect_end - self.connect_start - dns)
+        ready = self.connect_end or self.queued_end or self.started
+        if self.sent is not None and ready is not None:
+            result["send"] = max(0.0, self.sent - ready)
+        if self.headers_received is not None:
+            result["wait"] = self.headers_received - (self.sent or ready)
+            if self.body_done is not None:
+                result["body"] = self.body_done - self.headers_received
+        return result
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Parse ``Server-Timing`` into {metric name: seconds} (entries without ``dur`` are skipped)
+
+    e.g. ``encryption;dur=12.5, on_chain;desc="commit";dur=840`` →
+    ``{"encryption": 0.0125, "on_chain": 0.84}``
+    """
+    result: Dict[str, float] = {}
+    for entry in header.split(","):
+        parts = [p.strip() for p in entry.split(";")]
+        name = parts[0]
+        if not name:
+            continue
+        for param in parts[1:]:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "dur":
+                try:
+                    result[name] = float(value.strip().strip('"')) / 1000
+                except ValueError:
+                    pass
+                break
+    return result
+
+
+def create_trace_config() -> aiohttp.TraceConfig:
+    """Trace hooks that record phase timestamps into the request's :class:`RequestTiming`"""
+
+    def hook(setter):
+        async def on_signal(session, ctx, params):
+            timing = ctx.trace_request_ctx
+            if isinstance(timing, RequestTiming):
+                setter(timing, time.perf_counter())
+        return on_signal
+
+    def set_attr(name):
+        return hook(lambda timing, now: setattr(timing, name, now))
+
+    def set_reused(timing: RequestTiming, now: float):
+        timing.connection_reused = True
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(set_attr("started"))
+    trace_config.on_connection_queued_start.append(set_attr("queued_start"))
+    trace_config.on_connection_queued_end.append(set_attr("queued_end"))
+    trace_config.on_dns_resolvehost_start.append(set_attr("dns_start"))
+    trace_config.on_dns_resolvehost_end.append(set_attr("dns_end"))
+    trace_config.on_connection_create_start.append(set_attr("connect_start"))
+    trace_config.on_connection_create_end.append(set_attr("connect_end"))
+    trace_config.on_connection_reuseconn.append(hook(set_reused))
+    # Headers and body chunks; the last one marks the end of sending
+    trace_config.on_request_headers_sent.append(set_attr("sent"))
+    trace_config.on_request_chunk_sent.append(set_attr("sent"))
+    # Fired once the response status line and headers have been read
+    trace_config.on_request_end.append(set_attr("headers_received"))
+    return trace_config
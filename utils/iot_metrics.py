@@ -1,57 +1,65 @@
-import csv
+import atexit
 import os
 import time
 from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime
 
+from config.settings import (
+    IOT_METRICS_SINK,
+    IOT_METRICS_DB,
+    METRICS_FLUSH_ROWS,
+    METRICS_FLUSH_SEC,
+    METRICS_ROTATE_MB,
+    METRICS_ROTATE_SEC,
+    METRICS_COMPRESS,
+    ROLLING_WINDOWS_SEC,
+    SHARD_INDEX,
+    SHARD_COUNT,
+)
+from utils.buffered_writer import BufferedCSVWriter
 from utils.device_simulator import IoTDevice, DeviceType
+from utils.iot_store import IoTMetricsStore, IOT_METRIC_COLUMNS, DEVICE_STATS_COLUMNS
+from utils.latency_histogram import LatencyHistogram
+from utils.rolling_window import RollingStats, summarize_window
 
 
 LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 
-IOT_METRICS_FILE = LOG_DIR / "iot_metrics.csv"
-DEVICE_STATS_FILE = LOG_DIR / "device_stats.csv"
-
-# Ensure IoT metrics CSV header
-if not IOT_METRICS_FILE.exists():
-    with open(IOT_METRICS_FILE, "w", newline="") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "timestamp",
-                "device_id",
-                "device_type",
-                "operation",  # "registration" or "data_submission"
-                "success",
-                "latency_sec",
-                "pipeline_stage",  # "lcore_api", "encryption", "on_chain"
-                "tx_hash",
-                "error_details",
-                "data_size_bytes"
-            ],
-        )
-        writer.writeheader()
-
-# Ensure device stats CSV header
-if not DEVICE_STATS_FILE.exists():
-    with open(DEVICE_STATS_FILE, "w", newline="") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "timestamp",
-                "device_id",
-                "device_type",
-                "location",
-                "is_registered",
-                "total_submissions",
-                "failed_submissions",
-                "success_rate",
-                "last_submission_timestamp"
-            ],
-        )
-        writer.writeheader()
+_SHARD_SUFFIX = "" if SHARD_COUNT == 1 else f".shard{SHARD_INDEX}"
+IOT_METRICS_FILE = LOG_DIR / f"iot_metrics{_SHARD_SUFFIX}.csv"
+DEVICE_STATS_FILE = LOG_DIR / f"device_stats{_SHARD_SUFFIX}.csv"
+
+
+def _csv_writer(path: Path, fieldnames) -> BufferedCSVWriter:
+    writer = BufferedCSVWriter(
+        path,
+        fieldnames=fieldnames,
+        max_rows=METRICS_FLUSH_ROWS,
+        flush_interval_sec=METRICS_FLUSH_SEC,
+        rotate_bytes=int(METRICS_ROTATE_MB * 1024 * 1024),
+        rotate_interval_sec=METRICS_ROTATE_SEC,
+        compress=METRICS_COMPRESS,
+    )
+    atexit.register(writer.close)
+    return writer
+
+
+# Sinks selected by IOT_METRICS_SINK; the SQLite store is shared by all shards
+# and can be exported back to the CSV layout with iot_metrics_store.export_csv()
+iot_metrics_store: Optional[IoTMetricsStore] = None
+iot_metrics_writer: Optional[BufferedCSVWriter] = None
+device_stats_writer: Optional[BufferedCSVWriter] = None
+
+if IOT_METRICS_SINK in ("sqlite", "both"):
+    iot_metrics_store = IoTMetricsStore(
+        Path(IOT_METRICS_DB), max_rows=METRICS_FLUSH_ROWS, flush_interval_sec=METRICS_FLUSH_SEC
+    )
+    atexit.register(iot_metrics_store.close)
+if IOT_METRICS_SINK in ("csv", "both"):
+    iot_metrics_writer = _csv_writer(IOT_METRICS_FILE, IOT_METRIC_COLUMNS)
+    device_stats_writer = _csv_writer(DEVICE_STATS_FILE, DEVICE_STATS_COLUMNS)
 
 
 def log_iot_metric(
@@ -64,7 +72,7 @@ def log_iot_metric(
     error_details: str = "",
     data_size_bytes: int = 0
 ):
-    """Log IoT-specific metrics to CSV file
+    """Log IoT-specific metrics to the configured sink(s)
     
     Args:
         device: IoTDevice that performed the operation
@@ -76,34 +84,34 @@ def log_iot_metric(
         error_details: Error message if failed
         data_size_bytes: Size of data payload
     """
-    with open(IOT_METRICS_FILE, "a", newline="") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "timestamp",
-                "device_id",
-                "device_type",
-                "operation",
-                "success",
-                "latency_sec",
-                "pipeline_stage",
-                "tx_hash",
-                "error_details",
-                "data_size_bytes"
-            ],
-        )
-        writer.writerow({
-            "timestamp": datetime.now().isoformat(),
+    now = time.time()
+    latency_sec = round(latency_sec, 3)
+    if iot_metrics_store is not None:
+        iot_metrics_store.add_metric({
+            "timestamp": now,
             "device_id": device.device_id,
             "device_type": device.device_type.value,
             "operation": operation,
-            "success": success,
-            "latency_sec": round(latency_sec, 3),
+            "success": int(success),
+            "latency_sec": latency_sec,
             "pipeline_stage": pipeline_stage,
             "tx_hash": tx_hash,
             "error_details": error_details,
-            "data_size_bytes": data_size_bytes
+            "data_size_bytes": data_size_bytes,
         })
+    if iot_metrics_writer is not None:
+        iot_metrics_writer.write((
+            datetime.fromtimestamp(now).isoformat(),
+            device.device_id,
+            device.device_type.value,
+            operation,
+            success,
+            latency_sec,
+            pipeline_stage,
+            tx_hash,
+            error_details,
+            data_size_bytes,
+        ))
 
 
 def log_device_stats(device: IoTDevice):
@@ -117,37 +125,61 @@ def log_device_stats(device: IoTDevice):
         success_count = device.total_submissions - device.failed_submissions
         success_rate = success_count / device.total_submissions
     
-    with open(DEVICE_STATS_FILE, "a", newline="") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "timestamp",
-                "device_id",
-                "device_type",
-                "location",
-                "is_registered",
-                "total_submissions",
-                "failed_submissions",
-                "success_rate",
-                "last_submission_timestamp"
-            ],
-        )
-        writer.writerow({
-            "timestamp": datetime.now().isoformat(),
+    now = time.time()
+    if iot_metrics_store is not None:
+        iot_metrics_store.add_device_stats({
+            "timestamp": now,
             "device_id": device.device_id,
             "device_type": device.device_type.value,
             "location": device.location,
-            "is_registered": device.is_registered,
+            "is_registered": int(device.is_registered),
             "total_submissions": device.total_submissions,
             "failed_submissions": device.failed_submissions,
             "success_rate": round(success_rate, 3),
-            "last_submission_timestamp": device.last_data_timestamp or ""
+            "last_submission_timestamp": device.last_data_timestamp or "",
         })
+    if device_stats_writer is not None:
+        device_stats_writer.write((
+            datetime.fromtimestamp(now).isoformat(),
+            device.device_id,
+            device.device_type.value,
+            device.location,
+            device.is_registered,
+            device.total_submissions,
+            device.failed_submissions,
+            round(success_rate, 3),
+            device.last_data_timestamp or "",
+        ))
+
+
+def close_iot_metrics_log():
+    """Flush queued IoT records and stop the writer threads"""
+    for sink in (iot_metrics_store, iot_metrics_writer, device_stats_writer):
+        if sink is not None:
+            sink.close()
 
 
 class IoTMetricsTracker:
     """Track and analyze IoT pipeline performance metrics"""
     
+    COUNTER_FIELDS = (
+        "total_operations",
+        "successful_operations",
+        "total_latency",
+        "registration_count",
+        "data_submission_count",
+        "on_chain_commitments",
+    )
+    
+    # Operations with a latency histogram (IoT pipeline and dApp workloads)
+    LATENCY_OPERATIONS = (
+        "registration",
+        "data_submission",
+        "payment_app",
+        "merchant_app",
+        "lending_app",
+    )
+    
     def __init__(self):
         self.start_time = time.time()
         self.total_operations = 0
@@ -156,6 +188,13 @@ class IoTMetricsTracker:
         self.registration_count = 0
         self.data_submission_count = 0
         self.on_chain_commitments = 0
+        self.latency_histograms: Dict[str, LatencyHistogram] = {
+            operation: LatencyHistogram() for operation in self.LATENCY_OPERATIONS
+        }
+        self.rolling: Dict[str, RollingStats] = {
+            operation: RollingStats(ROLLING_WINDOWS_SEC) for operation in self.LATENCY_OPERATIONS
+        }
+        self._fleet_rolling: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None
         
         # Performance targets
         self.target_daily_entries = 500
@@ -174,12 +213,69 @@ class IoTMetricsTracker:
             self.registration_count += 1
         elif operation_type == "data_submission":
             self.data_submission_count += 1
+        self.record_result(operation_type, success, latency_sec)
+    
+    def record_result(self, operation: str, success: bool, latency_sec: Optional[float]):
+        """Feed the latency histogram and rolling windows of ``operation``
+        
+        ``latency_sec`` is None for attempts that failed before doing any work
+        (they count against the success rate but carry no latency).
+        """
+        stats = self.rolling.get(operation)
+        if stats is None:
+            stats = self.rolling[operation] = RollingStats(ROLLING_WINDOWS_SEC)
+        stats.record(success, latency_sec)
+        if latency_sec is None:
+            return
+        histogram = self.latency_histograms.get(operation)
+        if histogram is None:
+            histogram = self.latency_histograms[operation] = LatencyHistogram()
+        histogram.record(latency_sec)
     
     def record_on_chain_commitment(self, success: bool):
         """Record an on-chain commitment"""
         if success:
             self.on_chain_commitments += 1
     
+    def get_counters(self) -> Dict[str, Any]:
+        """Raw counters, as exchanged between shard processes"""
+        return {name: getattr(self, name) for name in self.COUNTER_FIELDS}
+    
+    def set_counters(self, counters: Dict[str, Any]):
+        """Overwrite the raw counters (used by the sharded launcher for fleet totals)"""
+        for name in self.COUNTER_FIELDS:
+            setattr(self, name, counters.get(name, 0))
+    
+    def get_latency_histograms(self) -> Dict[str, Dict[str, Any]]:
+        """Latency histograms in their compact form, as exchanged between shard processes"""
+        return {operation: h.to_dict() for operation, h in self.latency_histograms.items()}
+    
+    def set_latency_histograms(self, histograms: Dict[str, Dict[str, Any]]):
+        """Replace the latency histograms (used by the sharded launcher for fleet totals)"""
+        for operation, data in histograms.items():
+            self.latency_histograms[operation] = LatencyHistogram.from_dict(data)
+    
+    def get_rolling_counters(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Raw rolling-window counters per operation, as exchanged between shard processes"""
+        if self._fleet_rolling is not None:
+            return self._fleet_rolling
+        return {operation: stats.get_counters() for operation, stats in self.rolling.items()}
+    
+    def set_rolling_counters(self, counters: Dict[str, Dict[str, Dict[str, Any]]]):
+        """Report these rolling-window counters instead of the local ones (sharded launcher)"""
+        self._fleet_rolling = counters
+    
+    def get_rolling_metrics(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """ops/sec, success rate and latency per operation over each rolling window"""
+        return {
+            operation: {label: summarize_window(c) for label, c in windows.items()}
+            for operation, windows in self.get_rolling_counters().items()
+        }
+    
+    def get_latency_percentiles(self) -> Dict[str, Dict[str, Any]]:
+        """p50/p90/p99/p99.9/max latency per operation"""
+        return {operation: h.get_summary() for operation, h in self.latency_histograms.items()}
+    
     def get_current_metrics(self) -> Dict[str, Any]:
         """Get current performance metrics"""
         runtime_hours = (time.time() - self.start_time) / 3600
@@ -207,6 +303,8 @@ class IoTMetricsTracker:
             "data_submissions": self.data_submission_count,
             "on_chain_commitments": self.on_chain_commitments,
             "daily_submission_rate": round(daily_rate, 1),
+            "latency_percentiles": self.get_latency_percentiles(),
+            "rolling": self.get_rolling_metrics(),
             
             # Target comparisons
             "meets_success_target": success_rate >= self.target_success_rate,
@@ -235,6 +333,21 @@ class IoTMetricsTracker:
         print(f"Device Registrations: {metrics['registrations']}")
         print(f"Data Submissions: {metrics['data_submissions']}")
         print(f"On-Chain Commitments: {metrics['on_chain_commitments']}")
+        for operation, latency in metrics["latency_percentiles"].items():
+            if latency["count"]:
+                print(
+                    f"Latency {operation}: p50 {latency['p50_sec']:.2f}s | p90 {latency['p90_sec']:.2f}s | "
+                    f"p99 {latency['p99_sec']:.2f}s | p99.9 {latency['p99_9_sec']:.2f}s | max {latency['max_sec']:.2f}s"
+                )
+        for operation, windows in metrics["rolling"].items():
+            if not windows:
+                continue
+            label, window = next(iter(windows.items()))
+            if window["count"]:
+                print(
+                    f"Last {label} {operation}: {window['ops_per_sec']:.2f} ops/s | "
+                    f"success {window['success_rate']:.1%} | avg latency {window['avg_latency_sec']:.2f}s"
+                )
         print("="*60)
 
 
@@ -0,0 +1,247 @@
+import csv
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from utils.buffered_writer import BufferedWriter
+
+TimeArg = Union[float, datetime, None]
+
+IOT_METRIC_COLUMNS = (
+    "timestamp",
+    "device_id",
+    "device_type",
+    "operation",
+    "success",
+    "latency_sec",
+    "pipeline_stage",
+    "tx_hash",
+    "error_details",
+    "data_size_bytes",
+)
+
+DEVICE_STATS_COLUMNS = (
+    "timestamp",
+    "device_id",
+    "device_type",
+    "location",
+    "is_registered",
+    "total_submissions",
+    "failed_submissions",
+    "success_rate",
+    "last_submission_timestamp",
+)
+
+# ``timestamp`` is stored as unix seconds so range filters use the indexes
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS iot_metrics (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    device_id TEXT NOT NULL,
+    device_type TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    latency_sec REAL NOT NULL,
+    pipeline_stage TEXT,
+    tx_hash TEXT,
+    error_details TEXT,
+    data_size_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_iot_metrics_device_time ON iot_metrics (device_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_iot_metrics_operation_time ON iot_metrics (operation, timestamp);
+CREATE INDEX IF NOT EXISTS idx_iot_metrics_time ON iot_metrics (timestamp);
+
+CREATE TABLE IF NOT EXISTS device_stats (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    device_id TEXT NOT NULL,
+    device_type TEXT NOT NULL,
+    location TEXT,
+    is_registered INTEGER NOT NULL,
+    total_submissions INTEGER NOT NULL,
+    failed_submissions INTEGER NOT NULL,
+    success_rate REAL NOT NULL,
+    last_submission_timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_device_stats_device_time ON device_stats (device_id, timestamp);
+"""
+
+_INSERT_METRIC = f"INSERT INTO iot_metrics ({', '.join(IOT_METRIC_COLUMNS)}) VALUES ({', '.join('?' * len(IOT_METRIC_COLUMNS))})"
+_INSERT_DEVICE_STATS = f"INSERT INTO device_stats ({', '.join(DEVICE_STATS_COLUMNS)}) VALUES ({', '.join('?' * len(DEVICE_STATS_COLUMNS))})"
+
+
+def _to_epoch(value: TimeArg) -> Optional[float]:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=5.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class IoTMetricsStore(BufferedWriter):
+    """Embedded SQLite store for IoT pipeline records.
+
+    Records are queued by :meth:`add_metric` / :meth:`add_device_stats` and
+    inserted by the writer thread, one transaction per batch. The database
+    runs in WAL mode, so queries (on a per-thread read connection) never wait
+    for the writer, and shard processes can share one file. Indexes on
+    ``(device_id, timestamp)``, ``(operation, timestamp)`` and ``timestamp``
+    serve the per-device and time-range helpers below without table scans.
+    """
+
+    def __init__(self, path: Path, max_rows: int = 500, flush_interval_sec: float = 1.0):
+        super().__init__(Path(path).name, max_rows, flush_interval_sec)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._local = threading.local()
+
+        conn = _connect(self.path)
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def add_metric(self, record: Dict[str, Any]):
+        """Queue one pipeline record (keys as in IOT_METRIC_COLUMNS, timestamp in unix seconds)"""
+        self.write((_INSERT_METRIC, tuple(record[c] for c in IOT_METRIC_COLUMNS)))
+
+    def add_device_stats(self, record: Dict[str, Any]):
+        """Queue one device statistics snapshot (keys as in DEVICE_STATS_COLUMNS)"""
+        self.write((_INSERT_DEVICE_STATS, tuple(record[c] for c in DEVICE_STATS_COLUMNS)))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def query_metrics(
+        self,
+        device_id: Optional[str] = None,
+        operation: Optional[str] = None,
+        since: TimeArg = None,
+        until: TimeArg = None,
+        limit: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """Pipeline records matching the filters, newest first"""
+        where, params = self._filters(device_id, operation, since, until)
+        rows = self._read(
+            f"SELECT {', '.join(IOT_METRIC_COLUMNS)} FROM iot_metrics{where} ORDER BY timestamp DESC LIMIT ?",
+            params + [limit],
+        )
+        return [dict(zip(IOT_METRIC_COLUMNS, row)) for row in rows]
+
+    def latency_stats(
+        self,
+        device_id: Optional[str] = None,
+        operation: Optional[str] = None,
+        since: TimeArg = None,
+        until: TimeArg = None,
+    ) -> Dict[str, Any]:
+        """Count, success rate and latency figures over the matching records,
+
+        e.g. ``latency_stats(device_id="EV_1234", since=time.time() - 3600)``.
+        """
+        where, params = self._filters(device_id, operation, since, until)
+        count, successes, avg_latency, min_latency, max_latency = self._read(
+            f"SELECT COUNT(*), SUM(success), AVG(latency_sec), MIN(latency_sec), MAX(latency_sec) FROM iot_metrics{where}",
+            params,
+        )[0]
+        return {
+            "count": count,
+            "success_rate": round((successes or 0) / count, 4) if count else 0.0,
+            "avg_latency_sec": round(avg_latency or 0.0, 4),
+            "min_latency_sec": round(min_latency or 0.0, 4),
+            "max_latency_sec": round(max_latency or 0.0, 4),
+        }
+
+    def device_summary(self, since: TimeArg = None, until: TimeArg = None) -> List[Dict[str, Any]]:
+        """Per-device operation count, success rate and average latency"""
+        where, params = self._filters(None, None, since, until)
+        rows = self._read(
+            f"SELECT device_id, device_type, COUNT(*), SUM(success), AVG(latency_sec), MAX(timestamp) "
+            f"FROM iot_metrics{where} GROUP BY device_id ORDER BY device_id",
+            params,
+        )
+        return [
+            {
+                "device_id": device_id,
+                "device_type": device_type,
+                "operations": count,
+                "success_rate": round(successes / count, 4) if count else 0.0,
+                "avg_latency_sec": round(avg_latency, 4),
+                "last_seen": datetime.fromtimestamp(last_seen).isoformat(),
+            }
+            for device_id, device_type, count, successes, avg_latency, last_seen in rows
+        ]
+
+    def export_csv(self, path: Path, since: TimeArg = None, until: TimeArg = None) -> int:
+        """Write the matching pipeline records to ``path`` in the iot_metrics.csv layout.
+
+        Returns:
+            Number of rows written
+        """
+        where, params = self._filters(None, None, since, until)
+        conn = self._reader()
+        cursor = conn.execute(
+            f"SELECT {', '.join(IOT_METRIC_COLUMNS)} FROM iot_metrics{where} ORDER BY timestamp", params
+        )
+        written = 0
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(IOT_METRIC_COLUMNS)
+            for row in cursor:
+                writer.writerow((datetime.fromtimestamp(row[0]).isoformat(), *row[1:4], bool(row[4]), *row[5:]))
+                written += 1
+        return written
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _filters(device_id: Optional[str], operation: Optional[str], since: TimeArg, until: TimeArg) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if device_id is not None:
+            clauses.append("device_id = ?")
+            params.append(device_id)
+        if operation is not None:
+            clauses.append("operation = ?")
+            params.append(operation)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_to_epoch(since))
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(_to_epoch(until))
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = _connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    def _read(self, sql: str, params: List[Any]) -> List[Tuple]:
+        return self._reader().execute(sql, params).fetchall()
+
+    def _open(self):
+        self._conn = _connect(self.path)
+
+    def _write_batch(self, batch: List[Tuple[str, Tuple]]):
+        with self._conn:
+            for sql in (_INSERT_METRIC, _INSERT_DEVICE_STATS):
+                rows = [row for statement, row in batch if statement == sql]
+                if rows:
+                    self._conn.executemany(sql, rows)
+
+    def _close(self):
+        self._conn.close()
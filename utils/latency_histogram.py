@@ -0,0 +1,158 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence
+
+# Each power-of-two range of microseconds is split into SUB_BUCKET_HALF linear
+# sub-buckets, so a bucket is at most 1/64 (~1.6%) of its value wide.
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_HALF = 1 << (SUB_BUCKET_BITS - 1)
+
+# Samples above this are clamped into the top bucket (max is still exact)
+MAX_TRACKABLE_SEC = 3600.0
+
+# Bounds (seconds) whose "at or below" counts are kept exactly, for the
+# Prometheus ``le`` buckets; the log buckets straddle round values like 0.5s
+EXACT_BOUNDS_SEC = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+_EXACT_BOUND_INDEX = {bound: i for i, bound in enumerate(EXACT_BOUNDS_SEC)}
+
+REPORTED_PERCENTILES = (
+    ("p50_sec", 50.0),
+    ("p90_sec", 90.0),
+    ("p99_sec", 99.0),
+    ("p99_9_sec", 99.9),
+)
+
+
+def _bucket_index(micros: int) -> int:
+    shift = max(0, micros.bit_length() - SUB_BUCKET_BITS)
+    return shift * SUB_BUCKET_HALF + (micros >> shift)
+
+
+def _bucket_midpoint(index: int) -> float:
+    """Middle of bucket ``index`` in microseconds"""
+    shift = max(0, index // SUB_BUCKET_HALF - 1)
+    lower = (index - shift * SUB_BUCKET_HALF) << shift
+    return lower + ((1 << shift) - 1) / 2
+
+
+_MAX_INDEX = _bucket_index(int(MAX_TRACKABLE_SEC * 1_000_000))
+
+
+class LatencyHistogram:
+    """Fixed-memory, log-bucketed latency histogram (HDR-style).
+
+    Samples are counted in microsecond buckets whose width grows with the
+    value, giving ~1% relative precision from 1µs to ``MAX_TRACKABLE_SEC``
+    with a fixed array of ~1.7k counters. :meth:`record` is O(1) and keeps
+    no samples; percentiles are computed by walking the buckets when read.
+    Count, sum, min and max are tracked exactly, and so are the counts at or
+    below each of ``EXACT_BOUNDS_SEC``.
+    """
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (_MAX_INDEX + 1)
+        # bound_counts[i]: samples in (EXACT_BOUNDS_SEC[i - 1], EXACT_BOUNDS_SEC[i]]
+        self.bound_counts: List[int] = [0] * (len(EXACT_BOUNDS_SEC) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def record(self, latency_sec: float):
+        """Add one sample (seconds)"""
+        if latency_sec < 0:
+            latency_sec = 0.0
+        micros = int(min(latency_sec, MAX_TRACKABLE_SEC) * 1_000_000)
+        self.counts[_bucket_index(micros)] += 1
+        self.bound_counts[bisect_left(EXACT_BOUNDS_SEC, latency_sec)] += 1
+        if self.count == 0 or latency_sec < self.min:
+            self.min = latency_sec
+        if latency_sec > self.max:
+            self.max = latency_sec
+        self.count += 1
+        self.total += latency_sec
+
+    def percentile(self, pct: float) -> float:
+        """Latency (seconds) at or below which ``pct`` percent of samples fall (0.0 if empty)"""
+        if self.count == 0:
+            return 0.0
+        if pct >= 100:
+            return self.max
+        rank = max(1, -(-self.count * pct // 100))  # ceil, nearest-rank
+        seen = 0
+        for index, n in enumerate(self.counts):
+            if n:
+                seen += n
+                if seen >= rank:
+                    value = _bucket_midpoint(index) / 1_000_000
+                    return min(max(value, self.min), self.max)
+        return self.max
+
+    def cumulative_counts(self, bounds_sec: Sequence[float]) -> List[int]:
+        """Number of samples at or below each of the ascending ``bounds_sec``
+
+        Exact if every bound is one of ``EXACT_BOUNDS_SEC``. Otherwise only
+        buckets lying entirely below a bound are counted, so the result may
+        fall short by the samples in the bucket the bound splits, but never
+        counts a sample above the bound.
+        """
+        if all(bound in _EXACT_BOUND_INDEX for bound in bounds_sec):
+            return [sum(self.bound_counts[:_EXACT_BOUND_INDEX[bound] + 1]) for bound in bounds_sec]
+        result: List[int] = []
+        seen = 0
+        start = 0
+        for bound in bounds_sec:
+            # The bucket holding the bound itself may also hold larger samples
+            limit = _bucket_index(int(min(bound, MAX_TRACKABLE_SEC) * 1_000_000))
+            if limit > start:
+                seen += sum(self.counts[start:limit])
+                start = limit
+            result.append(seen)
+        return result
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Count, mean and reported percentiles (seconds)"""
+        summary: Dict[str, Any] = {
+            "count": self.count,
+            "avg_sec": round(self.total / self.count, 4) if self.count else 0.0,
+        }
+        for name, pct in REPORTED_PERCENTILES:
+            summary[name] = round(self.percentile(pct), 4)
+        summary["max_sec"] = round(self.max, 4)
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact (sparse) form, as exchanged between shard processes"""
+        return {
+            "buckets": {index: n for index, n in enumerate(self.counts) if n},
+            "bound_counts": self.bound_counts,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls()
+        for index, n in data["buckets"].items():
+            histogram.counts[int(index)] = n
+        histogram.bound_counts = list(data["bound_counts"])
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add ``other``'s samples to this histogram"""
+        if other.count == 0:
+            return
+        for index, n in enumerate(other.counts):
+            if n:
+                self.counts[index] += n
+        for index, n in enumerate(other.bound_counts):
+            self.bound_counts[index] += n
+        self.min = other.min if self.count == 0 else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
@@ -1,13 +1,48 @@
 import asyncio
 import aiohttp
 import json
+import random
 import time
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime
 import logging
 
+from utils.circuit_breaker import BreakerState, CircuitBreaker
+from utils.concurrency_limiter import AIMDLimiter
 from utils.device_simulator import IoTDevice
-from config.settings import LCORE_NODE_URL, LCORE_NODE_TIMEOUT, LCORE_NODE_MAX_RETRIES
+from utils.http_timing import RequestTiming, create_trace_config
+from utils.latency_histogram import LatencyHistogram
+from utils.retry_budget import RetryBudget
+from config.settings import (
+    LCORE_NODE_URL,
+    LCORE_NODE_TIMEOUT,
+    LCORE_NODE_MAX_RETRIES,
+    LCORE_BATCH_ENABLED,
+    LCORE_BATCH_MAX_ITEMS,
+    LCORE_BATCH_MAX_BYTES,
+    LCORE_BATCH_LINGER_MS,
+    LCORE_BATCH_PATH,
+    LCORE_LIMIT_ENABLED,
+    LCORE_LIMIT_INITIAL,
+    LCORE_LIMIT_MIN,
+    LCORE_LIMIT_MAX,
+    LCORE_LIMIT_LATENCY_TARGET_MS,
+    LCORE_LIMIT_BACKOFF,
+    LCORE_BREAKER_FAILURE_THRESHOLD,
+    LCORE_BREAKER_RESET_SEC,
+    LCORE_BREAKER_HALF_OPEN_CALLS,
+    LCORE_RETRY_BUDGET_RATIO,
+    LCORE_RETRY_MIN_PER_SEC,
+    LCORE_RETRY_BASE_MS,
+    LCORE_RETRY_MAX_BACKOFF_MS,
+)
+
+# Rough JSON overhead of one batch item besides its device id and data
+BATCH_ITEM_OVERHEAD_BYTES = 64
+
+
+def _circuit_open() -> Tuple[bool, Dict[str, Any]]:
+    return False, {"error": "circuit_open", "details": "lcore-node circuit breaker is open"}
 
 
 class LcoreClientError(Exception):
@@ -16,72 +51,204 @@ class LcoreClientError(Exception):
 
 
 class LcoreClient:
-    """HTTP client for lcore-node MVP API endpoints"""
+    """HTTP client for lcore-node MVP API endpoints
     
-    def __init__(self, base_url: str = "http://127.0.0.1:3000", timeout: int = 30, max_retries: int = 3):
+    With ``batch_enabled``, concurrent :meth:`submit_device_data` calls are
+    queued and sent together as one ``POST batch_path`` with body
+    ``{"items": [<submission>, ...]}``. The endpoint answers
+    ``{"results": [{"success": ..., "message": ...}, ...]}`` in item order, so
+    every caller still gets its own result; latency includes the time spent
+    waiting for the batch. A batch is sent once ``batch_max_items`` items or
+    about ``batch_max_bytes`` of payload are queued, or ``batch_linger_sec``
+    after the first item. If the endpoint does not exist (HTTP 404), batching
+    is switched off and queued items are sent one by one.
+    
+    ``limiter`` (an :class:`AIMDLimiter`, or None to disable) caps the number
+    of device requests (registrations, submissions, batches) in flight, and
+    adapts the cap to how lcore-node copes. ``breaker`` (a
+    :class:`CircuitBreaker`) makes device requests fail fast while lcore-node
+    is down, and ``retry_budget`` (a :class:`RetryBudget`) bounds how many
+    retries all callers together may add. ``/status`` (the health probe) is
+    a single direct request that bypasses all of them and is never retried.
+    """
+    
+    def __init__(
+        self,
+        base_url: str = "http://127.0.0.1:3000",
+        timeout: int = 30,
+        max_retries: int = 3,
+        batch_enabled: bool = False,
+        batch_max_items: int = 50,
+        batch_max_bytes: int = 256 * 1024,
+        batch_linger_sec: float = 0.01,
+        batch_path: str = "/device/data/batch",
+        limiter: Optional[AIMDLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        retry_base_sec: float = 0.1,
+        retry_max_backoff_sec: float = 2.0,
+    ):
         self.base_url = base_url.rstrip('/')
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         self.max_retries = max_retries
         self.session: Optional[aiohttp.ClientSession] = None
         
+        self.limiter = limiter
+        self.breaker = breaker
+        self.retry_budget = retry_budget
+        self.retry_base_sec = retry_base_sec
+        self.retry_max_backoff_sec = retry_max_backoff_sec
+        
+        self.batch_enabled = batch_enabled
+        self.batch_max_items = max(1, batch_max_items)
+        self.batch_max_bytes = batch_max_bytes
+        self.batch_linger_sec = batch_linger_sec
+        self.batch_path = batch_path
+        self._batch: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._batch_bytes = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._senders: Set[asyncio.Task] = set()
+        self.batches_sent = 0
+        self.batched_items = 0
+        # Per-phase timing of every request attempt, keyed by (endpoint, phase).
+        # Phases are the client-side ones from utils.http_timing plus
+        # "server:<name>" for durations lcore-node reports via Server-Timing.
+        self.phase_histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        # Fleet-wide limiter and breaker stats reported instead of the local ones (sharded launcher)
+        self._fleet_limiter: Optional[Dict[str, Any]] = None
+        self._fleet_breaker: Optional[Dict[str, Any]] = None
+        
     async def _get_session(self) -> aiohttp.ClientSession:
         """Get or create HTTP session"""
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(timeout=self.timeout)
+            self.session = aiohttp.ClientSession(timeout=self.timeout, trace_configs=[create_trace_config()])
         return self.session
     
+    def _record_timing(self, endpoint: str, timing: RequestTiming):
+        phases = timing.phases()
+        phases.update({f"server:{name}": duration for name, duration in timing.server_timing.items()})
+        for phase, duration in phases.items():
+            histogram = self.phase_histograms.get((endpoint, phase))
+            if histogram is None:
+                histogram = self.phase_histograms[(endpoint, phase)] = LatencyHistogram()
+            histogram.record(duration)
+    
+    def get_phase_stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Latency percentiles per endpoint and request phase"""
+        stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (endpoint, phase), histogram in list(self.phase_histograms.items()):
+            stats.setdefault(endpoint, {})[phase] = histogram.get_summary()
+        return stats
+    
+    def get_phase_histograms(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Phase histograms in their compact form, as exchanged between shard processes"""
+        return {key: h.to_dict() for key, h in self.phase_histograms.items()}
+    
+    def set_phase_histograms(self, histograms: Dict[Tuple[str, str], Dict[str, Any]]):
+        """Replace the phase histograms (used by the sharded launcher for fleet totals)"""
+        self.phase_histograms = {key: LatencyHistogram.from_dict(data) for key, data in histograms.items()}
+    
     async def close(self):
-        """Close the HTTP session"""
+        """Send any queued batch, then close the HTTP session"""
+        self._flush_batch()
+        if self._senders:
+            await asyncio.gather(*self._senders, return_exceptions=True)
         if self.session and not self.session.closed:
             await self.session.close()
     
-    async def _make_request(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Tuple[bool, Dict[str, Any]]:
+    @staticmethod
+    async def _read_body(response: aiohttp.ClientResponse) -> Dict[str, Any]:
+        """JSON body of ``response``; non-JSON bodies (e.g. a bare 404) are wrapped as {"body": text}"""
+        text = await response.text()
+        if not text:
+            return {}
+        try:
+            return json.loads(text)
+        except ValueError:
+            return {"body": text}
+    
+    async def _make_request(self, method: str, endpoint: str,
+                            data: Optional[Dict[str, Any]] = None) -> Tuple[bool, Dict[str, Any]]:
         """Make HTTP request with retry logic
         
+        Requests fail fast with ``circuit_open`` while :attr:`breaker` is
+        open, and take a slot from :attr:`limiter` for each attempt.
+        Connection errors, timeouts, 5xx and 429 are
+        retried after a jittered exponential backoff (spent without a
+        limiter slot) if :attr:`retry_budget` allows; other errors are not.
+        
         Returns:
             Tuple of (success: bool, response_data: dict)
         """
         url = f"{self.base_url}{endpoint}"
+        breaker = self.breaker
+        limiter = self.limiter
+        if self.retry_budget:
+            self.retry_budget.deposit()
+        result: Tuple[bool, Dict[str, Any]] = (False, {"error": "max_retries_exceeded"})
         
         for attempt in range(self.max_retries):
+            if attempt > 0:
+                if self.retry_budget and not self.retry_budget.try_withdraw():
+                    return result
+                await asyncio.sleep(self._retry_backoff(attempt))
+            # Fail fast while open instead of queueing for a limiter slot
+            if breaker and breaker.state is BreakerState.OPEN and not breaker.allow():
+                return _circuit_open()
+            
+            token = await limiter.acquire() if limiter else None
+            # allow() may hand out a half-open trial slot, which only the
+            # finally below returns: take it after the last await before the try
+            if breaker and not breaker.allow():
+                if token is not None:
+                    limiter.release_unused(token)
+                return _circuit_open()
+            
+            timing = RequestTiming()
+            started = time.monotonic()
+            # Whether lcore-node answered like a node that is up and not overloaded; None = no verdict
+            healthy: Optional[bool] = None
             try:
                 session = await self._get_session()
-                
-                if method.upper() == "POST":
-                    async with session.post(url, json=data, headers={'Content-Type': 'application/json'}) as response:
-                        response_data = await response.json()
-                        
-                        if 200 <= response.status < 300:
-                            return True, response_data
-                        else:
-                            logging.warning(f"lcore-node API error: {response.status} - {response_data}")
-                            if attempt == self.max_retries - 1:
-                                return False, {"error": f"HTTP {response.status}", "details": response_data}
-                
-                elif method.upper() == "GET":
-                    async with session.get(url) as response:
-                        response_data = await response.json()
-                        
-                        if 200 <= response.status < 300:
-                            return True, response_data
-                        else:
-                            logging.warning(f"lcore-node API error: {response.status} - {response_data}")
-                            if attempt == self.max_retries - 1:
-                                return False, {"error": f"HTTP {response.status}", "details": response_data}
-                
-            except aiohttp.ClientError as e:
-                logging.warning(f"lcore-node connection error (attempt {attempt + 1}): {e}")
-                if attempt == self.max_retries - 1:
-                    return False, {"error": "connection_failed", "details": str(e)}
-                
-                # Exponential backoff
-                await asyncio.sleep(2 ** attempt)
+                async with session.request(method.upper(), url, json=data, trace_request_ctx=timing) as response:
+                    response_data = await self._read_body(response)
+                    timing.body_read(response)
+                    healthy = response.status < 500 and response.status != 429
+                    
+                    if 200 <= response.status < 300:
+                        return True, response_data
+                    logging.warning(f"lcore-node API error: {response.status} - {response_data}")
+                    result = (False, {"error": f"HTTP {response.status}", "details": response_data})
+                    if healthy:
+                        # The request itself was rejected; retrying won't help
+                        return result
+            
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                healthy = False
+                logging.warning(f"lcore-node connection error (attempt {attempt + 1}): {e!r}")
+                result = (False, {"error": "connection_failed", "details": str(e) or type(e).__name__})
             
             except Exception as e:
                 logging.error(f"Unexpected error in lcore-node request: {e}")
                 return False, {"error": "unexpected_error", "details": str(e)}
+            
+            finally:
+                if token is not None:
+                    limiter.release(token, bool(healthy), time.monotonic() - started)
+                if breaker:
+                    if healthy is None:
+                        breaker.release()
+                    elif healthy:
+                        breaker.record_success()
+                    else:
+                        breaker.record_failure()
+                self._record_timing(endpoint, timing)
         
-        return False, {"error": "max_retries_exceeded"}
+        return result
+    
+    def _retry_backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry ``attempt`` (1-based)"""
+        return random.uniform(0, min(self.retry_max_backoff_sec, self.retry_base_sec * 2 ** (attempt - 1)))
     
     async def register_device(self, device: IoTDevice) -> Tuple[bool, Dict[str, Any], float]:
         """Register a device with lcore-node
@@ -125,23 +292,137 @@ class LcoreClient:
             "timestamp": timestamp
         }
         
-        success, response = await self._make_request("POST", "/device/data", payload)
+        if self.batch_enabled:
+            success, response = await self._submit_batched(payload)
+        else:
+            success, response = await self._make_request("POST", "/device/data", payload)
         latency = time.time() - start_time
         
         return success, response, latency
     
+    def get_batch_stats(self) -> Dict[str, Any]:
+        """Batching counters for monitoring"""
+        return {
+            "enabled": self.batch_enabled,
+            "batches_sent": self.batches_sent,
+            "batched_items": self.batched_items,
+            "avg_batch_size": round(self.batched_items / self.batches_sent, 2) if self.batches_sent else 0.0,
+            "queued": len(self._batch),
+        }
+    
+    def get_limiter_stats(self) -> Dict[str, Any]:
+        """Concurrency limiter state (limit, in flight, queued, adjustments); empty when disabled"""
+        if self._fleet_limiter is not None:
+            return dict(self._fleet_limiter)
+        return self.limiter.get_stats() if self.limiter else {}
+    
+    def get_breaker_stats(self) -> Dict[str, Any]:
+        """Circuit breaker state, requests shed while open, and retry budget counters"""
+        if self._fleet_breaker is not None:
+            return dict(self._fleet_breaker)
+        stats: Dict[str, Any] = self.breaker.get_stats() if self.breaker else {}
+        if self.retry_budget:
+            stats.update(self.retry_budget.get_stats())
+        return stats
+    
+    def set_fleet_stats(self, limiter: Dict[str, Any], breaker: Dict[str, Any]):
+        """Report these limiter and breaker stats instead of the local ones (sharded launcher)"""
+        self._fleet_limiter = limiter
+        self._fleet_breaker = breaker
+    
+    # ------------------------------------------------------------------
+    # Micro-batching
+    # ------------------------------------------------------------------
+    
+    async def _submit_batched(self, payload: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        size = len(payload["data"]) + len(payload["device_id"]) + BATCH_ITEM_OVERHEAD_BYTES
+        if self._batch and self._batch_bytes + size > self.batch_max_bytes:
+            self._flush_batch()
+        future = loop.create_future()
+        self._batch.append((payload, future))
+        self._batch_bytes += size
+        if len(self._batch) >= self.batch_max_items or self._batch_bytes >= self.batch_max_bytes:
+            self._flush_batch()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_linger_sec, self._flush_batch)
+        return await future
+    
+    def _flush_batch(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._batch, self._batch_bytes = self._batch, [], 0
+        if batch:
+            sender = asyncio.ensure_future(self._send_batch(batch))
+            self._senders.add(sender)
+            sender.add_done_callback(self._senders.discard)
+    
+    async def _send_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        if not self.batch_enabled:
+            await asyncio.gather(*(self._send_single(payload, future) for payload, future in batch))
+            return
+        
+        self.batches_sent += 1
+        self.batched_items += len(batch)
+        try:
+            success, response = await self._make_request(
+                "POST", self.batch_path, {"items": [payload for payload, _ in batch]}
+            )
+        except Exception as e:
+            success, response = False, {"error": "unexpected_error", "details": str(e)}
+        
+        if not success and response.get("error") == "HTTP 404":
+            logging.warning(f"lcore-node has no {self.batch_path} endpoint; disabling batching")
+            self.batch_enabled = False
+            await asyncio.gather(*(self._send_single(payload, future) for payload, future in batch))
+            return
+        
+        results = response.get("results") if success else None
+        if not isinstance(results, list) or len(results) != len(batch):
+            if success:
+                response = {"error": "invalid_batch_response", "details": response}
+            for _, future in batch:
+                if not future.done():
+                    future.set_result((False, response))
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result((bool(result.get("success")), result))
+    
+    async def _send_single(self, payload: Dict[str, Any], future: asyncio.Future):
+        try:
+            result = await self._make_request("POST", "/device/data", payload)
+        except Exception as e:
+            result = (False, {"error": "unexpected_error", "details": str(e)})
+        if not future.done():
+            future.set_result(result)
+    
     async def get_status(self) -> Tuple[bool, Dict[str, Any], float]:
         """Get lcore-node health status
         
+        One attempt, outside the limiter, the breaker and the retry budget,
+        so background probing neither queues behind device traffic nor uses
+        up its retries; the latency is that attempt's alone.
+        
         Returns:
             Tuple of (success: bool, response_data: dict, latency: float)
         """
-        start_time = time.time()
-        
-        success, response = await self._make_request("GET", "/status")
-        latency = time.time() - start_time
-        
-        return success, response, latency
+        timing = RequestTiming()
+        started = time.monotonic()
+        try:
+            session = await self._get_session()
+            async with session.get(f"{self.base_url}/status", trace_request_ctx=timing) as response:
+                response_data = await self._read_body(response)
+                timing.body_read(response)
+                if 200 <= response.status < 300:
+                    return True, response_data, time.monotonic() - started
+                return False, {"error": f"HTTP {response.status}", "details": response_data}, time.monotonic() - started
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return False, {"error": "connection_failed", "details": str(e) or type(e).__name__}, time.monotonic() - started
+        finally:
+            self._record_timing("/status", timing)
     
     async def health_check(self) -> bool:
         """Simple health check for lcore-node availability
@@ -161,4 +442,24 @@ lcore_client = LcoreClient(
     base_url=LCORE_NODE_URL,
     timeout=LCORE_NODE_TIMEOUT,
     max_retries=LCORE_NODE_MAX_RETRIES,
+    batch_enabled=LCORE_BATCH_ENABLED,
+    batch_max_items=LCORE_BATCH_MAX_ITEMS,
+    batch_max_bytes=LCORE_BATCH_MAX_BYTES,
+    batch_linger_sec=LCORE_BATCH_LINGER_MS / 1000,
+    batch_path=LCORE_BATCH_PATH,
+    limiter=AIMDLimiter(
+        initial_limit=LCORE_LIMIT_INITIAL,
+        min_limit=LCORE_LIMIT_MIN,
+        max_limit=LCORE_LIMIT_MAX,
+        latency_target_sec=LCORE_LIMIT_LATENCY_TARGET_MS / 1000,
+        backoff=LCORE_LIMIT_BACKOFF,
+    ) if LCORE_LIMIT_ENABLED else None,
+    breaker=CircuitBreaker(
+        failure_threshold=LCORE_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout_sec=LCORE_BREAKER_RESET_SEC,
+        half_open_max_calls=LCORE_BREAKER_HALF_OPEN_CALLS,
+    ),
+    retry_budget=RetryBudget(ratio=LCORE_RETRY_BUDGET_RATIO, min_per_sec=LCORE_RETRY_MIN_PER_SEC),
+    retry_base_sec=LCORE_RETRY_BASE_MS / 1000,
+    retry_max_backoff_sec=LCORE_RETRY_MAX_BACKOFF_MS / 1000,
 ) 
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""Local stand-in for lcore-node's HTTP API.
+
+Serves ``/status``, ``/device/register``, ``/device/data`` and the batch
+endpoint ``/device/data/batch`` that ``LcoreClient`` uses when
+``LCORE_BATCH_ENABLED`` is set, so the client side of the IoT pipeline can be
+exercised without the Rust node or a chain:
+
+    python -m utils.lcore_stub --port 3000 --latency-ms 20 --failure-rate 0.01
+
+Each request sleeps ``latency_ms`` (once per request, not per batch item, to
+mimic one encryption/commit round) and reports the simulated stages in a
+``Server-Timing`` header. ``/status`` includes request and item counters.
+With ``--capacity N`` at most N requests are worked on at once and the rest
+wait their turn, like a node whose throughput is capped.
+"""
+
+import argparse
+import asyncio
+import random
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+
+class LcoreStub:
+    def __init__(self, latency_ms: float = 20.0, failure_rate: float = 0.0, capacity: int = 0):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.capacity = capacity
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.requests = 0
+        self.items = 0
+        self.batches = 0
+        self.registered = set()
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=16 * 1024 * 1024)
+        app.router.add_get("/status", self.status)
+        app.router.add_post("/device/register", self.register_device)
+        app.router.add_post("/device/data", self.submit_data)
+        app.router.add_post("/device/data/batch", self.submit_data_batch)
+        return app
+
+    async def status(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "status": "ok",
+            "version": "stub",
+            "requests": self.requests,
+            "items": self.items,
+            "batches": self.batches,
+            "registered_devices": len(self.registered),
+        })
+
+    async def register_device(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.requests += 1
+        await self._work()
+        self.registered.add(body["device_id"])
+        return web.json_response(
+            {"success": True, "message": "Device registered successfully"},
+            status=201,
+            headers=self._server_timing(),
+        )
+
+    async def submit_data(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.requests += 1
+        self.items += 1
+        await self._work()
+        result = self._process(body)
+        return web.json_response(result, status=200 if result["success"] else 500, headers=self._server_timing())
+
+    async def submit_data_batch(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        items: List[Dict[str, Any]] = body.get("items", [])
+        self.requests += 1
+        self.batches += 1
+        self.items += len(items)
+        await self._work()
+        return web.json_response({"results": [self._process(item) for item in items]}, headers=self._server_timing())
+
+    def _process(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        if not item.get("device_id") or "data" not in item:
+            return {"success": False, "message": "Missing device_id or data"}
+        if random.random() < self.failure_rate:
+            return {"success": False, "message": "Simulated failure"}
+        return {"success": True, "message": "Data submitted; tx 0xstub"}
+
+    async def _work(self):
+        if self.capacity <= 0:
+            if self.latency_ms > 0:
+                await asyncio.sleep(self.latency_ms / 1000)
+            return
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.capacity)
+        async with self._slots:
+            await asyncio.sleep(self.latency_ms / 1000)
+
+    def _server_timing(self) -> Dict[str, str]:
+        encryption = self.latency_ms * 0.2
+        return {"Server-Timing": f"encryption;dur={encryption:.1f}, on_chain;dur={self.latency_ms - encryption:.1f}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local lcore-node API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--capacity", type=int, default=0, help="requests worked on at once (0 = unlimited)")
+    args = parser.parse_args()
+
+    stub = LcoreStub(latency_ms=args.latency_ms, failure_rate=args.failure_rate, capacity=args.capacity)
+    web.run_app(stub.create_app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
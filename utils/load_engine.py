@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from config.settings import (
+    LOAD_ARRIVAL_PROCESS,
+    LOAD_BURST_SIZE,
+    LOAD_PROFILE,
+    LOAD_RAMP_SEC,
+    LOAD_STEP_COUNT,
+    LOAD_STEP_SEC,
+    MAX_IN_FLIGHT_TX,
+    SHARD_COUNT,
+)
+
+ARRIVAL_PROCESSES = ("constant", "poisson", "burst")
+
+# Longest stretch the scheduler sleeps before re-reading a time-varying rate
+MAX_TICK_SEC = 0.25
+
+
+class RateProfile:
+    """Target arrival rate (operations per second) as a function of elapsed time"""
+
+    def rate_at(self, elapsed_sec: float) -> float:
+        raise NotImplementedError
+
+
+class ConstantProfile(RateProfile):
+    """Fixed rate for the whole run"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+
+    def rate_at(self, elapsed_sec: float) -> float:
+        return self.rate
+
+
+class RampProfile(RateProfile):
+    """Linear ramp from ``start_rate`` to ``end_rate`` over ``duration_sec``, then hold"""
+
+    def __init__(self, start_rate: float, end_rate: float, duration_sec: float):
+        self.start_rate = start_rate
+        self.end_rate = end_rate
+        self.duration_sec = duration_sec
+
+    def rate_at(self, elapsed_sec: float) -> float:
+        if self.duration_sec <= 0 or elapsed_sec >= self.duration_sec:
+            return self.end_rate
+        return self.start_rate + (self.end_rate - self.start_rate) * elapsed_sec / self.duration_sec
+
+
+class StepProfile(RateProfile):
+    """Rate rising by ``step_rate`` every ``step_sec`` from ``start_rate`` up to ``max_rate``"""
+
+    def __init__(self, start_rate: float, step_rate: float, step_sec: float, max_rate: float):
+        self.start_rate = start_rate
+        self.step_rate = step_rate
+        self.step_sec = step_sec
+        self.max_rate = max_rate
+
+    def rate_at(self, elapsed_sec: float) -> float:
+        steps = int(elapsed_sec // self.step_sec) if self.step_sec > 0 else 0
+        return min(self.max_rate, self.start_rate + steps * self.step_rate)
+
+
+def build_profile(target_rate: float, kind: str = LOAD_PROFILE, shard_count: int = SHARD_COUNT) -> RateProfile:
+    """Build the configured rate profile that ends at ``target_rate``.
+
+    ``ramp`` climbs from zero over LOAD_RAMP_SEC; ``step`` reaches the target
+    in LOAD_STEP_COUNT equal steps of LOAD_STEP_SEC each. Configured rates are
+    fleet-wide, so a shard process generates ``1 / shard_count`` of them.
+    """
+    target_rate /= max(1, shard_count)
+    kind = kind.lower()
+    if kind == "ramp":
+        return RampProfile(0.0, target_rate, LOAD_RAMP_SEC)
+    if kind == "step":
+        step = target_rate / max(1, LOAD_STEP_COUNT)
+        return StepProfile(step, step, LOAD_STEP_SEC, target_rate)
+    if kind != "constant":
+        logging.warning(f"Unknown load profile '{kind}', using constant")
+    return ConstantProfile(target_rate)
+
+
+class OpenLoopScheduler:
+    """Starts an async operation at a target arrival rate, independent of its duration.
+
+    Arrivals follow the configured process (``constant`` spacing, exponential
+    ``poisson`` gaps, or ``burst`` groups of ``burst_size``) on an absolute
+    timeline, so slow operations never lower the offered rate. At most
+    ``max_outstanding`` operations run at once; arrivals beyond that are shed
+    and counted, which is what makes offered and achieved rate diverge when the
+    system under test saturates.
+
+    The operation's return value decides success: ``False`` or an exception
+    is a failure, anything else a success.
+
+    If ``is_available`` is given and returns False (e.g. a dependency is
+    down), the workload is paused: arrivals are skipped and counted as
+    ``skipped`` rather than offered, until it returns True again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        operation: Callable[[], Awaitable[Any]],
+        profile: RateProfile,
+        arrival: str = LOAD_ARRIVAL_PROCESS,
+        max_outstanding: int = MAX_IN_FLIGHT_TX,
+        burst_size: int = LOAD_BURST_SIZE,
+        is_available: Optional[Callable[[], bool]] = None,
+    ):
+        if arrival not in ARRIVAL_PROCESSES:
+            raise ValueError(f"Unknown arrival process '{arrival}', expected one of {ARRIVAL_PROCESSES}")
+        self.name = name
+        self.operation = operation
+        self.profile = profile
+        self.arrival = arrival
+        self.max_outstanding = max_outstanding
+        self.burst_size = max(1, burst_size)
+        self.is_available = is_available
+        self.paused = False
+
+        self._tasks: Set[asyncio.Task] = set()
+        self.started_at: Optional[float] = None
+        self.reset_counters()
+
+    def reset_counters(self):
+        """Zero all counters (the schedule itself keeps running)"""
+        self.counters_since = time.monotonic()
+        self.offered = 0
+        self.started = 0
+        self.shed = 0
+        self.skipped = 0
+        self.completed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.total_latency = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def run(self, duration_sec: Optional[float] = None):
+        """Generate arrivals until cancelled or ``duration_sec`` has elapsed.
+
+        Arrival times are computed on an absolute clock by integrating the
+        profile's rate, so a changing rate takes effect within ``MAX_TICK_SEC``
+        and a late wake-up is caught up instead of silently lowering the rate.
+        """
+        self.started_at = time.monotonic()
+        clock = self.started_at
+
+        while True:
+            need = self._arrival_quantum()
+            while need > 0:
+                elapsed = clock - self.started_at
+                if duration_sec is not None and elapsed >= duration_sec:
+                    return
+                rate = self.profile.rate_at(elapsed)
+                if rate <= 0:
+                    clock = max(clock, time.monotonic()) + MAX_TICK_SEC
+                else:
+                    dt = min(need / rate, MAX_TICK_SEC)
+                    clock += dt
+                    need -= rate * dt
+                delay = clock - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            for _ in range(self.burst_size if self.arrival == "burst" else 1):
+                self._arrive()
+
+    async def drain(self):
+        """Wait for all outstanding operations to finish"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def cancel_outstanding(self) -> int:
+        """Cancel every operation still running and wait until they have unwound.
+
+        Cancelled operations are not counted as completed. Returns how many
+        were cancelled.
+        """
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return len(tasks)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Offered versus achieved rate since the last counter reset"""
+        window = max(time.monotonic() - self.counters_since, 1e-9)
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "name": self.name,
+            "arrival": self.arrival,
+            "target_rate": round(self.profile.rate_at(elapsed), 3),
+            "offered_rate": round(self.offered / window, 3),
+            "achieved_rate": round(self.succeeded / window, 3),
+            "completed_rate": round(self.completed / window, 3),
+            "offered": self.offered,
+            "started": self.started,
+            "shed": self.shed,
+            "skipped": self.skipped,
+            "paused": self.paused,
+            "completed": self.completed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "success_rate": round(self.succeeded / self.completed, 4) if self.completed else 0.0,
+            "avg_latency_sec": round(self.total_latency / self.completed, 4) if self.completed else 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _arrival_quantum(self) -> float:
+        """Expected arrivals to accumulate before the next start (or burst)"""
+        if self.arrival == "poisson":
+            return random.expovariate(1.0)
+        if self.arrival == "burst":
+            return float(self.burst_size)
+        return 1.0
+
+    def _arrive(self):
+        if self.is_available is not None:
+            paused = not self.is_available()
+            if paused != self.paused:
+                self.paused = paused
+                if paused:
+                    logging.warning(f"{self.name}: paused while a dependency is down")
+                else:
+                    logging.info(f"{self.name}: resumed")
+            if paused:
+                self.skipped += 1
+                return
+        self.offered += 1
+        if len(self._tasks) >= self.max_outstanding:
+            self.shed += 1
+            return
+        self.started += 1
+        task = asyncio.create_task(self._run_operation())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_operation(self):
+        start = time.monotonic()
+        try:
+            result = await self.operation()
+            success = result is not False
+        except Exception as e:
+            logging.error(f"{self.name} operation failed: {e}")
+            success = False
+        self.completed += 1
+        self.total_latency += time.monotonic() - start
+        if success:
+            self.succeeded += 1
+        else:
+            self.failed += 1
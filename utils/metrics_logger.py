@@ -1,36 +1,54 @@
-import csv
+import atexit
 import os
 import time
 import logging
 from pathlib import Path
-from typing import Dict, DefaultDict
+from typing import Dict, DefaultDict, Tuple
+
+from config.settings import (
+    METRICS_FLUSH_ROWS,
+    METRICS_FLUSH_SEC,
+    METRICS_ROTATE_MB,
+    METRICS_ROTATE_SEC,
+    METRICS_COMPRESS,
+    SHARD_INDEX,
+    SHARD_COUNT,
+)
+from utils.buffered_writer import BufferedCSVWriter
+from utils.iot_metrics import iot_metrics_tracker
 
 LOG_DIR = Path(os.getenv("LOG_DIR", "logs"))
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 
-CSV_FILE = LOG_DIR / "tx_metrics.csv"
-
-# Ensure header
-if not CSV_FILE.exists():
-    with open(CSV_FILE, "w", newline="") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "timestamp",
-                "module",
-                "tx_hash",
-                "status",
-                "gas_used",
-                "latency_sec",
-                "error",
-            ],
-        )
-        writer.writeheader()
+# Shard worker processes write (and rotate) their own file
+CSV_FILE = LOG_DIR / ("tx_metrics.csv" if SHARD_COUNT == 1 else f"tx_metrics.shard{SHARD_INDEX}.csv")
+
+# Rows are queued and written off the event loop; the header is written
+# whenever a new file is started.
+tx_metrics_writer = BufferedCSVWriter(
+    CSV_FILE,
+    fieldnames=[
+        "timestamp",
+        "module",
+        "tx_hash",
+        "status",
+        "gas_used",
+        "latency_sec",
+        "error",
+    ],
+    max_rows=METRICS_FLUSH_ROWS,
+    flush_interval_sec=METRICS_FLUSH_SEC,
+    rotate_bytes=int(METRICS_ROTATE_MB * 1024 * 1024),
+    rotate_interval_sec=METRICS_ROTATE_SEC,
+    compress=METRICS_COMPRESS,
+)
+atexit.register(tx_metrics_writer.close)
 
 # Configure local logger (inherits global level)
 logger = logging.getLogger(__name__)
 
 _agg: DefaultDict[str, int] = DefaultDict(int)  # module -> success count
+_status_counts: DefaultDict[Tuple[str, str], int] = DefaultDict(int)  # (module, status) -> count
 
 # ---------------------------------------------------------------------------
 # Public helpers
@@ -41,6 +59,28 @@ def get_aggregate_counts() -> Dict[str, int]:
     return dict(_agg)
 
 
+def set_aggregate_counts(counts: Dict[str, int]) -> None:
+    """Replace the per-module success counters (the sharded launcher mirrors fleet totals here)."""
+    _agg.clear()
+    _agg.update(counts)
+
+
+def get_status_counts() -> Dict[Tuple[str, str], int]:
+    """Return a shallow copy of the per-(module, status) transaction counters."""
+    return dict(_status_counts)
+
+
+def set_status_counts(counts: Dict[Tuple[str, str], int]) -> None:
+    """Replace the per-(module, status) counters (the sharded launcher mirrors fleet totals here)."""
+    _status_counts.clear()
+    _status_counts.update(counts)
+
+
+def close_metrics_log() -> None:
+    """Flush queued metric rows to disk and stop the writer thread."""
+    tx_metrics_writer.close()
+
+
 def print_dapp_summary() -> None:
     """Log a one-shot summary of total successful regular dApp transactions."""
     if not _agg:
@@ -55,24 +95,25 @@ def print_dapp_summary() -> None:
     logger.info("=============================================================")
 
 def log_metric(module: str, tx_hash: str, status: str, gas_used: int, latency_sec: float, error: str = ""):  # noqa: E501
-    """Append a transaction metric row to CSV file."""
-    with open(CSV_FILE, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(
-            [
-                int(time.time()),
-                module,
-                tx_hash,
-                status,
-                gas_used,
-                f"{latency_sec:.4f}",
-                error,
-            ]
-        )
+    """Queue a transaction metric row for the CSV file (does not block)."""
+    tx_metrics_writer.write(
+        [
+            int(time.time()),
+            module,
+            tx_hash,
+            status,
+            gas_used,
+            f"{latency_sec:.4f}",
+            error,
+        ]
+    )
 
     # Update aggregate and print to stdout for visibility inside container
     if status == "success":
         _agg[module] += 1
+    _status_counts[(module, status)] += 1
+    # Errors never reached the chain, so they carry no latency
+    iot_metrics_tracker.record_result(module, status == "success", None if status == "error" else latency_sec)
 
     # Use appropriate log level based on status to prevent Railway log confusion
     log_message = f"TX | {module} | {status.upper()} | latency {latency_sec:.2f}s | gas {gas_used} | total successes {_agg[module]}"
@@ -0,0 +1,217 @@
+import logging
+import math
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from utils.buffered_writer import get_writer_stats
+from utils.fee_oracle import fee_oracle
+from utils.health_prober import health_prober
+from utils.iot_metrics import iot_metrics_tracker
+from utils.latency_histogram import EXACT_BOUNDS_SEC, LatencyHistogram
+from utils.lcore_client import lcore_client
+from utils.metrics_logger import get_status_counts
+from utils.receipt_tracker import receipt_tracker
+from utils.wallet_manager import wallet_manager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histogram bucket bounds (seconds) exposed for every latency histogram;
+# histograms count these exactly (see LatencyHistogram.cumulative_counts)
+LATENCY_BUCKETS_SEC = list(EXACT_BOUNDS_SEC)
+
+Labels = Dict[str, str]
+Samples = Iterable[Tuple[Labels, float]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class MetricWriter:
+    """Accumulates metric families in the Prometheus text exposition format"""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._lines: List[str] = []
+
+    def counter(self, name: str, help_text: str, samples: Samples):
+        self._family(f"{name}_total", "counter", help_text, samples)
+
+    def gauge(self, name: str, help_text: str, samples: Samples):
+        self._family(name, "gauge", help_text, samples)
+
+    def histogram(self, name: str, help_text: str, series: Iterable[Tuple[Labels, LatencyHistogram]],
+                  bounds_sec: List[float] = LATENCY_BUCKETS_SEC):
+        full_name = f"{self.namespace}_{name}"
+        self._lines.append(f"# HELP {full_name} {help_text}")
+        self._lines.append(f"# TYPE {full_name} histogram")
+        for labels, histogram in series:
+            for bound, cumulative in zip(bounds_sec, histogram.cumulative_counts(bounds_sec)):
+                bucket_labels = _format_labels({**labels, "le": repr(float(bound))})
+                self._lines.append(f"{full_name}_bucket{bucket_labels} {cumulative}")
+            self._lines.append(f"{full_name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+            self._lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(histogram.total)}")
+            self._lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+
+    def text(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+    def _family(self, name: str, kind: str, help_text: str, samples: Samples):
+        full_name = f"{self.namespace}_{name}"
+        self._lines.append(f"# HELP {full_name} {help_text}")
+        self._lines.append(f"# TYPE {full_name} {kind}")
+        for labels, value in samples:
+            if value is not None:
+                self._lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+
+
+class PrometheusExporter:
+    """Renders the simulator's counters in the Prometheus text exposition format.
+
+    Every collector reads counters the simulator already maintains (no RPC
+    calls, no CSV parsing), so a scrape costs the same at any point of a run.
+    Collectors for the global trackers are built in; components that live
+    elsewhere register theirs with :meth:`add_collector`.
+    """
+
+    def __init__(self, namespace: str = "kcchain"):
+        self.namespace = namespace
+        self._collectors: List[Callable[[MetricWriter], None]] = [
+            _collect_transactions,
+            _collect_iot,
+            _collect_receipts_and_fees,
+            _collect_wallets,
+            _collect_dependencies,
+            _collect_writers,
+        ]
+
+    def add_collector(self, collector: Callable[[MetricWriter], None]):
+        """Register ``collector(writer)``, called on every scrape"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        writer = MetricWriter(self.namespace)
+        for collector in self._collectors:
+            try:
+                collector(writer)
+            except Exception as e:
+                logging.warning(f"Prometheus collector {getattr(collector, '__name__', collector)} failed: {e}")
+        return writer.text()
+
+
+# ----------------------------------------------------------------------
+# Built-in collectors
+# ----------------------------------------------------------------------
+
+def _collect_transactions(out: MetricWriter):
+    out.counter(
+        "dapp_transactions",
+        "dApp transactions by module and outcome (success, failed, error)",
+        [({"module": module, "status": status}, n) for (module, status), n in get_status_counts().items()],
+    )
+
+
+def _collect_iot(out: MetricWriter):
+    tracker = iot_metrics_tracker
+    out.counter("iot_operations", "IoT pipeline operations", [({}, tracker.total_operations)])
+    out.counter("iot_operations_succeeded", "Successful IoT pipeline operations", [({}, tracker.successful_operations)])
+    out.counter("iot_registrations", "IoT device registrations", [({}, tracker.registration_count)])
+    out.counter("iot_data_submissions", "IoT data submissions", [({}, tracker.data_submission_count)])
+    out.counter("iot_on_chain_commitments", "IoT on-chain commitments", [({}, tracker.on_chain_commitments)])
+    out.histogram(
+        "operation_latency_seconds",
+        "Latency of IoT operations and mined dApp transactions",
+        [({"operation": operation}, h) for operation, h in list(tracker.latency_histograms.items())],
+    )
+    out.histogram(
+        "lcore_request_phase_seconds",
+        "lcore-node request time per phase (client-side phases and server:<name> from Server-Timing)",
+        [({"endpoint": endpoint, "phase": phase}, h) for (endpoint, phase), h in list(lcore_client.phase_histograms.items())],
+    )
+
+
+def _collect_receipts_and_fees(out: MetricWriter):
+    receipts = receipt_tracker.get_stats()
+    out.gauge("receipts_pending", "Transactions waiting for a receipt", [({}, receipts["pending"])])
+    out.gauge("last_block", "Latest block seen by the receipt tracker", [({}, receipts["last_block"])])
+    out.counter("receipts_resolved", "Receipts resolved by the block follower", [({}, receipts["receipts_resolved"])])
+    out.counter("receipt_tracker_rpc_calls", "RPC calls made by the block follower", [({}, receipts["rpc_calls"])])
+    fees = fee_oracle.get_stats()
+    out.counter(
+        "fee_oracle_lookups",
+        "Fee oracle lookups by cache result",
+        [({"result": "hit"}, fees["hits"]), ({"result": "miss"}, fees["misses"])],
+    )
+    out.gauge("fee_oracle_staleness_seconds", "Age of the cached fee quote", [({}, fees["staleness_sec"])])
+
+
+def _collect_wallets(out: MetricWriter):
+    wallets = list(wallet_manager.wallets.values())
+    labels = [{"address": w.address, "label": w.label, "type": w.wallet_type.value} for w in wallets]
+    out.gauge(
+        "wallet_balance_wei",
+        "Last confirmed wallet balance (local ledger)",
+        [(wallet_labels, w.balance_wei) for wallet_labels, w in zip(labels, wallets)],
+    )
+    out.gauge(
+        "wallet_reserved_wei",
+        "Estimated cost of the wallet's sent but unmined transactions",
+        [(wallet_labels, w.reserved_wei) for wallet_labels, w in zip(labels, wallets)],
+    )
+
+
+def _collect_dependencies(out: MetricWriter):
+    targets = list(health_prober.targets.values())
+    out.gauge(
+        "dependency_up",
+        "1 if the dependency's last probes succeeded (health prober)",
+        [({"dependency": t.name}, t.healthy) for t in targets],
+    )
+    out.histogram(
+        "dependency_probe_latency_seconds",
+        "Latency of health probes per dependency",
+        [({"dependency": t.name}, t.latency) for t in targets],
+    )
+
+
+def _collect_writers(out: MetricWriter):
+    writers = get_writer_stats()
+    out.gauge(
+        "writer_backlog",
+        "Records queued for a background metrics writer",
+        [({"writer": name}, stats["backlog"]) for name, stats in writers.items()],
+    )
+    out.gauge(
+        "writer_failed",
+        "1 while a metrics writer cannot open or rotate its storage (rows are dropped)",
+        [({"writer": name}, stats["failed"]) for name, stats in writers.items()],
+    )
+    out.counter(
+        "writer_rows_written",
+        "Records stored by a background metrics writer",
+        [({"writer": name}, stats["rows_written"]) for name, stats in writers.items()],
+    )
+    out.counter(
+        "writer_rows_dropped",
+        "Records dropped because a metrics writer's storage failed",
+        [({"writer": name}, stats["rows_dropped"]) for name, stats in writers.items()],
+    )
+
+
+# Global exporter instance
+prometheus_exporter = PrometheusExporter()
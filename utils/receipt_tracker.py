@@ -0,0 +1,299 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from web3.exceptions import TimeExhausted, TransactionNotFound
+from web3.types import TxReceipt
+
+from config.settings import web3_async, TX_RECEIPT_POLL_SEC
+
+# Blocks whose transaction hashes are remembered, so a transaction that was
+# mined before its hash got registered is still resolved immediately.
+RECENT_BLOCKS_KEPT = 32
+
+# Pending transactions not resolved from block data within this many seconds
+# are looked up directly (covers blocks mined before the follower started).
+STALE_RECHECK_SEC = 15.0
+
+# Beyond this many unseen blocks (e.g. after an RPC outage) the tracker stops
+# walking block by block and looks pending receipts up directly instead.
+MAX_CATCHUP_BLOCKS = 64
+
+# With a push-capable provider (WebSocket newHeads) the follower wakes on every
+# pushed head, and at least this often to verify the head and sweep stale entries.
+PUSH_FALLBACK_SEC = 5.0
+
+
+def _hash_key(tx_hash: Any) -> str:
+    """Normalise HexBytes / str transaction hashes to lowercase 0x-hex"""
+    if isinstance(tx_hash, (bytes, bytearray)):
+        return "0x" + bytes(tx_hash).hex()
+    key = str(tx_hash).lower()
+    return key if key.startswith("0x") else "0x" + key
+
+
+class _PendingTx:
+    __slots__ = ("future", "submitted_at", "last_checked", "waiters")
+
+    def __init__(self, future: asyncio.Future, submitted_at: float):
+        self.future = future
+        self.submitted_at = submitted_at
+        self.last_checked = submitted_at
+        # Callers currently inside wait_for_receipt() for this hash
+        self.waiters = 0
+
+
+class ReceiptTracker:
+    """Resolves receipts for all in-flight transactions from a single block follower.
+
+    Instead of one polling loop per transaction, one background task follows
+    the chain head, reads the transaction hashes of every new block and fetches
+    receipts only for hashes that are waiting in the pending table. RPC load
+    therefore scales with blocks per second rather than with the number of
+    outstanding transactions, and confirmation latency is measured at the
+    moment the including block is observed.
+
+    If the provider can push (``WebSocketRPCProvider``), the follower
+    subscribes to ``newHeads`` and processes blocks as they are announced
+    instead of polling ``eth_blockNumber`` every ``poll_interval``.
+    """
+
+    def __init__(self, w3=web3_async, poll_interval: float = TX_RECEIPT_POLL_SEC):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self._pending: Dict[str, _PendingTx] = {}
+        self._recent_hashes: Dict[str, int] = {}
+        self._recent_blocks: Deque[Tuple[int, List[str]]] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._lookups: Set[asyncio.Task] = set()
+        self._head_listeners: List[Callable[[Any], None]] = []
+        self.last_block: Optional[int] = None
+        self._pushed_head: Optional[int] = None
+        self._head_event: Optional[asyncio.Event] = None
+        self._push_subscribed = False
+
+        # Counters
+        self.blocks_processed = 0
+        self.receipts_resolved = 0
+        self.rpc_calls = 0
+        # Fleet-wide stats reported instead of the local ones (sharded launcher)
+        self._fleet_stats: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def track(self, tx_hash: Any) -> asyncio.Future:
+        """Register a submitted transaction and return the future of its receipt"""
+        key = _hash_key(tx_hash)
+        entry = self._pending.get(key)
+        if entry is None:
+            future = asyncio.get_running_loop().create_future()
+            entry = _PendingTx(future, time.time())
+            self._pending[key] = entry
+            if key in self._recent_hashes:
+                # Mined in a block we already walked – look it up right away
+                lookup = asyncio.create_task(self._resolve([key], time.time()))
+                self._lookups.add(lookup)
+                lookup.add_done_callback(self._lookups.discard)
+        self._ensure_running()
+        return entry.future
+
+    async def wait_for_receipt(self, tx_hash: Any, timeout: float) -> Tuple[TxReceipt, float]:
+        """Wait until ``tx_hash`` is mined.
+
+        Returns:
+            Tuple of (receipt, latency_sec) where latency runs from registration
+            to the observation of the including block.
+
+        Raises:
+            TimeExhausted: if no receipt arrived within ``timeout`` seconds
+        """
+        key = _hash_key(tx_hash)
+        future = self.track(key)
+        entry = self._pending[key]
+        entry.waiters += 1
+        try:
+            receipt, latency = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise TimeExhausted(f"Transaction {key} is not in the chain after {timeout} seconds")
+        finally:
+            entry.waiters -= 1
+            # Only the last waiter to give up drops the shared entry; others
+            # on the same hash keep awaiting its future
+            if entry.waiters == 0 and not future.done() and self._pending.get(key) is entry:
+                del self._pending[key]
+        return receipt, latency
+
+    def add_head_listener(self, callback: Callable[[Any], None]):
+        """Call ``callback(block)`` for every block the follower processes.
+
+        Callbacks run on the event loop and must not block.
+        """
+        self._head_listeners.append(callback)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        if self._fleet_stats is not None:
+            return dict(self._fleet_stats)
+        return {
+            "pending": len(self._pending),
+            "last_block": self.last_block,
+            "push_heads": self._push_subscribed,
+            "blocks_processed": self.blocks_processed,
+            "receipts_resolved": self.receipts_resolved,
+            "rpc_calls": self.rpc_calls,
+        }
+
+    def set_fleet_stats(self, stats: Dict[str, Any]):
+        """Report these stats instead of the local ones (sharded launcher)"""
+        self._fleet_stats = stats
+
+    async def stop(self):
+        """Stop the block follower (pending waiters will time out)"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    # ------------------------------------------------------------------
+    # Block follower
+    # ------------------------------------------------------------------
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._follow_blocks())
+
+    async def _follow_blocks(self):
+        push = await self._subscribe_heads()
+        while True:
+            if push:
+                self._head_event.clear()
+            try:
+                await self._poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Receipt tracker poll failed: {e}")
+            if push:
+                try:
+                    await asyncio.wait_for(self._head_event.wait(), PUSH_FALLBACK_SEC)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _subscribe_heads(self) -> bool:
+        """Subscribe to pushed heads if the provider supports it"""
+        if self._push_subscribed:
+            return True
+        provider = self.w3.provider
+        if not getattr(provider, "supports_push", False):
+            return False
+        self._head_event = asyncio.Event()
+        try:
+            await provider.subscribe("newHeads", self._on_pushed_head)
+        except Exception as e:
+            logging.warning(f"newHeads subscription failed, polling for blocks instead: {e}")
+            return False
+        self._push_subscribed = True
+        return True
+
+    def _on_pushed_head(self, header: Dict[str, Any]):
+        number = int(header["number"], 16)
+        if self._pushed_head is None or number > self._pushed_head:
+            self._pushed_head = number
+        self._head_event.set()
+
+    async def _poll_once(self):
+        if self._pushed_head is not None and (self.last_block is None or self._pushed_head > self.last_block):
+            head = self._pushed_head
+        else:
+            self.rpc_calls += 1
+            head = await self.w3.eth.block_number
+        observed_at = time.time()
+
+        if self.last_block is None:
+            # Start with the current head; anything mined earlier is picked up
+            # by the recent-hash check in track() or by the direct lookup below.
+            first = head
+        else:
+            first = self.last_block + 1
+
+        if head - first + 1 > MAX_CATCHUP_BLOCKS:
+            logging.warning(f"Receipt tracker is {head - first + 1} blocks behind; looking up pending receipts directly")
+            self.last_block = head
+            await self._resolve(list(self._pending), observed_at)
+            return
+
+        for number in range(first, head + 1):
+            await self._process_block(number, observed_at)
+            self.last_block = number
+
+        stale = [k for k, e in self._pending.items() if observed_at - e.last_checked > STALE_RECHECK_SEC]
+        if stale:
+            for key in stale:
+                self._pending[key].last_checked = observed_at
+            await self._resolve(stale, observed_at)
+
+    async def _process_block(self, number: int, observed_at: float):
+        self.rpc_calls += 1
+        block = await self.w3.eth.get_block(number, full_transactions=False)
+        hashes = [_hash_key(h) for h in block["transactions"]]
+        self._remember_block(number, hashes)
+        self.blocks_processed += 1
+        for callback in self._head_listeners:
+            try:
+                callback(block)
+            except Exception as e:
+                logging.warning(f"Head listener failed: {e}")
+
+        mine = [h for h in hashes if h in self._pending]
+        if mine:
+            await self._resolve(mine, observed_at)
+
+    def _remember_block(self, number: int, hashes: List[str]):
+        self._recent_blocks.append((number, hashes))
+        for h in hashes:
+            self._recent_hashes[h] = number
+        while len(self._recent_blocks) > RECENT_BLOCKS_KEPT:
+            old_number, old_hashes = self._recent_blocks.popleft()
+            for h in old_hashes:
+                if self._recent_hashes.get(h) == old_number:
+                    del self._recent_hashes[h]
+
+    async def _resolve(self, keys: List[str], observed_at: float):
+        """Fetch receipts for ``keys`` concurrently and complete their futures"""
+        keys = [k for k in keys if k in self._pending]
+        if not keys:
+            return
+        self.rpc_calls += len(keys)
+        receipts = await asyncio.gather(
+            *(self.w3.eth.get_transaction_receipt(k) for k in keys),
+            return_exceptions=True,
+        )
+        for key, receipt in zip(keys, receipts):
+            if isinstance(receipt, BaseException):
+                # Not mined yet (TransactionNotFound) or a transient RPC error:
+                # the entry stays pending and is retried by the stale sweep.
+                if not isinstance(receipt, TransactionNotFound):
+                    logging.debug(f"Receipt lookup for {key} failed: {receipt}")
+                continue
+            entry = self._pending.pop(key, None)
+            if entry is None or entry.future.done():
+                continue
+            self.receipts_resolved += 1
+            entry.future.set_result((receipt, observed_at - entry.submitted_at))
+
+
+# Global receipt tracker instance
+receipt_tracker = ReceiptTracker()
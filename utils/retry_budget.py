@@ -0,0 +1,49 @@
+import time
+from typing import Any, Callable, Dict
+
+
+class RetryBudget:
+    """Caps retries at a fraction of the request volume (token bucket).
+
+    Every request deposits ``ratio`` tokens and every retry needs a whole
+    one, so retries add at most ``ratio`` extra load on top of the original
+    requests; ``min_per_sec`` tokens a second are added regardless, so a
+    quiet client can still retry. The bucket holds at most ``max_tokens``.
+    :meth:`try_withdraw` never waits: without a token the retry is dropped
+    and the caller fails with its last error.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_per_sec: float = 1.0,
+        max_tokens: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.max_tokens = max_tokens
+        self.clock = clock
+        self.tokens = max_tokens
+        self._refilled_at = clock()
+        self.withdrawn = 0
+        self.denied = 0
+
+    def deposit(self):
+        """Called once per request (not per attempt)"""
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_withdraw(self) -> bool:
+        """Take the token for one retry, if there is one"""
+        now = self.clock()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self._refilled_at) * self.min_per_sec)
+        self._refilled_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.withdrawn += 1
+            return True
+        self.denied += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"retries": self.withdrawn, "retries_denied": self.denied, "tokens": round(self.tokens, 2)}
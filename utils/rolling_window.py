@@ -0,0 +1,122 @@
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+# Slots per window; a window's figures cover between (SLOTS-1)/SLOTS of its
+# length and all of it, depending on how far the current slot has advanced.
+SLOTS = 60
+
+
+def window_label(window_sec: float) -> str:
+    """Short label for a window length, e.g. 10s, 1m, 5m, 1h"""
+    if window_sec >= 3600 and window_sec % 3600 == 0:
+        return f"{int(window_sec // 3600)}h"
+    if window_sec >= 60 and window_sec % 60 == 0:
+        return f"{int(window_sec // 60)}m"
+    return f"{window_sec:g}s"
+
+
+def summarize_window(counters: Dict[str, Any]) -> Dict[str, Any]:
+    """Rates from the raw counters of one window (see :meth:`RollingWindow.get_counters`)"""
+    count = counters["count"]
+    span = counters["span_sec"]
+    latency_count = counters["latency_count"]
+    return {
+        "count": count,
+        "ops_per_sec": round(count / span, 3) if span > 0 else 0.0,
+        "success_rate": round(counters["successes"] / count, 4) if count else 0.0,
+        "avg_latency_sec": round(counters["latency_total"] / latency_count, 4) if latency_count else 0.0,
+        "max_latency_sec": round(counters["latency_max"], 4),
+    }
+
+
+def merge_window_counters(counters: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add up the raw counters of the same window from several processes"""
+    merged = dict(counters[0])
+    for field in ("count", "successes", "latency_count", "latency_total"):
+        merged[field] = sum(c[field] for c in counters)
+    merged["span_sec"] = max(c["span_sec"] for c in counters)
+    merged["latency_max"] = max(c["latency_max"] for c in counters)
+    return merged
+
+
+class RollingWindow:
+    """Event counts, successes and latency over the last ``window_sec`` seconds.
+
+    A ring of ``SLOTS`` time slots: :meth:`record` adds to the slot of the
+    current time (clearing it first if it still holds an older period), so
+    recording is O(1) and memory is fixed. Reading sums the slots that are
+    still inside the window.
+    """
+
+    def __init__(self, window_sec: float, clock=time.monotonic):
+        self.window_sec = window_sec
+        self.slot_sec = window_sec / SLOTS
+        self._clock = clock
+        self._started = clock()
+        self._periods: List[int] = [-1] * SLOTS
+        self._counts: List[int] = [0] * SLOTS
+        self._successes: List[int] = [0] * SLOTS
+        self._latency_counts: List[int] = [0] * SLOTS
+        self._latency_totals: List[float] = [0.0] * SLOTS
+        self._latency_max: List[float] = [0.0] * SLOTS
+
+    def record(self, success: bool, latency_sec: Optional[float] = None):
+        """Count one event; ``latency_sec`` is None for events without a meaningful latency"""
+        period = int(self._clock() / self.slot_sec)
+        slot = period % SLOTS
+        if self._periods[slot] != period:
+            self._periods[slot] = period
+            self._counts[slot] = 0
+            self._successes[slot] = 0
+            self._latency_counts[slot] = 0
+            self._latency_totals[slot] = 0.0
+            self._latency_max[slot] = 0.0
+        self._counts[slot] += 1
+        if success:
+            self._successes[slot] += 1
+        if latency_sec is not None:
+            self._latency_counts[slot] += 1
+            self._latency_totals[slot] += latency_sec
+            if latency_sec > self._latency_max[slot]:
+                self._latency_max[slot] = latency_sec
+
+    def get_counters(self) -> Dict[str, Any]:
+        """Raw sums over the window, as exchanged between shard processes"""
+        now = self._clock()
+        current = int(now / self.slot_sec)
+        count = successes = latency_count = 0
+        latency_total = latency_max = 0.0
+        for slot, period in enumerate(self._periods):
+            if current - SLOTS < period <= current:
+                count += self._counts[slot]
+                successes += self._successes[slot]
+                latency_count += self._latency_counts[slot]
+                latency_total += self._latency_totals[slot]
+                latency_max = max(latency_max, self._latency_max[slot])
+        # Covered time: the full older slots plus the elapsed part of the current
+        # one, but no more than the tracker has existed (and at least one slot)
+        span = (SLOTS - 1) * self.slot_sec + (now - current * self.slot_sec)
+        return {
+            "window_sec": self.window_sec,
+            "span_sec": max(min(span, now - self._started), self.slot_sec),
+            "count": count,
+            "successes": successes,
+            "latency_count": latency_count,
+            "latency_total": latency_total,
+            "latency_max": latency_max,
+        }
+
+
+class RollingStats:
+    """A set of :class:`RollingWindow` of different lengths fed by the same events"""
+
+    def __init__(self, windows_sec: Sequence[float]):
+        self.windows = [RollingWindow(w) for w in windows_sec]
+
+    def record(self, success: bool, latency_sec: Optional[float] = None):
+        for window in self.windows:
+            window.record(success, latency_sec)
+
+    def get_counters(self) -> Dict[str, Dict[str, Any]]:
+        """Raw counters per window label"""
+        return {window_label(w.window_sec): w.get_counters() for w in self.windows}
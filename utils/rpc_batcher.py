@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from web3 import AsyncHTTPProvider
+from web3._utils.request import async_make_post_request
+from web3.types import RPCEndpoint, RPCResponse
+
+# Read-only methods that are safe to coalesce into a JSON-RPC batch.
+# Writes (eth_sendRawTransaction) always go out on their own.
+BATCHABLE_METHODS = frozenset({
+    "eth_blockNumber",
+    "eth_call",
+    "eth_chainId",
+    "eth_feeHistory",
+    "eth_gasPrice",
+    "eth_getBalance",
+    "eth_getBlockByHash",
+    "eth_getBlockByNumber",
+    "eth_getCode",
+    "eth_getTransactionByHash",
+    "eth_getTransactionCount",
+    "eth_getTransactionReceipt",
+    "eth_maxPriorityFeePerGas",
+})
+
+
+class BatchingHTTPProvider(AsyncHTTPProvider):
+    """AsyncHTTPProvider that coalesces concurrent read calls into JSON-RPC batches.
+
+    Read requests issued by any coroutine are queued for at most ``linger_sec``
+    (or until ``max_batch_size`` requests are waiting) and then sent together
+    as one JSON array in a single HTTP POST. Callers keep using the normal
+    ``AsyncWeb3`` API – ``await w3.eth.get_balance(...)`` inside an
+    ``asyncio.gather`` is all it takes to share a batch.
+
+    If the node answers a batch with anything other than a JSON array, the
+    provider logs it, falls back to individual requests for good and re-sends
+    the queued calls one by one.
+    """
+
+    def __init__(
+        self,
+        endpoint_uri: Optional[str] = None,
+        request_kwargs: Optional[Any] = None,
+        max_batch_size: int = 100,
+        linger_sec: float = 0.002,
+    ):
+        super().__init__(endpoint_uri, request_kwargs)
+        self.max_batch_size = max_batch_size
+        self.linger_sec = linger_sec
+        self.batching_supported = True
+        self._queue: List[Tuple[RPCEndpoint, Any, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._senders: Set[asyncio.Task] = set()
+
+        # Counters
+        self.http_requests = 0
+        self.batched_calls = 0
+        self.batches_sent = 0
+        self.calls_by_method: Dict[str, int] = {}
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        self.calls_by_method[method] = self.calls_by_method.get(method, 0) + 1
+        if not self.batching_supported or method not in BATCHABLE_METHODS:
+            self.http_requests += 1
+            return await super().make_request(method, params)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((method, params, future))
+        if len(self._queue) >= self.max_batch_size:
+            self._schedule_flush(loop, immediate=True)
+        elif self._flush_handle is None:
+            self._schedule_flush(loop)
+        return await future
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Request counters for monitoring"""
+        return {
+            "batching_supported": self.batching_supported,
+            "http_requests": self.http_requests,
+            "batches_sent": self.batches_sent,
+            "batched_calls": self.batched_calls,
+            "avg_batch_size": round(self.batched_calls / self.batches_sent, 2) if self.batches_sent else 0.0,
+            "calls_by_method": dict(self.calls_by_method),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop, immediate: bool = False):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        delay = 0 if immediate else self.linger_sec
+        self._flush_handle = loop.call_later(delay, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        queued, self._queue = self._queue, []
+        for start in range(0, len(queued), self.max_batch_size):
+            sender = asyncio.ensure_future(self._send_batch(queued[start:start + self.max_batch_size]))
+            self._senders.add(sender)
+            sender.add_done_callback(self._senders.discard)
+
+    async def _send_batch(self, batch: List[Tuple[RPCEndpoint, Any, asyncio.Future]]):
+        if len(batch) == 1 or not self.batching_supported:
+            await asyncio.gather(*(self._send_single(*item) for item in batch))
+            return
+
+        requests = {}
+        for method, params, future in batch:
+            encoded = self.encode_rpc_request(method, params)
+            requests[json.loads(encoded)["id"]] = (encoded, method, params, future)
+        body = b"[" + b",".join(item[0] for item in requests.values()) + b"]"
+
+        self.http_requests += 1
+        self.batches_sent += 1
+        self.batched_calls += len(batch)
+        try:
+            raw = await async_make_post_request(self.endpoint_uri, body, **self.get_request_kwargs())
+            responses = json.loads(raw)
+        except Exception as e:
+            for _, _, _, future in requests.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if not isinstance(responses, list):
+            logging.warning(f"RPC endpoint rejected a JSON-RPC batch ({responses}); disabling batching")
+            self.batching_supported = False
+            await asyncio.gather(*(self._send_single(m, p, f) for _, m, p, f in requests.values()))
+            return
+
+        for response in responses:
+            entry = requests.pop(response.get("id"), None)
+            if entry is not None and not entry[3].done():
+                entry[3].set_result(response)
+        for _, method, _, future in requests.values():
+            if not future.done():
+                future.set_exception(ValueError(f"No response for {method} in JSON-RPC batch"))
+
+    async def _send_single(self, method: RPCEndpoint, params: Any, future: asyncio.Future):
+        self.http_requests += 1
+        try:
+            result = await super().make_request(method, params)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
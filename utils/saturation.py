@@ -0,0 +1,259 @@
+import asyncio
+import json
+import logging
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config.settings import (
+    TARGET_SUCCESS_RATE,
+    TARGET_MAX_LATENCY_SEC,
+    SATURATION_STRATEGY,
+    SATURATION_START_RATE,
+    SATURATION_GROWTH_FACTOR,
+    SATURATION_MAX_RATE,
+    SATURATION_STAGE_SEC,
+    SATURATION_BISECT_STEPS,
+    SATURATION_MAX_IN_FLIGHT,
+    SATURATION_CLIENT_WAIT_SHARE,
+    SATURATION_RATE_TOLERANCE,
+)
+from utils.load_engine import ConstantProfile, OpenLoopScheduler
+from utils.metrics_logger import LOG_DIR
+
+SATURATION_RESULTS_FILE = LOG_DIR / "saturation_results.json"
+
+# Pause between stages so the previous stage's backlog does not leak into the next
+STAGE_COOLDOWN_SEC = 5.0
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (0.0 for an empty list)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class SaturationSearch:
+    """Finds the highest arrival rate each workload sustains within the targets.
+
+    A workload passes a stage when, over ``stage_sec`` of open-loop load at a
+    fixed rate, the share of started operations that succeeded is at least
+    ``target_success_rate`` and the p99 latency of completed operations stays
+    within ``target_p99_sec``. Operations still running ``2 * target_p99_sec``
+    after the stage ends count as failures and are cancelled, so they do not
+    load the next stage.
+
+    A stage is ``client_limited`` when the client, not the system under
+    test, capped the rate; it then ends the search instead of counting as a
+    pass or failure. That is the case if arrivals were shed because
+    ``max_outstanding`` was reached, if operations spent at least
+    ``max_client_wait_share`` of their time in one of the client-side waits
+    reported by ``client_waits`` (cumulative seconds per source, e.g. nonce
+    slots or signing), or if nothing was shed and the success rate was met
+    but fewer operations succeeded than the rate asks for, beyond
+    ``rate_tolerance`` and arrival noise.
+
+    Strategies:
+        staged – multiply the rate by ``growth_factor`` until a stage fails
+        binary – as staged, then bisect between the last passing and the
+                 first failing rate for ``bisect_steps`` more stages
+    """
+
+    def __init__(
+        self,
+        strategy: str = SATURATION_STRATEGY,
+        start_rate: float = SATURATION_START_RATE,
+        growth_factor: float = SATURATION_GROWTH_FACTOR,
+        max_rate: float = SATURATION_MAX_RATE,
+        stage_sec: float = SATURATION_STAGE_SEC,
+        bisect_steps: int = SATURATION_BISECT_STEPS,
+        target_success_rate: float = TARGET_SUCCESS_RATE,
+        target_p99_sec: float = TARGET_MAX_LATENCY_SEC,
+        max_outstanding: int = SATURATION_MAX_IN_FLIGHT,
+        client_waits: Optional[Callable[[], Dict[str, float]]] = None,
+        max_client_wait_share: float = SATURATION_CLIENT_WAIT_SHARE,
+        rate_tolerance: float = SATURATION_RATE_TOLERANCE,
+    ):
+        if strategy not in ("staged", "binary"):
+            raise ValueError(f"Unknown saturation strategy '{strategy}', expected 'staged' or 'binary'")
+        self.strategy = strategy
+        self.start_rate = start_rate
+        self.growth_factor = growth_factor
+        self.max_rate = max_rate
+        self.stage_sec = stage_sec
+        self.bisect_steps = bisect_steps
+        self.target_success_rate = target_success_rate
+        self.target_p99_sec = target_p99_sec
+        self.max_outstanding = max_outstanding
+        self.client_waits = client_waits
+        self.max_client_wait_share = max_client_wait_share
+        self.rate_tolerance = rate_tolerance
+
+    async def run_stage(self, name: str, operation: Callable[[], Awaitable[Any]], rate: float) -> Dict[str, Any]:
+        """Drive ``operation`` at ``rate`` for one stage and judge the result"""
+        latencies: List[float] = []
+
+        async def timed_operation():
+            start = time.monotonic()
+            result = await operation()
+            latencies.append(time.monotonic() - start)
+            return result
+
+        scheduler = OpenLoopScheduler(
+            f"{name}@{rate:.3f}",
+            timed_operation,
+            ConstantProfile(rate),
+            max_outstanding=self.max_outstanding,
+        )
+        waits_before = self.client_waits() if self.client_waits else {}
+        await scheduler.run(self.stage_sec)
+        unfinished = 0
+        try:
+            await asyncio.wait_for(asyncio.shield(scheduler.drain()), self.target_p99_sec * 2)
+        except asyncio.TimeoutError:
+            # Stragglers count as failures; cancel them so they stop holding
+            # nonces, funds and RPC capacity during the next stage
+            unfinished = await scheduler.cancel_outstanding()
+
+        stats = scheduler.get_stats()
+        success_rate = scheduler.succeeded / scheduler.started if scheduler.started else 0.0
+        p99 = percentile(latencies, 99)
+        achieved_rate = scheduler.succeeded / self.stage_sec
+
+        # Share of the operations' time spent in each client-side wait
+        busy_sec = sum(latencies)
+        waits_after = self.client_waits() if self.client_waits else {}
+        wait_shares = {
+            source: round((waits_after[source] - waits_before.get(source, 0.0)) / busy_sec, 4) if busy_sec else 0.0
+            for source in waits_after
+        }
+        expected = rate * self.stage_sec
+        limits: List[str] = []
+        if scheduler.shed > 0:
+            limits.append(f"{scheduler.shed} arrivals shed at {self.max_outstanding} in flight; "
+                          f"raise SATURATION_MAX_IN_FLIGHT to measure beyond {rate:.3f}/s")
+        for source, share in wait_shares.items():
+            if share >= self.max_client_wait_share:
+                limits.append(f"operations spent {share:.0%} of their time waiting for {source}")
+        if (
+            scheduler.shed == 0
+            and success_rate >= self.target_success_rate
+            # Allow for Poisson arrival noise (3 sigma) on top of the tolerance
+            and scheduler.succeeded < expected * (1 - self.rate_tolerance) - 3 * math.sqrt(expected)
+        ):
+            limits.append(f"achieved {achieved_rate:.3f}/s of {rate:.3f}/s without shedding")
+        client_limited = bool(limits)
+        passed = (
+            not client_limited
+            and success_rate >= self.target_success_rate
+            and p99 <= self.target_p99_sec
+        )
+        stage = {
+            "rate": round(rate, 4),
+            "offered": stats["offered"],
+            "started": stats["started"],
+            "shed": stats["shed"],
+            "succeeded": stats["succeeded"],
+            "failed": stats["failed"],
+            "unfinished": unfinished,
+            "success_rate": round(success_rate, 4),
+            "achieved_rate": round(achieved_rate, 4),
+            "client_wait_share": wait_shares,
+            "p50_latency_sec": round(percentile(latencies, 50), 4),
+            "p99_latency_sec": round(p99, 4),
+            "client_limited": client_limited,
+            "client_limits": limits,
+            "passed": passed,
+        }
+        verdict = "CLIENT LIMIT" if client_limited else ("PASS" if passed else "FAIL")
+        logging.info(
+            f"SATURATION | {name} | rate {rate:.3f}/s | success {success_rate:.1%} | "
+            f"p99 {p99:.2f}s | shed {scheduler.shed} | {verdict}"
+        )
+        for limit in limits:
+            logging.warning(f"SATURATION | {name} | client-limited: {limit}")
+        await asyncio.sleep(STAGE_COOLDOWN_SEC)
+        return stage
+
+    async def search(self, name: str, operation: Callable[[], Awaitable[Any]]) -> Dict[str, Any]:
+        """Search the knee for a single workload"""
+        stages: List[Dict[str, Any]] = []
+        best: Optional[float] = None
+        failing: Optional[float] = None
+        client_limited_at: Optional[float] = None
+
+        rate = self.start_rate
+        while rate <= self.max_rate:
+            stage = await self.run_stage(name, operation, rate)
+            stages.append(stage)
+            if stage["client_limited"]:
+                client_limited_at = rate
+                break
+            if not stage["passed"]:
+                failing = rate
+                break
+            best = rate
+            rate *= self.growth_factor
+
+        if self.strategy == "binary" and failing is not None:
+            low, high = (best or 0.0), failing
+            for _ in range(self.bisect_steps):
+                mid = (low + high) / 2
+                if mid <= 0:
+                    break
+                stage = await self.run_stage(name, operation, mid)
+                stages.append(stage)
+                if stage["client_limited"]:
+                    client_limited_at = mid
+                    break
+                if stage["passed"]:
+                    low = best = mid
+                else:
+                    high = mid
+
+        return {
+            "workload": name,
+            "max_sustainable_rate": round(best, 4) if best is not None else 0.0,
+            "first_failing_rate": round(failing, 4) if failing is not None else None,
+            "reached_max_rate": failing is None and client_limited_at is None,
+            # Set when a client-side limit stopped the search: the system
+            # under test was not shown to fail at this rate
+            "client_limited_at": round(client_limited_at, 4) if client_limited_at is not None else None,
+            "stages": stages,
+        }
+
+    async def run(self, workloads: Dict[str, Callable[[], Awaitable[Any]]]) -> Dict[str, Any]:
+        """Search every workload in turn and write a machine-readable report"""
+        report = {
+            "started_at": datetime.now().isoformat(),
+            "strategy": self.strategy,
+            "stage_sec": self.stage_sec,
+            "targets": {
+                "success_rate": self.target_success_rate,
+                "p99_latency_sec": self.target_p99_sec,
+            },
+            "max_in_flight": self.max_outstanding,
+            "workloads": {},
+        }
+        for name, operation in workloads.items():
+            logging.info(f"SATURATION | searching {name} ({self.strategy})")
+            report["workloads"][name] = await self.search(name, operation)
+        report["finished_at"] = datetime.now().isoformat()
+
+        write_report(report)
+        for name, result in report["workloads"].items():
+            note = " (client-side limit reached)" if result["client_limited_at"] is not None else ""
+            logging.info(f"SATURATION | {name} | max sustainable rate {result['max_sustainable_rate']}/s{note}")
+        return report
+
+
+def write_report(report: Dict[str, Any], path: Path = SATURATION_RESULTS_FILE):
+    """Write the saturation report as JSON"""
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"Saturation results written to {path}")
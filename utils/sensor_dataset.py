@@ -0,0 +1,165 @@
+import csv
+import math
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+def _format_number(value: float, default: Any) -> Any:
+    """A numeric cell as text: whole numbers without a decimal point, NaN (empty) as ``default``"""
+    if value != value:
+        return default
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class SensorDataset:
+    """A CSV dataset held as typed columns, parsed once at load.
+
+    A column whose non-empty cells all parse as numbers is stored as an
+    ``array('d')`` (empty cells become NaN); any other column, and every
+    column named in ``text_columns`` (identifiers such as product codes that
+    may happen to look numeric), is categorical: an ``array('I')`` of codes
+    into a list of interned distinct values. Each column also has a NumPy
+    view sharing its buffer, so single readings index the arrays directly (:meth:`number`,
+    :meth:`text`) and batches index the views with a row array
+    (:meth:`numbers`, :meth:`texts`) without converting anything per row.
+    """
+
+    def __init__(self, header: Sequence[str], rows: Iterable[Sequence[Any]], text_columns: Iterable[str] = ()):
+        raw: List[List[Any]] = [[] for _ in header]
+        for row in rows:
+            for values, value in zip(raw, row):
+                values.append(value)
+            # Short rows (csv.reader) are padded with empty cells
+            for values in raw[len(row):]:
+                values.append("")
+        self.length = len(raw[0]) if raw else 0
+        self.numeric: Dict[str, array] = {}
+        self.codes: Dict[str, array] = {}
+        self.categories: Dict[str, List[str]] = {}
+        self._views: Dict[str, np.ndarray] = {}
+        self._category_arrays: Dict[str, np.ndarray] = {}
+        # Numeric columns with empty cells
+        self._missing: Set[str] = set()
+        self._filled: Dict[Tuple[str, float], np.ndarray] = {}
+        text_columns = set(text_columns)
+        for name, values in zip(header, raw):
+            parsed = None if name in text_columns else self._parse_numbers(values)
+            if parsed is not None:
+                self.numeric[name] = parsed
+                if any(value != value for value in parsed):
+                    self._missing.add(name)
+                self._views[name] = np.frombuffer(parsed, dtype=np.float64) if len(parsed) else np.zeros(0)
+            else:
+                self._intern(name, values)
+
+    @classmethod
+    def from_csv(cls, path: Path, text_columns: Iterable[str] = ()) -> "SensorDataset":
+        with open(path, "r", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            return cls(header, reader, text_columns)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]], text_columns: Iterable[str] = ()) -> "SensorDataset":
+        header = list(records[0]) if records else []
+        return cls(header, ([record.get(name, "") for name in header] for record in records), text_columns)
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def columns(self) -> List[str]:
+        return [*self.numeric, *self.codes]
+
+    # ------------------------------------------------------------------
+    # Single rows
+    # ------------------------------------------------------------------
+
+    def number(self, name: str, row: int, default: float) -> float:
+        """Numeric cell, or ``default`` if the column is missing, categorical or the cell empty"""
+        column = self.numeric.get(name)
+        if column is None:
+            return default
+        value = column[row]
+        return default if value != value else value
+
+    def text(self, name: str, row: int, default: Any = None) -> Any:
+        """Cell as a string (numeric cells are formatted back), or ``default`` if missing or empty"""
+        codes = self.codes.get(name)
+        if codes is None:
+            column = self.numeric.get(name)
+            return _format_number(column[row], default) if column is not None else default
+        value = self.categories[name][codes[row]]
+        return value if value != "" else default
+
+    # ------------------------------------------------------------------
+    # Batches
+    # ------------------------------------------------------------------
+
+    def numbers(self, name: str, default: float) -> np.ndarray:
+        """Whole numeric column (float64, read-only use) with missing cells set to ``default``"""
+        view = self._views.get(name)
+        if view is not None and name not in self._missing:
+            return view
+        key = (name, default)
+        filled = self._filled.get(key)
+        if filled is None:
+            if view is None:
+                filled = np.full(self.length, default, dtype=np.float64)
+            else:
+                filled = np.where(np.isnan(view), default, view)
+            self._filled[key] = filled
+        return filled
+
+    def texts(self, name: str, rows: np.ndarray, default: Any = None) -> List[Any]:
+        """Cells at ``rows`` as strings, like :meth:`text` (empty cells as ``default``)"""
+        codes = self.codes.get(name)
+        if codes is None:
+            view = self._views.get(name)
+            if view is not None:
+                return [_format_number(value, default) for value in view[rows].tolist()]
+            return [default] * len(rows)
+        categories = self._category_arrays.get(name)
+        if categories is None:
+            categories = np.array([c if c != "" else default for c in self.categories[name]], dtype=object)
+            self._category_arrays[name] = categories
+        return categories[np.frombuffer(codes, dtype=f"u{codes.itemsize}")[rows]].tolist()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _parse_numbers(values: List[Any]) -> Optional[array]:
+        column = array("d")
+        for value in values:
+            if isinstance(value, (int, float)):
+                column.append(value)
+                continue
+            text = value.strip() if isinstance(value, str) else ""
+            if not text:
+                column.append(math.nan)
+                continue
+            try:
+                column.append(float(text))
+            except ValueError:
+                return None
+        return column
+
+    def _intern(self, name: str, values: List[Any]):
+        lookup: Dict[str, int] = {}
+        categories: List[str] = []
+        codes = array("I")
+        for value in values:
+            value = "" if value is None else str(value)
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(categories)
+                categories.append(sys.intern(value))
+            codes.append(code)
+        self.codes[name] = codes
+        self.categories[name] = categories
@@ -0,0 +1,266 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import SHARD_REPORT_SEC
+from utils.latency_histogram import LatencyHistogram
+from utils.rolling_window import merge_window_counters
+
+# Load-stat fields that add up across shards
+_SUMMED_LOAD_FIELDS = (
+    "target_rate",
+    "offered_rate",
+    "achieved_rate",
+    "completed_rate",
+    "offered",
+    "started",
+    "shed",
+    "skipped",
+    "completed",
+    "succeeded",
+    "failed",
+    "in_flight",
+)
+
+
+def merge_load_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine ``OpenLoopScheduler.get_stats()`` of one workload across shards"""
+    merged = dict(stats[0])
+    for field in _SUMMED_LOAD_FIELDS:
+        merged[field] = round(sum(s[field] for s in stats), 3)
+    merged["paused"] = any(s["paused"] for s in stats)
+    completed = merged["completed"]
+    merged["success_rate"] = round(merged["succeeded"] / completed, 4) if completed else 0.0
+    merged["avg_latency_sec"] = (
+        round(sum(s["avg_latency_sec"] * s["completed"] for s in stats) / completed, 4) if completed else 0.0
+    )
+    return merged
+
+
+def merge_signing_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine ``SignAheadPipeline.get_stats()`` across shards"""
+    merged = dict(stats[0])
+    for field in ("queued", "taken", "queue_hits", "resigned", "signed"):
+        merged[field] = sum(s[field] for s in stats)
+    merged["queue_hit_rate"] = round(merged["queue_hits"] / merged["taken"], 4) if merged["taken"] else 0.0
+    return merged
+
+
+# Breaker / retry-budget counters that add up across shards; the other
+# fields are per-shard gauges
+_SUMMED_BREAKER_FIELDS = ("opened", "shed", "retries", "retries_denied")
+_BREAKER_GAUGE_FIELDS = ("state", "consecutive_failures", "tokens")
+
+
+def merge_breaker_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine ``LcoreClient.get_breaker_stats()`` across shards.
+
+    Counters are summed. Each shard has its own breaker and budget, so their
+    gauges are not: ``state`` is the most open one, ``consecutive_failures``
+    the highest, ``tokens`` the lowest (the shard closest to running out of
+    retries), and ``shards`` lists every shard's own values.
+    """
+    stats = [s for s in stats if s]
+    if not stats:
+        return {}
+    merged: Dict[str, Any] = {field: sum(s[field] for s in stats) for field in _SUMMED_BREAKER_FIELDS if field in stats[0]}
+    if "state" in stats[0]:
+        severity = {"closed": 0, "half_open": 1, "open": 2}
+        merged["state"] = max((s["state"] for s in stats), key=severity.get)
+        merged["consecutive_failures"] = max(s["consecutive_failures"] for s in stats)
+    if "tokens" in stats[0]:
+        merged["tokens"] = min(s["tokens"] for s in stats)
+    merged["shards"] = [{field: s[field] for field in _BREAKER_GAUGE_FIELDS if field in s} for s in stats]
+    return merged
+
+
+def merge_receipt_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine ``ReceiptTracker.get_stats()`` across shards (each shard follows the chain itself)"""
+    merged = dict(stats[0])
+    for field in ("pending", "blocks_processed", "receipts_resolved", "rpc_calls"):
+        merged[field] = sum(s[field] for s in stats)
+    blocks = [s["last_block"] for s in stats if s["last_block"] is not None]
+    merged["last_block"] = max(blocks) if blocks else None
+    merged["push_heads"] = all(s["push_heads"] for s in stats)
+    return merged
+
+
+def merge_fee_stats(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine ``FeeOracle.get_stats()`` across shards.
+
+    Counters are summed; ``params`` are the freshest shard's quote and
+    ``staleness_sec`` the stalest shard's age.
+    """
+    fetched = [s for s in stats if s["staleness_sec"] is not None]
+    merged = dict(min(fetched, key=lambda s: s["staleness_sec"]) if fetched else stats[0])
+    for field in ("hits", "misses", "refreshes", "refresh_errors", "head_updates"):
+        merged[field] = sum(s[field] for s in stats)
+    lookups = merged["hits"] + merged["misses"]
+    merged["hit_rate"] = round(merged["hits"] / lookups, 4) if lookups else 0.0
+    merged["staleness_sec"] = max(s["staleness_sec"] for s in fetched) if fetched else None
+    return merged
+
+
+def merge_latency_histograms(snapshots: List[Dict[Any, Dict[str, Any]]]) -> Dict[Any, Dict[str, Any]]:
+    """Combine histograms in compact form (e.g. ``IoTMetricsTracker.get_latency_histograms()``) across shards"""
+    merged: Dict[Any, LatencyHistogram] = {}
+    for snapshot in snapshots:
+        for operation, data in snapshot.items():
+            merged.setdefault(operation, LatencyHistogram()).merge(LatencyHistogram.from_dict(data))
+    return {operation: histogram.to_dict() for operation, histogram in merged.items()}
+
+
+def merge_rolling_counters(snapshots: List[Dict[str, Dict[str, Dict[str, Any]]]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Combine ``IoTMetricsTracker.get_rolling_counters()`` across shards"""
+    grouped: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    for snapshot in snapshots:
+        for operation, windows in snapshot.items():
+            for label, counters in windows.items():
+                grouped.setdefault(operation, {}).setdefault(label, []).append(counters)
+    return {
+        operation: {label: merge_window_counters(counters) for label, counters in windows.items()}
+        for operation, windows in grouped.items()
+    }
+
+
+def _sum_counters(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    total: Dict[str, Any] = {}
+    for snapshot in snapshots:
+        for key, value in snapshot.items():
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+async def report_forever(reports: "multiprocessing.Queue", shard_index: int, collect: Callable[[], Dict[str, Any]],
+                         interval_sec: float = SHARD_REPORT_SEC):
+    """Send this shard's counters to the launcher every ``interval_sec`` (worker side)"""
+    while True:
+        await asyncio.sleep(interval_sec)
+        try:
+            reports.put_nowait({"shard": shard_index, **collect()})
+        except Exception as e:
+            logging.error(f"Shard {shard_index}: failed to report counters: {e}")
+
+
+class ShardLauncher:
+    """Runs the simulator as ``workers`` shard processes and aggregates their counters.
+
+    Each worker is a fresh interpreter (``spawn``) started with ``SHARD_INDEX``
+    and ``SHARD_COUNT`` in its environment, which the settings, wallet manager,
+    device simulator and load engine use to pick the shard's disjoint slice of
+    wallets, devices and arrival rate. Workers push counter snapshots through a
+    ``multiprocessing`` queue; the launcher keeps the latest snapshot per shard
+    and hands the fleet-wide totals to ``on_totals``.
+
+    Snapshots are dicts of:
+        dapp     – per-module success counts (metrics_logger)
+        dapp_status – per-(module, status) transaction counts (metrics_logger)
+        iot      – IoTMetricsTracker counters
+        latency  – IoTMetricsTracker latency histograms
+        rolling  – IoTMetricsTracker rolling-window counters
+        lcore_phases – LcoreClient per-phase request histograms
+        lcore_limiter – LcoreClient concurrency limiter stats (summed: fleet-wide limit and queue)
+        lcore_breaker – LcoreClient circuit breaker and retry budget stats
+        receipts – ReceiptTracker stats
+        fees     – FeeOracle stats
+        wallets  – balance ledger of the shard's wallets (disjoint across shards)
+        load     – list of OpenLoopScheduler stats
+        signing  – SignAheadPipeline stats
+        rpc      – RPC calls by method (web3_async provider)
+    """
+
+    def __init__(self, worker: Callable[["multiprocessing.Queue"], None], workers: int):
+        self.worker = worker
+        self.workers = workers
+        self._context = multiprocessing.get_context("spawn")
+        self.reports = self._context.Queue()
+        self.processes: List[multiprocessing.Process] = []
+        self.snapshots: Dict[int, Dict[str, Any]] = {}
+        self.last_report_at: Dict[int, float] = {}
+
+    def start(self):
+        """Start all worker processes"""
+        for index in range(self.workers):
+            # Spawned children inherit the environment at start() time
+            os.environ["SHARD_INDEX"] = str(index)
+            os.environ["SHARD_COUNT"] = str(self.workers)
+            try:
+                # Not daemonic: shards may start their own signing pool, and
+                # daemonic processes cannot have children. stop() ends them.
+                process = self._context.Process(
+                    target=self.worker, args=(self.reports,), name=f"shard-{index}"
+                )
+                process.start()
+            finally:
+                del os.environ["SHARD_INDEX"]
+                del os.environ["SHARD_COUNT"]
+            self.processes.append(process)
+            logging.info(f"Started shard {index + 1}/{self.workers} (pid {process.pid})")
+
+    async def supervise(self, on_totals: Optional[Callable[[Dict[str, Any]], None]] = None,
+                        interval_sec: float = SHARD_REPORT_SEC):
+        """Collect snapshots until every worker has exited"""
+        reported_exit = set()
+        while True:
+            self._drain_reports()
+            if on_totals is not None and self.snapshots:
+                on_totals(self.get_totals())
+
+            for index, process in enumerate(self.processes):
+                if process.exitcode is not None and index not in reported_exit:
+                    reported_exit.add(index)
+                    logging.error(f"Shard {index} exited with code {process.exitcode}")
+            if len(reported_exit) == len(self.processes):
+                return
+            await asyncio.sleep(interval_sec)
+
+    def get_totals(self) -> Dict[str, Any]:
+        """Fleet-wide totals over the latest snapshot of every shard"""
+        snapshots = [self.snapshots[i] for i in sorted(self.snapshots)]
+        load_by_name: Dict[str, List[Dict[str, Any]]] = {}
+        for snapshot in snapshots:
+            for stats in snapshot["load"]:
+                load_by_name.setdefault(stats["name"], []).append(stats)
+        now = time.monotonic()
+        return {
+            "shards_reporting": len(snapshots),
+            "shards_stale": sum(1 for t in self.last_report_at.values() if now - t > 5 * SHARD_REPORT_SEC),
+            "dapp": _sum_counters([s["dapp"] for s in snapshots]),
+            "dapp_status": _sum_counters([s["dapp_status"] for s in snapshots]),
+            "iot": _sum_counters([s["iot"] for s in snapshots]),
+            "latency": merge_latency_histograms([s["latency"] for s in snapshots]),
+            "rolling": merge_rolling_counters([s["rolling"] for s in snapshots]),
+            "lcore_phases": merge_latency_histograms([s["lcore_phases"] for s in snapshots]),
+            "lcore_limiter": _sum_counters([s["lcore_limiter"] for s in snapshots]),
+            "lcore_breaker": merge_breaker_stats([s["lcore_breaker"] for s in snapshots]),
+            "receipts": merge_receipt_stats([s["receipts"] for s in snapshots]),
+            "fees": merge_fee_stats([s["fees"] for s in snapshots]),
+            "wallets": {address: entry for s in snapshots for address, entry in s["wallets"].items()},
+            "load": [merge_load_stats(stats) for stats in load_by_name.values()],
+            "signing": merge_signing_stats([s["signing"] for s in snapshots]),
+            "rpc": _sum_counters([s["rpc"] for s in snapshots]),
+        }
+
+    def stop(self, timeout_sec: float = 10.0):
+        """Stop all workers, forcibly after ``timeout_sec``"""
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout_sec
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+
+    def _drain_reports(self):
+        while True:
+            try:
+                snapshot = self.reports.get_nowait()
+            except queue.Empty:
+                return
+            self.snapshots[snapshot["shard"]] = snapshot
+            self.last_report_at[snapshot["shard"]] = time.monotonic()
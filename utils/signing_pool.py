@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import multiprocessing
+import secrets
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from eth_account import Account
+from web3 import Web3
+
+from config.settings import (
+    CHAIN_ID,
+    SIGNING_WORKERS,
+    PRESIGN_DEPTH,
+    PRESIGN_FEE_TOLERANCE,
+)
+from utils.fee_oracle import fee_oracle, max_fee_per_gas
+from utils.wallet_manager import ManagedWallet, wallet_manager
+
+# Gas limit of a plain native-value transfer
+ETH_TRANSFER_GAS_LIMIT = 21_000
+
+FEE_FIELDS = ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas")
+
+
+def _sign_many(txs: List[Dict[str, Any]], private_key: str) -> List[Tuple[bytes, str]]:
+    """Sign ``txs`` with one key (runs inside a worker process)"""
+    signed = []
+    for tx in txs:
+        result = Account.sign_transaction(tx, private_key)
+        signed.append((bytes(result.rawTransaction), "0x" + bytes(result.hash).hex()))
+    return signed
+
+
+class SigningPool:
+    """Runs secp256k1/RLP transaction signing in worker processes.
+
+    Signing is pure-Python CPU work; doing it on the event loop caps the whole
+    simulator at one core. With ``workers=0`` signing stays inline, which is
+    handy for debugging.
+    """
+
+    def __init__(self, workers: int = SIGNING_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.signed_count = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # The pool starts after writer threads and the event loop are up;
+            # forking a multi-threaded process can deadlock on inherited locks
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def sign_many(self, txs: List[Dict[str, Any]], private_key: str) -> List[Tuple[bytes, str]]:
+        """Sign several transactions of one sender in a single worker round trip.
+
+        Returns:
+            List of (raw_transaction, tx_hash) in the order of ``txs``
+        """
+        if not txs:
+            return []
+        self.signed_count += len(txs)
+        if self.workers <= 0:
+            return _sign_many(txs, private_key)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), _sign_many, txs, private_key)
+
+    async def sign(self, tx: Dict[str, Any], private_key: str) -> Tuple[bytes, str]:
+        """Sign one transaction; returns (raw_transaction, tx_hash)"""
+        return (await self.sign_many([tx], private_key))[0]
+
+    def shutdown(self):
+        """Stop the worker processes (blocks until they have exited).
+
+        Waiting matters in shard processes: there multiprocessing's exit
+        handler closes the pool's call queue before a non-waiting shutdown
+        has told the workers to stop, leaving them blocked forever.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+@dataclass
+class PresignedTx:
+    """A fully built and signed transaction waiting to be submitted"""
+    sender: str
+    nonce: int
+    tx: Dict[str, Any]
+    raw_tx: bytes
+    tx_hash: str
+
+
+class SignAheadPipeline:
+    """Keeps a bounded queue of pre-signed zero-value transfers per wallet.
+
+    Transfers go to fresh throwaway addresses, which is exactly what the
+    payment, merchant and lending workloads send, so they can be built with
+    locally allocated nonces and cached fees and signed in the process pool
+    before anyone asks for them. :meth:`take` hands out the oldest ready
+    transaction and tops the queue back up to ``depth`` in the background;
+    the caller only has to submit the raw bytes.
+
+    Queued transactions hold their nonces. A transaction whose fee cap fell
+    below ``fee_tolerance`` of the current quote is re-signed with the same
+    nonce when taken. :meth:`flush` hands every queued nonce of a wallet back
+    (newest first) after its submissions started failing.
+    """
+
+    def __init__(self, pool: SigningPool, depth: int = PRESIGN_DEPTH, fee_tolerance: float = PRESIGN_FEE_TOLERANCE):
+        self.pool = pool
+        self.depth = depth
+        self.fee_tolerance = fee_tolerance
+        self._queues: Dict[str, Deque[PresignedTx]] = {}
+        self._refills: Dict[str, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Counters
+        self.taken = 0
+        self.queue_hits = 0
+        self.resigned = 0
+        # Time callers spent in take() waiting for a signed transaction
+        self.wait_sec = 0.0
+
+    async def take(self, wallet: ManagedWallet) -> PresignedTx:
+        """Return the next ready transaction of ``wallet`` (signing one if none is queued)"""
+        started = time.monotonic()
+        queue = self._queues.setdefault(wallet.address, deque())
+        self.taken += 1
+        refill = self._refills.get(wallet.address)
+        if not queue and refill is not None and not refill.done():
+            # A batch is already being signed – waiting is cheaper than signing another
+            await asyncio.shield(refill)
+        if queue:
+            self.queue_hits += 1
+            item = queue.popleft()
+        else:
+            item = (await self._build_and_sign(wallet, 1))[0]
+        self._schedule_refill(wallet)
+
+        fees = await fee_oracle.get_fee_params()
+        if max_fee_per_gas(item.tx) < max_fee_per_gas(fees) * self.fee_tolerance:
+            item = await self._resign(wallet, item, fees)
+        self.wait_sec += time.monotonic() - started
+        return item
+
+    def flush(self, address: str):
+        """Drop all queued transactions of ``address`` and hand their nonces back"""
+        queue = self._queues.get(address)
+        if not queue:
+            return
+        for item in sorted(queue, key=lambda i: i.nonce, reverse=True):
+            wallet_manager.nonce_manager.discard(address, item.nonce)
+        queue.clear()
+
+    def queued(self, address: str) -> int:
+        return len(self._queues.get(address, ()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        return {
+            "depth": self.depth,
+            "queued": sum(len(q) for q in self._queues.values()),
+            "taken": self.taken,
+            "queue_hits": self.queue_hits,
+            "queue_hit_rate": round(self.queue_hits / self.taken, 4) if self.taken else 0.0,
+            "resigned": self.resigned,
+            "signed": self.pool.signed_count,
+            "wait_sec": round(self.wait_sec, 3),
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _schedule_refill(self, wallet: ManagedWallet):
+        if self.depth <= 0:
+            return
+        task = self._refills.get(wallet.address)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._refill(wallet))
+        self._refills[wallet.address] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refill(self, wallet: ManagedWallet):
+        queue = self._queues.setdefault(wallet.address, deque())
+        missing = self.depth - len(queue)
+        if missing <= 0:
+            return
+        try:
+            queue.extend(await self._build_and_sign(wallet, missing))
+        except Exception as e:
+            logging.warning(f"Pre-signing for {wallet.label} failed: {e}")
+
+    async def _build_and_sign(self, wallet: ManagedWallet, count: int) -> List[PresignedTx]:
+        nonces = wallet_manager.nonce_manager
+        fees = await fee_oracle.get_fee_params()
+        allocated: List[int] = []
+        try:
+            for _ in range(count):
+                allocated.append(await nonces.allocate(wallet.address))
+            txs = [
+                {
+                    "chainId": CHAIN_ID,
+                    "nonce": nonce,
+                    "gas": ETH_TRANSFER_GAS_LIMIT,
+                    "to": Web3.to_checksum_address("0x" + secrets.token_hex(20)),
+                    "value": 0,
+                    **fees,
+                }
+                for nonce in allocated
+            ]
+            signed = await self.pool.sign_many(txs, wallet.private_key)
+        except BaseException:
+            for nonce in reversed(allocated):
+                nonces.discard(wallet.address, nonce)
+            raise
+        return [
+            PresignedTx(wallet.address, tx["nonce"], tx, raw_tx, tx_hash)
+            for tx, (raw_tx, tx_hash) in zip(txs, signed)
+        ]
+
+    async def _resign(self, wallet: ManagedWallet, item: PresignedTx, fees: Dict[str, int]) -> PresignedTx:
+        tx = {k: v for k, v in item.tx.items() if k not in FEE_FIELDS}
+        tx.update(fees)
+        try:
+            raw_tx, tx_hash = await self.pool.sign(tx, wallet.private_key)
+        except BaseException:
+            wallet_manager.nonce_manager.discard(wallet.address, item.nonce)
+            raise
+        self.resigned += 1
+        return PresignedTx(item.sender, item.nonce, tx, raw_tx, tx_hash)
+
+
+# Global signing pool and pre-signing pipeline
+signing_pool = SigningPool()
+presign_pipeline = SignAheadPipeline(signing_pool)
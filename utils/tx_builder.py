@@ -1,12 +1,19 @@
-import time
-from typing import Tuple, Optional
+import asyncio
+from typing import Tuple
 
-from web3 import Web3
-from web3.exceptions import ContractLogicError, TransactionNotFound
+from web3.exceptions import ContractLogicError, TimeExhausted, TransactionNotFound
 from web3.types import TxReceipt, TxParams
 
-from config.settings import web3_http as w3, CHAIN_ID, DEFAULT_GAS_LIMIT, FIXED_GAS_PRICE_WEI, get_account
-from utils.wallet_manager import ManagedWallet  # type: ignore
+from config.settings import (
+    web3_async as w3,
+    CHAIN_ID,
+    DEFAULT_GAS_LIMIT,
+    TX_RECEIPT_TIMEOUT_SEC,
+)
+from utils.wallet_manager import ManagedWallet, wallet_manager  # type: ignore
+from utils.receipt_tracker import receipt_tracker
+from utils.fee_oracle import fee_oracle, max_fee_per_gas
+from utils.signing_pool import presign_pipeline
 
 
 class TxSendError(Exception):
@@ -14,64 +21,109 @@ class TxSendError(Exception):
 
 
 async def build_base_tx(sender: str) -> TxParams:  # type: ignore[type-arg]
-    """Generate a base transaction dict with nonce, gas limit, and gas price."""
-    nonce = w3.eth.get_transaction_count(sender)
-    gas_price = (
-        FIXED_GAS_PRICE_WEI if FIXED_GAS_PRICE_WEI > 0 else w3.eth.gas_price  # simplistic for demo
+    """Generate a base transaction dict with nonce, gas limit, and fee fields.
+
+    The nonce is allocated locally by ``wallet_manager.nonce_manager``; the
+    caller owns it and must pass it to :func:`submit_raw_tx`, or hand it back
+    with ``nonce_manager.discard`` if the transaction is never submitted. Fee
+    fields (``gasPrice`` or the EIP-1559 pair) come from the shared fee oracle.
+    """
+    # Independent calls – issue them together instead of back to back
+    nonce, fee_params = await asyncio.gather(
+        wallet_manager.nonce_manager.allocate(sender),
+        fee_oracle.get_fee_params(),
     )
     return {
         "chainId": CHAIN_ID,
         "nonce": nonce,
         "gas": DEFAULT_GAS_LIMIT,
-        "gasPrice": gas_price,
+        **fee_params,
     }
 
 
-async def send_eth(to_address: str, amount_wei: int, wallet: Optional[ManagedWallet] = None) -> Tuple[str, TxReceipt, float]:
-    """Send native ETH transfer as simple stress tx."""
-    if wallet is None:
-        account = get_account()
-        sender = account.address
-        pk = account.key
-    else:
-        sender = wallet.address
-        pk = wallet.private_key
-
-    # Use the minimal gas required for a native ETH transfer (21,000) instead of the
-    # global DEFAULT_GAS_LIMIT which is tuned for complex contract calls.
-    ETH_TRANSFER_GAS_LIMIT = 21_000
-
-    base_tx = await build_base_tx(sender)
-
-    tx: TxParams = {
-        **base_tx,  # type: ignore[arg-type]
-        "to": Web3.to_checksum_address(to_address),
-        "value": amount_wei,
-        "gas": ETH_TRANSFER_GAS_LIMIT,
-    }
-
-    signed = w3.eth.account.sign_transaction(tx, pk)
-
-    # Quick balance check to avoid obvious failures
-    balance = w3.eth.get_balance(sender)
-    estimated_total_cost = tx["value"] + tx["gas"] * tx["gasPrice"]
-    if balance < estimated_total_cost:
-        raise TxSendError(
-            f"Insufficient balance: need {estimated_total_cost} wei, have {balance} wei"
-        )
+async def submit_raw_tx(sender: str, nonce: int, raw_tx: bytes):
+    """Submit a signed transaction, handing its nonce back on failure.
 
+    On success the nonce stays allocated until the caller calls
+    ``nonce_manager.confirm`` (normally once the receipt is in).
+    """
+    nonces = wallet_manager.nonce_manager
     try:
-        tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
+        return await w3.eth.send_raw_transaction(raw_tx)
     except ValueError as exc:
+        nonces.discard(sender, nonce, exc)
         # Wrap lower-level exceptions so callers handle uniformly
         raise TxSendError(f"Submission error: {exc}") from exc
-
-    start = time.time()
+    except BaseException:
+        nonces.discard(sender, nonce)
+        raise
+
+
+async def _reserve_funds(sender: str, cost_wei: int) -> int:
+    """Check the sender can pay ``cost_wei``; returns the amount reserved in the ledger.
+
+    Managed wallets are checked against the local ledger; other senders still
+    ask the node.
+    """
+    if sender in wallet_manager.wallets:
+        if not await wallet_manager.reserve_funds(sender, cost_wei):
+            spendable = wallet_manager.wallets[sender].spendable_wei
+            raise TxSendError(f"Insufficient balance: need {cost_wei} wei, have {spendable} wei")
+        return cost_wei
+    balance = await w3.eth.get_balance(sender)
+    if balance < cost_wei:
+        raise TxSendError(f"Insufficient balance: need {cost_wei} wei, have {balance} wei")
+    return 0
+
+
+async def _submit_and_confirm(sender: str, tx: TxParams, raw_tx: bytes, reserved_wei: int) -> Tuple[str, TxReceipt, float]:
+    """Submit a signed transaction, wait for its receipt and settle the ledger"""
+    nonces = wallet_manager.nonce_manager
+    nonce = tx["nonce"]
+    try:
+        tx_hash = await submit_raw_tx(sender, nonce, raw_tx)
+    except BaseException:
+        wallet_manager.settle_funds(sender, reserved_wei)
+        raise
 
     try:
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-    except (TransactionNotFound, ContractLogicError) as exc:
+        # Latency is measured at block granularity by the shared tracker
+        receipt, latency = await receipt_tracker.wait_for_receipt(tx_hash, timeout=TX_RECEIPT_TIMEOUT_SEC)
+    except (TransactionNotFound, ContractLogicError, TimeExhausted) as exc:
+        # Outcome unknown – drop the reservation and let reconciliation fix the ledger
+        wallet_manager.settle_funds(sender, reserved_wei)
         raise TxSendError(f"Transaction failed: {exc}")
+    finally:
+        nonces.confirm(sender, nonce)
+
+    spent_wei = receipt.gasUsed * receipt.get("effectiveGasPrice", max_fee_per_gas(tx))  # type: ignore[attr-defined]
+    if receipt.status == 1:  # type: ignore[attr-defined]
+        spent_wei += tx["value"]
+        wallet_manager.credit_funds(tx["to"], tx["value"])
+    wallet_manager.settle_funds(sender, reserved_wei, spent_wei)
+    wallet_manager.record_transaction(sender, receipt.gasUsed)  # type: ignore[attr-defined]
+    return receipt.transactionHash.hex(), receipt, latency  # type: ignore[attr-defined]
+
+
+async def send_presigned_transfer(wallet: ManagedWallet) -> Tuple[str, TxReceipt, float]:
+    """Send a zero-value transfer from ``wallet`` to a throwaway address.
+
+    The transaction comes ready-signed from ``presign_pipeline``, so the hot
+    path is one ledger reservation and ``eth_sendRawTransaction``. If it fails,
+    the wallet's other queued transactions are dropped as well – their nonces
+    may now sit behind a gap.
+    """
+    item = await presign_pipeline.take(wallet)
+    tx = item.tx
+    try:
+        reserved_wei = await _reserve_funds(wallet.address, tx["gas"] * max_fee_per_gas(tx))
+    except BaseException:
+        wallet_manager.nonce_manager.discard(wallet.address, item.nonce)
+        presign_pipeline.flush(wallet.address)
+        raise
 
-    latency = time.time() - start
-    return receipt.transactionHash.hex(), receipt, latency  # type: ignore[attr-defined] 
\ No newline at end of file
+    try:
+        return await _submit_and_confirm(wallet.address, tx, item.raw_tx, reserved_wei)
+    except TxSendError:
+        presign_pipeline.flush(wallet.address)
+        raise
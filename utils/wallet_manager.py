@@ -1,14 +1,22 @@
+import asyncio
 import csv
 import os
 import secrets
+import time
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Set, Optional
 from dataclasses import dataclass
 from enum import Enum
 from datetime import datetime
 
-from web3 import Web3
-from config.settings import web3_http as w3, CHAIN_ID
+from config.settings import (
+    web3_http as w3,
+    web3_async,
+    MAX_PENDING_TX_PER_WALLET,
+    BALANCE_RECONCILE_SEC,
+    SHARD_INDEX,
+    SHARD_COUNT,
+)
 
 
 class WalletType(Enum):
@@ -34,6 +42,157 @@ class ManagedWallet:
     total_transactions: int = 0
     total_gas_used: int = 0
     created_at: str = ""
+    # In-memory balance ledger (not persisted). ``balance_wei`` is the last
+    # known confirmed balance, ``reserved_wei`` the estimated cost of this
+    # wallet's transactions that are sent but not yet mined. ``ledger_updates``
+    # counts local reserve/settle/credit operations so a balance read can tell
+    # whether the ledger moved while it was in flight.
+    balance_wei: Optional[int] = None
+    reserved_wei: int = 0
+    ledger_updates: int = 0
+
+    @property
+    def spendable_wei(self) -> Optional[int]:
+        """Confirmed balance minus outstanding reservations (None until synced)"""
+        if self.balance_wei is None:
+            return None
+        return self.balance_wei - self.reserved_wei
+
+
+# Node error fragments that mean our local nonce view disagrees with the chain
+NONCE_ERROR_MARKERS = (
+    "nonce too low",
+    "nonce too high",
+    "already known",
+    "replacement transaction underpriced",
+    "invalid nonce",
+)
+
+
+def is_nonce_error(error: Exception) -> bool:
+    """Return True if a submission error was caused by a stale or conflicting nonce"""
+    message = str(error).lower()
+    return any(marker in message for marker in NONCE_ERROR_MARKERS)
+
+
+class NonceManager:
+    """Allocates transaction nonces locally, one counter per sender address.
+
+    Each sender is seeded once from the node's ``pending`` transaction count;
+    afterwards nonces are handed out from memory so several transactions from
+    the same wallet can be in flight together. Every allocated nonce must be
+    handed back through :meth:`confirm` (the node accepted the transaction) or
+    :meth:`discard` (it never made it into the pool). Bookkeeping is per
+    address, so a resync of one wallet never blocks the others.
+    """
+
+    def __init__(self, wallets: Dict[str, ManagedWallet], max_pending_per_wallet: int = MAX_PENDING_TX_PER_WALLET):
+        self.wallets = wallets
+        self.max_pending_per_wallet = max_pending_per_wallet
+        self._next_nonce: Dict[str, int] = {}
+        self._in_flight: Dict[str, Set[int]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._needs_resync: Set[str] = set()
+        self.resync_count = 0
+        # Time allocations spent waiting for a free per-wallet slot
+        self.slot_wait_sec = 0.0
+        self.slot_waits = 0
+
+    def _lock(self, address: str) -> asyncio.Lock:
+        if address not in self._locks:
+            self._locks[address] = asyncio.Lock()
+        return self._locks[address]
+
+    def _slot(self, address: str) -> asyncio.Semaphore:
+        if address not in self._slots:
+            self._slots[address] = asyncio.Semaphore(self.max_pending_per_wallet)
+        return self._slots[address]
+
+    def _set_next(self, address: str, nonce: int):
+        self._next_nonce[address] = nonce
+        if address in self.wallets:
+            self.wallets[address].nonce = nonce
+
+    async def _seed(self, address: str):
+        """(Re)load the next nonce for ``address`` from the node's pending pool"""
+        chain_nonce = await web3_async.eth.get_transaction_count(address, "pending")
+        self._set_next(address, chain_nonce)
+        self._needs_resync.discard(address)
+
+    async def allocate(self, address: str) -> int:
+        """Reserve the next nonce for ``address``.
+
+        Waits while ``max_pending_per_wallet`` nonces of this sender are still
+        outstanding.
+        """
+        slot = self._slot(address)
+        if slot.locked():
+            self.slot_waits += 1
+            waited = time.monotonic()
+            await slot.acquire()
+            self.slot_wait_sec += time.monotonic() - waited
+        else:
+            await slot.acquire()
+        try:
+            async with self._lock(address):
+                if address not in self._next_nonce or address in self._needs_resync:
+                    if address in self._next_nonce:
+                        self.resync_count += 1
+                    await self._seed(address)
+                nonce = self._next_nonce[address]
+                self._set_next(address, nonce + 1)
+                self._in_flight.setdefault(address, set()).add(nonce)
+                return nonce
+        except BaseException:
+            slot.release()
+            raise
+
+    def _release(self, address: str, nonce: int) -> bool:
+        in_flight = self._in_flight.get(address)
+        if in_flight is None or nonce not in in_flight:
+            return False
+        in_flight.discard(nonce)
+        self._slot(address).release()
+        return True
+
+    def confirm(self, address: str, nonce: int):
+        """Release a nonce whose transaction was accepted by the node"""
+        self._release(address, nonce)
+
+    def discard(self, address: str, nonce: int, error: Optional[Exception] = None):
+        """Release a nonce whose transaction never reached the pool.
+
+        Nonce-related node errors schedule a resync of this wallet. Otherwise
+        the nonce is handed back if it was the most recent one; if later nonces
+        are already out, the unused one leaves a gap, which is also resolved by
+        resyncing from the node.
+        """
+        if not self._release(address, nonce):
+            return
+        if error is not None and is_nonce_error(error):
+            self._needs_resync.add(address)
+        elif self._next_nonce.get(address) == nonce + 1:
+            self._set_next(address, nonce)
+        else:
+            self._needs_resync.add(address)
+
+    def mark_for_resync(self, address: str):
+        """Force the next allocation for ``address`` to reload from the node"""
+        self._needs_resync.add(address)
+
+    def pending_count(self, address: str) -> int:
+        """Number of nonces of ``address`` currently allocated and not released"""
+        return len(self._in_flight.get(address, ()))
+
+    def get_stats(self) -> Dict[str, float]:
+        """Outstanding nonces, resyncs and waits for a free slot"""
+        return {
+            "pending": sum(len(nonces) for nonces in self._in_flight.values()),
+            "resyncs": self.resync_count,
+            "slot_waits": self.slot_waits,
+            "slot_wait_sec": round(self.slot_wait_sec, 3),
+        }
 
 
 class WalletManager:
@@ -61,6 +220,9 @@ class WalletManager:
         
         self.wallets: Dict[str, ManagedWallet] = {}
         self.wallets_by_type: Dict[WalletType, List[ManagedWallet]] = {}
+        self.nonce_manager = NonceManager(self.wallets)
+        # Cleared in sharded worker processes, which only see part of the set
+        self.persist = True
         
         # Ensure parent directory exists when using a *relative* path such as
         # the default "wallets.csv". When an absolute path is supplied
@@ -76,6 +238,9 @@ class WalletManager:
         
         # Load existing wallets or create new ones
         self._load_or_create_wallets()
+        
+        if SHARD_COUNT > 1:
+            self.apply_shard(SHARD_INDEX, SHARD_COUNT)
     
     def _init_csv(self):
         """Initialize the wallets CSV file with headers"""
@@ -194,6 +359,8 @@ class WalletManager:
     
     def _save_all_wallets(self):
         """Save all wallets to CSV file"""
+        if not self.persist:
+            return
         with open(self.wallets_csv_file, "w", newline="") as f:
             writer = csv.DictWriter(f, fieldnames=[
                 "address",
@@ -221,6 +388,25 @@ class WalletManager:
                     "created_at": wallet.created_at
                 })
     
+    def apply_shard(self, shard_index: int, shard_count: int):
+        """Keep only this shard's slice of the wallet set.
+
+        Every wallet type except the funder is split round-robin, so no two
+        shard processes ever send from the same wallet (each one has its own
+        nonce manager and balance ledger). A shard never writes the wallets
+        CSV – saving a partial set would drop the other shards' keys.
+        """
+        kept: Set[str] = set()
+        for wallet_type, wallets in self.wallets_by_type.items():
+            if wallet_type != WalletType.FUNDER:
+                self.wallets_by_type[wallet_type] = wallets[shard_index::shard_count]
+                kept.update(w.address for w in self.wallets_by_type[wallet_type])
+        for address in list(self.wallets):
+            if address not in kept:
+                del self.wallets[address]
+        self.wallets_by_type.pop(WalletType.FUNDER, None)
+        self.persist = False
+    
     def get_wallets_by_type(self, wallet_type: WalletType) -> List[ManagedWallet]:
         """Get all wallets of a specific type"""
         return self.wallets_by_type.get(wallet_type, [])
@@ -243,25 +429,132 @@ class WalletManager:
         if address in self.wallets:
             try:
                 balance_wei = w3.eth.get_balance(address)
-                balance_eth = w3.from_wei(balance_wei, 'ether')
-                self.wallets[address].balance_eth = float(balance_eth)
+                self._set_balance(self.wallets[address], balance_wei)
             except Exception as e:
                 print(f"Error updating balance for {address}: {e}")
     
     def update_all_balances(self):
-        """Update balances for all wallets"""
-        print("Updating all wallet balances...")
-        for address in self.wallets.keys():
-            self.update_wallet_balance(address)
+        """Update balances for all wallets.
+
+        Synchronous entry point for scripts; the balance reads run concurrently
+        on the async client so they share JSON-RPC batch requests. Use
+        ``refresh_all_balances`` from inside a running event loop.
+        """
+        asyncio.run(self.refresh_all_balances())
+    
+    async def refresh_wallet_balance(self, address: str):
+        """Update wallet balance from blockchain without blocking the event loop"""
+        if address in self.wallets:
+            try:
+                balance_wei = await web3_async.eth.get_balance(address)
+                self._set_balance(self.wallets[address], balance_wei)
+            except Exception as e:
+                print(f"Error updating balance for {address}: {e}")
+    
+    async def refresh_all_balances(self, verbose: bool = True):
+        """Async counterpart of update_all_balances; queries all wallets concurrently"""
+        if verbose:
+            print("Updating all wallet balances...")
+        await asyncio.gather(*(self.refresh_wallet_balance(address) for address in list(self.wallets)))
         self._save_all_wallets()
     
+    async def reconcile_balance(self, address: str) -> bool:
+        """Overwrite one wallet's ledger balance with its on-chain balance.
+
+        Skipped while the wallet has reservations outstanding, and discarded if
+        the ledger was updated while the read was in flight: the chain balance
+        may then predate transactions that ``settle_funds`` already debited.
+        Returns True when the balance was applied.
+        """
+        wallet = self.wallets[address]
+        if wallet.reserved_wei:
+            return False
+        updates = wallet.ledger_updates
+        balance_wei = await web3_async.eth.get_balance(address)
+        if wallet.reserved_wei or wallet.ledger_updates != updates:
+            return False
+        self._set_balance(wallet, balance_wei)
+        return True
+    
+    async def reconcile_balances_forever(self, interval_sec: float = BALANCE_RECONCILE_SEC):
+        """Periodically resync the local balance ledger of idle wallets with on-chain balances"""
+        while True:
+            await asyncio.sleep(interval_sec)
+            try:
+                await asyncio.gather(*(self.reconcile_balance(address) for address in list(self.wallets)))
+                self._save_all_wallets()
+            except Exception as e:
+                print(f"Error reconciling wallet balances: {e}")
+    
+    # ------------------------------------------------------------------
+    # Local balance ledger
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _set_balance(wallet: ManagedWallet, balance_wei: int):
+        wallet.balance_wei = balance_wei
+        wallet.balance_eth = float(w3.from_wei(balance_wei, 'ether'))
+    
+    async def reserve_funds(self, address: str, cost_wei: int) -> bool:
+        """Reserve ``cost_wei`` of a managed wallet's balance for a pending transaction.
+
+        Returns False (and reserves nothing) when the ledger says the wallet
+        cannot pay. The ledger is seeded from the chain on first use only.
+        """
+        wallet = self.wallets[address]
+        if wallet.balance_wei is None:
+            self._set_balance(wallet, await web3_async.eth.get_balance(address))
+        if wallet.spendable_wei < cost_wei:
+            return False
+        wallet.reserved_wei += cost_wei
+        wallet.ledger_updates += 1
+        return True
+    
+    def settle_funds(self, address: str, reserved_wei: int, spent_wei: int = 0):
+        """Release a reservation and debit what the transaction actually cost.
+
+        ``spent_wei`` is ``value + gasUsed * effectiveGasPrice`` for a mined
+        transaction and 0 for one that never reached the chain.
+        """
+        wallet = self.wallets.get(address)
+        if wallet is None:
+            return
+        wallet.reserved_wei = max(0, wallet.reserved_wei - reserved_wei)
+        wallet.ledger_updates += 1
+        if spent_wei and wallet.balance_wei is not None:
+            self._set_balance(wallet, wallet.balance_wei - spent_wei)
+    
+    def get_ledger(self) -> Dict[str, List[Optional[int]]]:
+        """``{address: [balance_wei, reserved_wei]}`` of this process's wallets, as exchanged between shard processes"""
+        return {address: [w.balance_wei, w.reserved_wei] for address, w in self.wallets.items()}
+    
+    def set_ledger(self, ledger: Dict[str, List[Optional[int]]]):
+        """Overwrite the ledger of the given wallets (the sharded launcher mirrors the shards' ledgers here)"""
+        for address, (balance_wei, reserved_wei) in ledger.items():
+            wallet = self.wallets.get(address)
+            if wallet is None:
+                continue
+            if balance_wei is not None:
+                self._set_balance(wallet, balance_wei)
+            wallet.reserved_wei = reserved_wei
+    
+    def credit_funds(self, address: str, amount_wei: int):
+        """Credit a mined incoming transfer to a managed wallet's ledger"""
+        wallet = self.wallets.get(address)
+        if wallet is not None and wallet.balance_wei is not None and amount_wei:
+            self._set_balance(wallet, wallet.balance_wei + amount_wei)
+            wallet.ledger_updates += 1
+    
     def record_transaction(self, address: str, gas_used: int):
-        """Record a transaction for the specified wallet"""
+        """Record a mined transaction for the specified wallet.
+
+        ``ManagedWallet.nonce`` is maintained by ``nonce_manager`` at allocation
+        time, so it is not advanced here.
+        """
         if address in self.wallets:
             wallet = self.wallets[address]
             wallet.total_transactions += 1
             wallet.total_gas_used += gas_used
-            wallet.nonce += 1
     
     def get_funding_summary(self) -> Dict[str, any]:
         """Get summary of funding needed for all wallets"""
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+# First reconnect delay; doubled after every failed attempt up to reconnect_max_sec
+RECONNECT_INITIAL_SEC = 0.5
+
+
+class WebSocketRPCProvider(AsyncJSONBaseProvider):
+    """Async web3 provider that multiplexes all JSON-RPC calls over one WebSocket.
+
+    Any number of coroutines can have requests outstanding at once; responses
+    are matched back to their callers by JSON-RPC id. :meth:`subscribe`
+    registers an ``eth_subscribe`` stream (e.g. ``newHeads``) whose
+    notifications are delivered to a callback.
+
+    A background task owns the connection. When the socket drops, requests
+    in flight fail with ``ConnectionError`` (they may or may not have reached
+    the node, so nothing is re-sent), and the task reconnects with exponential
+    backoff and re-creates every subscription. New requests wait up to
+    ``request_timeout`` for the connection to come back.
+    """
+
+    def __init__(self, endpoint_uri: str, request_timeout: float = 30.0, reconnect_max_sec: float = 30.0):
+        super().__init__()
+        self.endpoint_uri = endpoint_uri
+        self.request_timeout = request_timeout
+        self.reconnect_max_sec = reconnect_max_sec
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._connected: Optional[asyncio.Event] = None
+        self._requests: Dict[Any, asyncio.Future] = {}
+        self._subscriptions: List[Tuple[str, Callable[[Any], None]]] = []
+        self._callbacks: Dict[str, Callable[[Any], None]] = {}
+        # Indices into _subscriptions subscribed (or being subscribed) on the current connection
+        self._live: Set[int] = set()
+
+        # Counters
+        self.requests_sent = 0
+        self.notifications = 0
+        self.reconnects = 0
+        self.calls_by_method: Dict[str, int] = {}
+
+    def __str__(self) -> str:
+        return f"WebSocket connection {self.endpoint_uri}"
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        self.calls_by_method[method] = self.calls_by_method.get(method, 0) + 1
+        self._ensure_running()
+        try:
+            await asyncio.wait_for(self._connected.wait(), self.request_timeout)
+        except asyncio.TimeoutError:
+            raise ConnectionError(f"No WebSocket connection to {self.endpoint_uri}")
+
+        ws = self._ws
+        if ws is None:
+            raise ConnectionError(f"WebSocket connection to {self.endpoint_uri} lost")
+        encoded = self.encode_rpc_request(method, params)
+        request_id = json.loads(encoded)["id"]
+        future = self._loop.create_future()
+        self._requests[request_id] = future
+        try:
+            self.requests_sent += 1
+            await ws.send_str(encoded.decode())
+            return await asyncio.wait_for(future, self.request_timeout)
+        finally:
+            self._requests.pop(request_id, None)
+
+    async def subscribe(self, kind: str, callback: Callable[[Any], None]):
+        """Subscribe to ``eth_subscribe`` notifications of ``kind`` for the provider's lifetime.
+
+        ``callback(result)`` runs on the event loop for every notification and
+        must not block. The subscription is renewed after every reconnect.
+        """
+        self._ensure_running()
+        self._subscriptions.append((kind, callback))
+        if self._connected.is_set():
+            await self._subscribe_one(len(self._subscriptions) - 1)
+
+    @property
+    def supports_push(self) -> bool:
+        return True
+
+    @property
+    def connected(self) -> bool:
+        return self._connected is not None and self._connected.is_set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        return {
+            "connected": self.connected,
+            "requests_sent": self.requests_sent,
+            "requests_in_flight": len(self._requests),
+            "subscriptions": len(self._subscriptions),
+            "notifications": self.notifications,
+            "reconnects": self.reconnects,
+            "calls_by_method": dict(self.calls_by_method),
+        }
+
+    async def disconnect(self):
+        """Close the connection and stop reconnecting"""
+        if self._runner is not None and not self._runner.done():
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+        self._runner = None
+
+    # ------------------------------------------------------------------
+    # Connection management
+    # ------------------------------------------------------------------
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # First use, or a new event loop (e.g. a later asyncio.run()) –
+            # state bound to the old loop cannot be reused.
+            self._loop = loop
+            self._runner = None
+            self._ws = None
+            self._requests.clear()
+            self._callbacks.clear()
+            self._live.clear()
+            self._connected = asyncio.Event()
+        if self._runner is None or self._runner.done():
+            self._runner = loop.create_task(self._run())
+
+    async def _run(self):
+        delay = RECONNECT_INITIAL_SEC
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    async with session.ws_connect(self.endpoint_uri, heartbeat=30, max_msg_size=0) as ws:
+                        self._ws = ws
+                        self._connected.set()
+                        delay = RECONNECT_INITIAL_SEC
+                        logging.info(f"Connected to {self.endpoint_uri}")
+                        resubscribe = asyncio.ensure_future(self._resubscribe())
+                        try:
+                            await self._read(ws)
+                        finally:
+                            resubscribe.cancel()
+                    logging.warning(f"WebSocket connection to {self.endpoint_uri} closed")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logging.warning(f"WebSocket connection to {self.endpoint_uri} failed: {e}")
+                finally:
+                    self._on_disconnect()
+
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.reconnect_max_sec)
+                self.reconnects += 1
+
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse):
+        async for message in ws:
+            if message.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                break
+            try:
+                payload = self.decode_rpc_response(message.data)
+            except Exception as e:
+                logging.debug(f"Undecodable WebSocket message: {e}")
+                continue
+            for item in payload if isinstance(payload, list) else [payload]:
+                self._dispatch(item)
+
+    def _dispatch(self, item: Dict[str, Any]):
+        if item.get("method") == "eth_subscription":
+            params = item.get("params", {})
+            callback = self._callbacks.get(params.get("subscription"))
+            if callback is not None:
+                self.notifications += 1
+                try:
+                    callback(params.get("result"))
+                except Exception as e:
+                    logging.warning(f"Subscription callback failed: {e}")
+            return
+        future = self._requests.get(item.get("id"))
+        if future is not None and not future.done():
+            future.set_result(item)
+
+    def _on_disconnect(self):
+        self._ws = None
+        self._connected.clear()
+        self._callbacks.clear()
+        self._live.clear()
+        error = ConnectionError(f"WebSocket connection to {self.endpoint_uri} lost")
+        for future in self._requests.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def _resubscribe(self):
+        for index in range(len(self._subscriptions)):
+            try:
+                await self._subscribe_one(index)
+            except Exception as e:
+                logging.warning(f"Failed to subscribe to {self._subscriptions[index][0]}: {e}")
+
+    async def _subscribe_one(self, index: int):
+        """Subscribe ``_subscriptions[index]`` unless it already is on this connection
+
+        :meth:`subscribe` and :meth:`_resubscribe` can both reach the same
+        entry right after a connect; only the first one sends ``eth_subscribe``.
+        """
+        if index in self._live:
+            return
+        self._live.add(index)
+        ws = self._ws
+        kind, callback = self._subscriptions[index]
+        try:
+            response = await self.make_request(RPCEndpoint("eth_subscribe"), [kind])
+            if "error" in response:
+                raise ValueError(response["error"])
+        except BaseException:
+            if self._ws is ws:
+                self._live.discard(index)
+            raise
+        self._callbacks[response["result"]] = callback